@@ -0,0 +1,111 @@
+-- Migration 0013: materialized per-principal visible ACL set
+-- Retrieval filters spans with a single artifact.acl_id = ANY(acl_ids) check instead of
+-- joining acl_allow twice (principal + role branches) through principal_role per query.
+-- Kept current by triggers on acl_allow and principal_role.
+
+CREATE TABLE IF NOT EXISTS principal_acl_visibility (
+  org_id uuid NOT NULL,
+  principal_id uuid NOT NULL,
+  acl_ids uuid[] NOT NULL DEFAULT '{}',
+  refreshed_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (org_id, principal_id)
+);
+
+-- Recompute one principal's visible ACLs (direct grants + grants via roles).
+-- No foreign keys on the table: rows are dropped here once the principal is gone,
+-- which also covers cascaded deletes that fire the triggers below.
+CREATE OR REPLACE FUNCTION refresh_principal_acl_visibility(p_org_id uuid, p_principal_id uuid)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM principal WHERE principal_id = p_principal_id) THEN
+    DELETE FROM principal_acl_visibility
+    WHERE org_id = p_org_id AND principal_id = p_principal_id;
+    RETURN;
+  END IF;
+
+  INSERT INTO principal_acl_visibility (org_id, principal_id, acl_ids, refreshed_at)
+  SELECT p_org_id, p_principal_id, COALESCE(array_agg(v.acl_id ORDER BY v.acl_id), '{}'), now()
+  FROM (
+    SELECT aa.acl_id
+    FROM acl_allow aa
+    JOIN acl ON acl.acl_id = aa.acl_id AND acl.org_id = aa.org_id
+    WHERE aa.org_id = p_org_id
+      AND aa.allow_type = 'principal'
+      AND aa.principal_id = p_principal_id
+    UNION
+    SELECT aa.acl_id
+    FROM principal_role pr
+    JOIN acl_allow aa ON aa.org_id = pr.org_id AND aa.allow_type = 'role' AND aa.role_id = pr.role_id
+    JOIN acl ON acl.acl_id = aa.acl_id AND acl.org_id = aa.org_id
+    WHERE pr.org_id = p_org_id
+      AND pr.principal_id = p_principal_id
+  ) v
+  ON CONFLICT (org_id, principal_id) DO UPDATE
+    SET acl_ids = EXCLUDED.acl_ids,
+        refreshed_at = EXCLUDED.refreshed_at;
+END;
+$$;
+
+-- Refresh every principal affected by one acl_allow row
+CREATE OR REPLACE FUNCTION refresh_acl_visibility_for_allow(
+  p_org_id uuid, p_allow_type text, p_principal_id uuid, p_role_id uuid
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_allow_type = 'principal' THEN
+    PERFORM refresh_principal_acl_visibility(p_org_id, p_principal_id);
+  ELSE
+    PERFORM refresh_principal_acl_visibility(pr.org_id, pr.principal_id)
+    FROM principal_role pr
+    WHERE pr.org_id = p_org_id AND pr.role_id = p_role_id;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_acl_allow_visibility()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM refresh_acl_visibility_for_allow(OLD.org_id, OLD.allow_type, OLD.principal_id, OLD.role_id);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM refresh_acl_visibility_for_allow(NEW.org_id, NEW.allow_type, NEW.principal_id, NEW.role_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_principal_role_visibility()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM refresh_principal_acl_visibility(OLD.org_id, OLD.principal_id);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM refresh_principal_acl_visibility(NEW.org_id, NEW.principal_id);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS acl_allow_visibility ON acl_allow;
+CREATE TRIGGER acl_allow_visibility
+  AFTER INSERT OR UPDATE OR DELETE ON acl_allow
+  FOR EACH ROW EXECUTE FUNCTION trg_acl_allow_visibility();
+
+DROP TRIGGER IF EXISTS principal_role_visibility ON principal_role;
+CREATE TRIGGER principal_role_visibility
+  AFTER INSERT OR UPDATE OR DELETE ON principal_role
+  FOR EACH ROW EXECUTE FUNCTION trg_principal_role_visibility();
+
+-- Backfill every existing principal
+SELECT refresh_principal_acl_visibility(p.org_id, p.principal_id)
+FROM principal p;
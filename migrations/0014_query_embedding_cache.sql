@@ -0,0 +1,12 @@
+-- Migration 0014: shared query-embedding cache for retrieval replicas
+-- Keyed by sha256(model name, model version, normalized query text); the raw query
+-- text is not stored. Rows older than the service TTL are ignored and pruned.
+CREATE TABLE IF NOT EXISTS query_embedding_cache (
+  cache_key text PRIMARY KEY,
+  model_name text NOT NULL,
+  model_version text NOT NULL,
+  embedding vector NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_embedding_cache_created ON query_embedding_cache(created_at);
@@ -0,0 +1,126 @@
+-- Migration 0015: per-org data generation counter
+-- Retrieval caches full results keyed by (org, ACL fingerprint, query, config, generation).
+-- Any write to data the pipeline reads -- ingest (artifact, artifact_text, evidence_span),
+-- graph derivation (graph_node, graph_edge, edge_evidence, span_node) and embedding
+-- generation (evidence_embedding) -- bumps the org's generation, so cached results for
+-- the org stop matching. ACL changes need no bump: they change the ACL fingerprint.
+-- Triggers are statement-level with transition tables: one bump per org per statement.
+
+CREATE TABLE IF NOT EXISTS org_data_generation (
+  org_id uuid PRIMARY KEY,
+  generation bigint NOT NULL DEFAULT 1,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION bump_org_data_generation(p_org_ids uuid[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_org_ids IS NULL OR cardinality(p_org_ids) = 0 THEN
+    RETURN;
+  END IF;
+  INSERT INTO org_data_generation (org_id, generation, updated_at)
+  SELECT DISTINCT o, 1, now()
+  FROM unnest(p_org_ids) AS o
+  WHERE o IS NOT NULL
+  ORDER BY o  -- consistent lock order across concurrent writers
+  ON CONFLICT (org_id) DO UPDATE
+    SET generation = org_data_generation.generation + 1,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$;
+
+-- Tables carrying org_id directly
+CREATE OR REPLACE FUNCTION trg_org_data_generation()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_org_data_generation(ARRAY(SELECT DISTINCT org_id FROM old_rows));
+  ELSE
+    PERFORM bump_org_data_generation(ARRAY(SELECT DISTINCT org_id FROM new_rows));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- evidence_embedding: org via evidence_span
+CREATE OR REPLACE FUNCTION trg_org_data_generation_embedding()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_org_data_generation(ARRAY(
+      SELECT DISTINCT es.org_id FROM old_rows r JOIN evidence_span es ON es.evidence_span_id = r.evidence_span_id
+    ));
+  ELSE
+    PERFORM bump_org_data_generation(ARRAY(
+      SELECT DISTINCT es.org_id FROM new_rows r JOIN evidence_span es ON es.evidence_span_id = r.evidence_span_id
+    ));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- edge_evidence: org via graph_edge
+CREATE OR REPLACE FUNCTION trg_org_data_generation_edge_evidence()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_org_data_generation(ARRAY(
+      SELECT DISTINCT ge.org_id FROM old_rows r JOIN graph_edge ge ON ge.edge_id = r.edge_id
+    ));
+  ELSE
+    PERFORM bump_org_data_generation(ARRAY(
+      SELECT DISTINCT ge.org_id FROM new_rows r JOIN graph_edge ge ON ge.edge_id = r.edge_id
+    ));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Transition tables need one trigger per event
+DO $$
+DECLARE
+  t record;
+BEGIN
+  FOR t IN
+    SELECT * FROM (VALUES
+      ('artifact', 'trg_org_data_generation'),
+      ('artifact_text', 'trg_org_data_generation'),
+      ('evidence_span', 'trg_org_data_generation'),
+      ('graph_node', 'trg_org_data_generation'),
+      ('graph_edge', 'trg_org_data_generation'),
+      ('span_node', 'trg_org_data_generation'),
+      ('evidence_embedding', 'trg_org_data_generation_embedding'),
+      ('edge_evidence', 'trg_org_data_generation_edge_evidence')
+    ) AS v(tbl, fn)
+  LOOP
+    IF to_regclass(t.tbl) IS NULL THEN
+      CONTINUE;
+    END IF;
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.tbl || '_generation_ins', t.tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.tbl || '_generation_upd', t.tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.tbl || '_generation_del', t.tbl);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      t.tbl || '_generation_ins', t.tbl, t.fn);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      t.tbl || '_generation_upd', t.tbl, t.fn);
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+      t.tbl || '_generation_del', t.tbl, t.fn);
+  END LOOP;
+END;
+$$;
+
+-- Start every existing org at generation 1
+INSERT INTO org_data_generation (org_id)
+SELECT org_id FROM org
+ON CONFLICT (org_id) DO NOTHING;
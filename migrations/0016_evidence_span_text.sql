@@ -0,0 +1,91 @@
+-- Migration 0016: span text side table
+-- Hydration (retrieval), embedding generation and graph derivation read a span as
+-- SUBSTRING(artifact_text.text_utf8 ...), which detoasts the whole artifact text
+-- (megabytes for long transcripts) to extract a few hundred characters. Span text is
+-- now copied once, at write time, into a compact row keyed by span id.
+-- Kept current by triggers on evidence_span (insert / offset change) and artifact_text
+-- (text rewrite); readers fall back to SUBSTRING when a row is missing.
+
+CREATE TABLE IF NOT EXISTS evidence_span_text (
+  evidence_span_id uuid PRIMARY KEY REFERENCES evidence_span(evidence_span_id) ON DELETE CASCADE,
+  org_id uuid NOT NULL,
+  span_text text NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- (Re)materialize the text of the given spans
+CREATE OR REPLACE FUNCTION refresh_evidence_span_text(p_span_ids uuid[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_span_ids IS NULL OR cardinality(p_span_ids) = 0 THEN
+    RETURN;
+  END IF;
+  INSERT INTO evidence_span_text (evidence_span_id, org_id, span_text, updated_at)
+  SELECT es.evidence_span_id,
+         es.org_id,
+         SUBSTRING(at.text_utf8 FROM es.start_char + 1 FOR es.end_char - es.start_char),
+         now()
+  FROM evidence_span es
+  JOIN artifact_text at ON at.artifact_text_id = es.artifact_text_id
+  WHERE es.evidence_span_id = ANY(p_span_ids)
+  ON CONFLICT (evidence_span_id) DO UPDATE
+    SET span_text = EXCLUDED.span_text,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_evidence_span_text()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM refresh_evidence_span_text(ARRAY(SELECT evidence_span_id FROM new_rows));
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_evidence_span_text_artifact_text()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM refresh_evidence_span_text(ARRAY(
+    SELECT es.evidence_span_id
+    FROM evidence_span es
+    JOIN new_rows r ON r.artifact_text_id = es.artifact_text_id
+    JOIN old_rows o ON o.artifact_text_id = r.artifact_text_id
+    WHERE r.text_utf8 IS DISTINCT FROM o.text_utf8
+  ));
+  RETURN NULL;
+END;
+$$;
+
+-- Statement-level with transition tables: one refresh per statement (bulk ingest, COPY)
+DROP TRIGGER IF EXISTS evidence_span_text_ins ON evidence_span;
+CREATE TRIGGER evidence_span_text_ins
+  AFTER INSERT ON evidence_span
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION trg_evidence_span_text();
+
+DROP TRIGGER IF EXISTS evidence_span_text_upd ON evidence_span;
+CREATE TRIGGER evidence_span_text_upd
+  AFTER UPDATE ON evidence_span
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION trg_evidence_span_text();
+
+DROP TRIGGER IF EXISTS evidence_span_text_upd ON artifact_text;
+CREATE TRIGGER evidence_span_text_upd
+  AFTER UPDATE ON artifact_text
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION trg_evidence_span_text_artifact_text();
+
+-- Backfill existing spans
+INSERT INTO evidence_span_text (evidence_span_id, org_id, span_text)
+SELECT es.evidence_span_id,
+       es.org_id,
+       SUBSTRING(at.text_utf8 FROM es.start_char + 1 FOR es.end_char - es.start_char)
+FROM evidence_span es
+JOIN artifact_text at ON at.artifact_text_id = es.artifact_text_id
+ON CONFLICT (evidence_span_id) DO NOTHING;
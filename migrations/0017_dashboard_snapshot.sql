@@ -0,0 +1,145 @@
+-- Migration 0017: per-org dashboard snapshot
+-- /v1/dashboard computed its stats with four COUNT(*) subqueries over decision and
+-- dissent_record on every page load. The counters now live in one row per org, kept
+-- current by row triggers; `version` is bumped by every write that can change the
+-- dashboard (decisions, dissent, insights, streams) so the gateway can serve an
+-- ETag / 304 and cache the rendered dashboard until it moves.
+-- The decision tables are created outside these migrations, so triggers, indexes and the
+-- backfill are only installed when they exist; until then the gateway keeps using live
+-- counts. The runner never re-applies this file: once the tables exist, call
+-- install_dashboard_snapshot() (0021), which the API gateway does on startup.
+
+CREATE TABLE IF NOT EXISTS org_dashboard_snapshot (
+  org_id uuid PRIMARY KEY,
+  total_decisions bigint NOT NULL DEFAULT 0,
+  active_decisions bigint NOT NULL DEFAULT 0,
+  open_dissent bigint NOT NULL DEFAULT 0,
+  version bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Apply counter deltas and bump the version (creates the org's row on first write)
+CREATE OR REPLACE FUNCTION bump_org_dashboard(
+  p_org_id uuid, d_total bigint, d_active bigint, d_open_dissent bigint
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO org_dashboard_snapshot (org_id, total_decisions, active_decisions, open_dissent, version)
+  VALUES (p_org_id, d_total, d_active, d_open_dissent, 1)
+  ON CONFLICT (org_id) DO UPDATE
+    SET total_decisions = org_dashboard_snapshot.total_decisions + EXCLUDED.total_decisions,
+        active_decisions = org_dashboard_snapshot.active_decisions + EXCLUDED.active_decisions,
+        open_dissent = org_dashboard_snapshot.open_dissent + EXCLUDED.open_dissent,
+        version = org_dashboard_snapshot.version + 1,
+        updated_at = now();
+$$;
+
+CREATE OR REPLACE FUNCTION trg_org_dashboard_decision()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM bump_org_dashboard(OLD.org_id, -1, -(CASE WHEN OLD.status = 'active' THEN 1 ELSE 0 END), 0);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM bump_org_dashboard(NEW.org_id, 1, CASE WHEN NEW.status = 'active' THEN 1 ELSE 0 END, 0);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_org_dashboard_dissent()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM bump_org_dashboard(OLD.org_id, 0, 0, -(CASE WHEN OLD.status = 'open' THEN 1 ELSE 0 END));
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM bump_org_dashboard(NEW.org_id, 0, 0, CASE WHEN NEW.status = 'open' THEN 1 ELSE 0 END);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Version-only bump (insights, stream renames / colors)
+CREATE OR REPLACE FUNCTION trg_org_dashboard_touch()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_org_dashboard(OLD.org_id, 0, 0, 0);
+  ELSE
+    PERFORM bump_org_dashboard(NEW.org_id, 0, 0, 0);
+    IF TG_OP = 'UPDATE' AND NEW.org_id IS DISTINCT FROM OLD.org_id THEN
+      PERFORM bump_org_dashboard(OLD.org_id, 0, 0, 0);
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+BEGIN
+  IF to_regclass('decision') IS NULL OR to_regclass('dissent_record') IS NULL THEN
+    RAISE NOTICE 'decision / dissent_record not found; dashboard snapshot triggers not installed';
+    RETURN;
+  END IF;
+
+  DROP TRIGGER IF EXISTS org_dashboard_snapshot_decision ON decision;
+  CREATE TRIGGER org_dashboard_snapshot_decision
+    AFTER INSERT OR UPDATE OR DELETE ON decision
+    FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_decision();
+
+  DROP TRIGGER IF EXISTS org_dashboard_snapshot_dissent ON dissent_record;
+  CREATE TRIGGER org_dashboard_snapshot_dissent
+    AFTER INSERT OR UPDATE OR DELETE ON dissent_record
+    FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_dissent();
+
+  -- Dashboard list queries: active revisits, open dissent (recent decisions use
+  -- 0018's idx_decision_org_keyset)
+  CREATE INDEX IF NOT EXISTS idx_decision_org_revisit_active
+    ON decision (org_id, revisit_date) WHERE status = 'active';
+  CREATE INDEX IF NOT EXISTS idx_dissent_record_org_open
+    ON dissent_record (org_id, created_at DESC) WHERE status = 'open';
+
+  -- Backfill (recomputes counters when re-run)
+  INSERT INTO org_dashboard_snapshot (org_id, total_decisions, active_decisions, open_dissent, version)
+  SELECT org_id, SUM(total), SUM(active), SUM(open_dissent), 1
+  FROM (
+    SELECT org_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active, 0 AS open_dissent
+    FROM decision GROUP BY org_id
+    UNION ALL
+    SELECT org_id, 0, 0, COUNT(*) FILTER (WHERE status = 'open')
+    FROM dissent_record GROUP BY org_id
+  ) c
+  GROUP BY org_id
+  ON CONFLICT (org_id) DO UPDATE
+    SET total_decisions = EXCLUDED.total_decisions,
+        active_decisions = EXCLUDED.active_decisions,
+        open_dissent = EXCLUDED.open_dissent,
+        version = org_dashboard_snapshot.version + 1,
+        updated_at = now();
+END;
+$$;
+
+DO $$
+BEGIN
+  IF to_regclass('insight') IS NOT NULL THEN
+    DROP TRIGGER IF EXISTS org_dashboard_snapshot_insight ON insight;
+    CREATE TRIGGER org_dashboard_snapshot_insight
+      AFTER INSERT OR UPDATE OR DELETE ON insight
+      FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_touch();
+  END IF;
+  IF to_regclass('decision_stream') IS NOT NULL THEN
+    DROP TRIGGER IF EXISTS org_dashboard_snapshot_stream ON decision_stream;
+    CREATE TRIGGER org_dashboard_snapshot_stream
+      AFTER INSERT OR UPDATE OR DELETE ON decision_stream
+      FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_touch();
+  END IF;
+END;
+$$;
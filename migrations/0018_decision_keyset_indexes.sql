@@ -0,0 +1,25 @@
+-- Migration 0018: indexes for keyset-paginated /v1/decisions
+-- The list is ordered and paged on (decided_at, decision_id), per org or per stream, and
+-- counts open dissent / uncertainty for the page's decisions only. Guarded like 0017:
+-- the decision tables are created outside these migrations. The runner never re-applies
+-- this file; install_decision_indexes() (0022), called by the API gateway on startup,
+-- creates whichever of these indexes are missing once the tables exist.
+
+DO $$
+BEGIN
+  IF to_regclass('decision') IS NOT NULL THEN
+    CREATE INDEX IF NOT EXISTS idx_decision_org_keyset
+      ON decision (org_id, decided_at DESC, decision_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_decision_stream_keyset
+      ON decision (stream_id, decided_at DESC, decision_id DESC);
+  END IF;
+  IF to_regclass('dissent_record') IS NOT NULL THEN
+    CREATE INDEX IF NOT EXISTS idx_dissent_record_decision_open
+      ON dissent_record (decision_id) WHERE status = 'open';
+  END IF;
+  IF to_regclass('uncertainty_record') IS NOT NULL THEN
+    CREATE INDEX IF NOT EXISTS idx_uncertainty_record_decision_open
+      ON uncertainty_record (decision_id) WHERE status = 'open';
+  END IF;
+END;
+$$;
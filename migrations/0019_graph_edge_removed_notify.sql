@@ -0,0 +1,65 @@
+-- Migration 0019: tell retrieval's cached adjacency about edge deletes and updates
+-- Retrieval keeps a per-org CSR adjacency refreshed by delta fetches on
+-- graph_edge.updated_at (after NOTIFY graph_changed from the deriver). A delta cannot
+-- see deleted edges, or the old key of an edge whose endpoints / type changed, so those
+-- now NOTIFY graph_edge_removed (payload org_id; retrieval rebuilds the org's
+-- adjacency). Any other update stamps updated_at so the next delta fetch picks it up.
+
+CREATE OR REPLACE FUNCTION trg_graph_edge_touch()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+-- Deletes: one notification per org per statement (transition table)
+CREATE OR REPLACE FUNCTION trg_graph_edge_removed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify('graph_edge_removed', o.org_id::text)
+  FROM (SELECT DISTINCT org_id FROM old_rows) o;
+  RETURN NULL;
+END;
+$$;
+
+-- Key changes: the edge disappears under its old (org, src, dst, type)
+CREATE OR REPLACE FUNCTION trg_graph_edge_rekeyed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify('graph_edge_removed', OLD.org_id::text);
+  IF NEW.org_id IS DISTINCT FROM OLD.org_id THEN
+    PERFORM pg_notify('graph_edge_removed', NEW.org_id::text);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS graph_edge_touch ON graph_edge;
+CREATE TRIGGER graph_edge_touch
+  BEFORE UPDATE ON graph_edge
+  FOR EACH ROW
+  WHEN (OLD.* IS DISTINCT FROM NEW.*)
+  EXECUTE FUNCTION trg_graph_edge_touch();
+
+DROP TRIGGER IF EXISTS graph_edge_removed_del ON graph_edge;
+CREATE TRIGGER graph_edge_removed_del
+  AFTER DELETE ON graph_edge
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION trg_graph_edge_removed();
+
+DROP TRIGGER IF EXISTS graph_edge_removed_rekey ON graph_edge;
+CREATE TRIGGER graph_edge_removed_rekey
+  AFTER UPDATE OF org_id, src_node_id, dst_node_id, edge_type ON graph_edge
+  FOR EACH ROW
+  WHEN (OLD.org_id IS DISTINCT FROM NEW.org_id
+        OR OLD.src_node_id IS DISTINCT FROM NEW.src_node_id
+        OR OLD.dst_node_id IS DISTINCT FROM NEW.dst_node_id
+        OR OLD.edge_type IS DISTINCT FROM NEW.edge_type)
+  EXECUTE FUNCTION trg_graph_edge_rekeyed();
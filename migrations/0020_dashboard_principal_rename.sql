@@ -0,0 +1,13 @@
+-- Migration 0020: principal renames move the dashboard snapshot version
+-- The dashboard's recent decisions carry the decider's principal.display_name, but
+-- only decision, dissent, insight and stream writes bumped
+-- org_dashboard_snapshot.version (0017), so a rename kept serving the old ETag / 304
+-- and the cached body with the old name. Renames (and org moves) now bump the
+-- affected orgs' version like any other dashboard write.
+
+DROP TRIGGER IF EXISTS org_dashboard_snapshot_principal ON principal;
+CREATE TRIGGER org_dashboard_snapshot_principal
+  AFTER UPDATE OF display_name, org_id ON principal
+  FOR EACH ROW
+  WHEN (OLD.display_name IS DISTINCT FROM NEW.display_name OR OLD.org_id IS DISTINCT FROM NEW.org_id)
+  EXECUTE FUNCTION trg_org_dashboard_touch();
@@ -0,0 +1,85 @@
+-- Migration 0021: re-runnable install of the dashboard snapshot triggers
+-- 0017 installed its triggers, indexes and backfill only if decision and dissent_record
+-- already existed. Those tables are created outside these migrations, so on a fresh
+-- database 0017 was recorded as applied without installing anything, and the runner
+-- never applies it again. The guarded part of 0017 is now install_dashboard_snapshot(),
+-- which this migration calls once and the API gateway calls on every startup:
+--   'missing'   decision / dissent_record do not exist yet (the gateway uses live counts)
+--   'present'   already installed; only triggers for newly created optional tables are added
+--   'installed' triggers and indexes created and counters backfilled
+
+CREATE OR REPLACE FUNCTION install_dashboard_snapshot()
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF to_regclass('decision') IS NULL OR to_regclass('dissent_record') IS NULL THEN
+    RETURN 'missing';
+  END IF;
+
+  -- Gateway workers start together; one installs, the rest then see 'present'
+  PERFORM pg_advisory_xact_lock(hashtext('install_dashboard_snapshot'));
+
+  IF to_regclass('insight') IS NOT NULL AND NOT EXISTS (
+    SELECT 1 FROM pg_trigger
+    WHERE tgrelid = to_regclass('insight') AND tgname = 'org_dashboard_snapshot_insight'
+  ) THEN
+    CREATE TRIGGER org_dashboard_snapshot_insight
+      AFTER INSERT OR UPDATE OR DELETE ON insight
+      FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_touch();
+  END IF;
+  IF to_regclass('decision_stream') IS NOT NULL AND NOT EXISTS (
+    SELECT 1 FROM pg_trigger
+    WHERE tgrelid = to_regclass('decision_stream') AND tgname = 'org_dashboard_snapshot_stream'
+  ) THEN
+    CREATE TRIGGER org_dashboard_snapshot_stream
+      AFTER INSERT OR UPDATE OR DELETE ON decision_stream
+      FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_touch();
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM pg_trigger
+    WHERE tgrelid = to_regclass('decision') AND tgname = 'org_dashboard_snapshot_decision'
+  ) THEN
+    RETURN 'present';
+  END IF;
+
+  CREATE TRIGGER org_dashboard_snapshot_decision
+    AFTER INSERT OR UPDATE OR DELETE ON decision
+    FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_decision();
+
+  DROP TRIGGER IF EXISTS org_dashboard_snapshot_dissent ON dissent_record;
+  CREATE TRIGGER org_dashboard_snapshot_dissent
+    AFTER INSERT OR UPDATE OR DELETE ON dissent_record
+    FOR EACH ROW EXECUTE FUNCTION trg_org_dashboard_dissent();
+
+  -- Dashboard list queries: active revisits, open dissent
+  CREATE INDEX IF NOT EXISTS idx_decision_org_revisit_active
+    ON decision (org_id, revisit_date) WHERE status = 'active';
+  CREATE INDEX IF NOT EXISTS idx_dissent_record_org_open
+    ON dissent_record (org_id, created_at DESC) WHERE status = 'open';
+
+  -- Backfill. CREATE TRIGGER holds off writers to both tables until this transaction
+  -- commits, so no write lands between the counts and the triggers.
+  INSERT INTO org_dashboard_snapshot (org_id, total_decisions, active_decisions, open_dissent, version)
+  SELECT org_id, SUM(total), SUM(active), SUM(open_dissent), 1
+  FROM (
+    SELECT org_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active, 0 AS open_dissent
+    FROM decision GROUP BY org_id
+    UNION ALL
+    SELECT org_id, 0, 0, COUNT(*) FILTER (WHERE status = 'open')
+    FROM dissent_record GROUP BY org_id
+  ) c
+  GROUP BY org_id
+  ON CONFLICT (org_id) DO UPDATE
+    SET total_decisions = EXCLUDED.total_decisions,
+        active_decisions = EXCLUDED.active_decisions,
+        open_dissent = EXCLUDED.open_dissent,
+        version = org_dashboard_snapshot.version + 1,
+        updated_at = now();
+
+  RETURN 'installed';
+END;
+$$;
+
+SELECT install_dashboard_snapshot();
@@ -0,0 +1,45 @@
+-- Migration 0022: re-runnable install of the /v1/decisions keyset indexes
+-- 0018 created its indexes only on tables that already existed, and like 0017 it is
+-- never re-applied, so decision tables created later had no keyset or open-status
+-- indexes. The guarded part of 0018 is now install_decision_indexes(), called here once
+-- and by the API gateway on every startup:
+--   'missing'   decision does not exist yet
+--   'present'   every index whose table exists is already there
+--   'installed' at least one index was created
+
+CREATE OR REPLACE FUNCTION install_decision_indexes()
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  spec record;
+  created boolean := false;
+BEGIN
+  IF to_regclass('decision') IS NULL THEN
+    RETURN 'missing';
+  END IF;
+
+  PERFORM pg_advisory_xact_lock(hashtext('install_decision_indexes'));
+
+  FOR spec IN
+    SELECT * FROM (VALUES
+      ('decision', 'idx_decision_org_keyset', '(org_id, decided_at DESC, decision_id DESC)', ''),
+      ('decision', 'idx_decision_stream_keyset', '(stream_id, decided_at DESC, decision_id DESC)', ''),
+      ('dissent_record', 'idx_dissent_record_decision_open', '(decision_id)', ' WHERE status = ''open'''),
+      ('uncertainty_record', 'idx_uncertainty_record_decision_open', '(decision_id)', ' WHERE status = ''open''')
+    ) AS s (tbl, idx, cols, pred)
+  LOOP
+    IF to_regclass(spec.tbl) IS NOT NULL AND NOT EXISTS (
+      SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+      WHERE i.indrelid = to_regclass(spec.tbl) AND c.relname = spec.idx
+    ) THEN
+      EXECUTE format('CREATE INDEX %I ON %s %s%s', spec.idx, to_regclass(spec.tbl), spec.cols, spec.pred);
+      created := true;
+    END IF;
+  END LOOP;
+
+  RETURN CASE WHEN created THEN 'installed' ELSE 'present' END;
+END;
+$$;
+
+SELECT install_decision_indexes();
@@ -0,0 +1,36 @@
+-- Migration 0023: refresh principal_acl_visibility when an acl row moves or is deleted
+-- 0013 refreshed visibility only on acl_allow and principal_role writes. Moving an acl to
+-- another org (acl.org_id) left its id in the old org principals' acl_ids, and
+-- refresh_principal_acl_visibility() joins acl on org_id, so grants that match the new
+-- org were missed until some other write refreshed those principals. Deletes are already
+-- covered by the acl_allow ON DELETE CASCADE, but are handled here as well so that
+-- visibility does not depend on the foreign key.
+-- Matching on acl_ids scans principal_acl_visibility; acl moves and deletes are rare
+-- admin operations, so no GIN index is kept on the per-query hot table for them.
+
+CREATE OR REPLACE FUNCTION trg_acl_visibility()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND NEW.org_id IS NOT DISTINCT FROM OLD.org_id THEN
+    RETURN NULL;
+  END IF;
+  -- Principals that can see the acl now lose it
+  PERFORM refresh_principal_acl_visibility(v.org_id, v.principal_id)
+  FROM principal_acl_visibility v
+  WHERE OLD.acl_id = ANY (v.acl_ids);
+  -- Grants recorded under the new org take effect
+  IF TG_OP = 'UPDATE' THEN
+    PERFORM refresh_acl_visibility_for_allow(aa.org_id, aa.allow_type, aa.principal_id, aa.role_id)
+    FROM acl_allow aa
+    WHERE aa.acl_id = NEW.acl_id AND aa.org_id = NEW.org_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS acl_visibility ON acl;
+CREATE TRIGGER acl_visibility
+  AFTER UPDATE OF org_id OR DELETE ON acl
+  FOR EACH ROW EXECUTE FUNCTION trg_acl_visibility();
@@ -29,13 +29,18 @@ run_test "3. MMR Property Tests" "scripts/test_mmr_properties.py"
 run_test "4. Phrase Query Validation" "scripts/test_phrase_queries.py"
 run_test "5. Recency Decay Validation" "scripts/test_recency_decay.py"
 run_test "6. Synthetic Retrieval" "scripts/test_retrieval_synthetic.py"
+run_test "7. Retrieval Equivalence" "scripts/test_retrieval_equivalence.py"
+run_test "8. Decision Paging" "scripts/test_decisions_paging.py"
+run_test "9. Dashboard ETag" "scripts/test_dashboard_etag.py"
+run_test "10. Retrieval Unit Tests" "scripts/test_retrieval_units.py"
+run_test "11. Gateway Unit Tests" "scripts/test_gateway_units.py"
 
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 echo "=== Test Suite Summary ==="
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 
 if [ ${#FAILED[@]} -eq 0 ]; then
-    echo "✅ All 6 test suites PASSED"
+    echo "✅ All 10 test suites PASSED"
     echo ""
     echo "System integrity verified:"
     echo "  ✓ Greenfield reproducibility"
@@ -44,9 +49,14 @@ if [ ${#FAILED[@]} -eq 0 ]; then
     echo "  ✓ MMR diversity/deduplication"
     echo "  ✓ Phrase query validation"
     echo "  ✓ Recency decay validation"
+    echo "  ✓ Retrieval equivalence (batch/single, cache, expand modes)"
+    echo "  ✓ Decision keyset paging"
+    echo "  ✓ Dashboard conditional GET"
+    echo "  ✓ Ranking/caching unit invariants"
+    echo "  ✓ Gateway cursor encoding"
     exit 0
 else
-    echo "❌ ${#FAILED[@]}/6 test suites FAILED:"
+    echo "❌ ${#FAILED[@]}/10 test suites FAILED:"
     for test in "${FAILED[@]}"; do
         echo "  - $test"
     done
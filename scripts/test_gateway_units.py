@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+API gateway unit tests: pure request/response helpers, no database or services needed.
+
+Tests:
+1. Cursor round-trip: decode(encode(decided_at, decision_id)) returns both values exactly
+   (UTC and non-UTC offsets, with and without microseconds, so both padded lengths)
+2. Malformed cursors: anything that is not a base64 "iso-timestamp|uuid" is a 400, never a 500
+"""
+import asyncio, base64, importlib.util, os, random, sys, uuid
+from datetime import datetime, timedelta, timezone
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# The gateway loads the response schema at import time, and imports the shared
+# downstream module that its Dockerfile copies next to it
+sys.path.insert(0, os.path.join(REPO, "services", "shared"))
+os.environ.setdefault("RESPONSE_SCHEMA_PATH", os.path.join(REPO, "schemas", "response-contract.v1.json"))
+
+_spec = importlib.util.spec_from_file_location("gateway_app", os.path.join(REPO, "services", "api-gateway", "app.py"))
+gateway = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gateway)
+
+from fastapi import HTTPException  # noqa: E402
+
+CASES = 200
+
+
+async def test_cursor_round_trip():
+    """Test 1: a page's next_cursor decodes back to the row it was built from."""
+    print("\n=== Test 1: Cursor Round-Trip ===")
+    rng = random.Random(24)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    samples = [
+        (base, uuid.UUID(int=0)),
+        (base.replace(microsecond=1), uuid.UUID(int=(1 << 128) - 1)),
+        (datetime(2025, 6, 1, 9, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))), uuid.uuid4()),
+        (datetime(2024, 12, 31, 23, 59, 59, 999999, tzinfo=timezone(timedelta(hours=-8))), uuid.uuid4()),
+    ]
+    for _ in range(CASES):
+        tz = timezone(timedelta(minutes=rng.randrange(-12 * 60, 14 * 60, 15)))
+        at = base.astimezone(tz) + timedelta(seconds=rng.randrange(10 ** 8), microseconds=rng.choice([0, rng.randrange(10 ** 6)]))
+        samples.append((at, uuid.UUID(int=rng.getrandbits(128))))
+
+    failures = []
+    padding = set()
+    for decided_at, decision_id in samples:
+        cursor = gateway.encode_decision_cursor(decided_at, decision_id)
+        padding.add(len(cursor) % 4)
+        if "=" in cursor or not all(c.isalnum() or c in "-_" for c in cursor):
+            failures.append(f"cursor {cursor!r} is not unpadded urlsafe base64")
+            continue
+        got_at, got_id = gateway.decode_decision_cursor(cursor)
+        if got_at != decided_at or got_at.utcoffset() != decided_at.utcoffset() or got_id != decision_id:
+            failures.append(f"{decided_at.isoformat()}|{decision_id} -> {got_at.isoformat()}|{got_id}")
+
+    if failures:
+        print(f"❌ {len(failures)}/{len(samples)} cursors did not round-trip")
+        for f in failures[:5]:
+            print(f"  {f}")
+        return False
+    print(f"  ✓ cursor lengths covered mod 4: {sorted(padding)}")
+    print(f"✓ {len(samples)} cursors decode to the row they were built from")
+    return True
+
+
+async def test_malformed_cursors():
+    """Test 2: bad cursors from clients are rejected with 400."""
+    print("\n=== Test 2: Malformed Cursors ===")
+
+    def b64(raw):
+        data = raw if isinstance(raw, bytes) else raw.encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    good_at, good_id = "2025-01-01T00:00:00+00:00", str(uuid.uuid4())
+    cases = [
+        ("empty", ""),
+        ("not base64", "!!!"),
+        ("single base64 char", "A"),
+        ("no separator", b64("abc")),
+        ("garbage fields", b64("x|y")),
+        ("bad timestamp", b64(f"yesterday|{good_id}")),
+        ("bad uuid", b64(f"{good_at}|not-a-uuid")),
+        ("extra field", b64(f"{good_at}|{good_id}|1")),
+        ("swapped fields", b64(f"{good_id}|{good_at}")),
+        ("not utf-8", b64(b"\xff\xfe|\x80")),
+    ]
+
+    ok = True
+    for label, cursor in cases:
+        try:
+            gateway.decode_decision_cursor(cursor)
+            print(f"❌ {label}: {cursor!r} was accepted")
+            ok = False
+        except HTTPException as e:
+            if e.status_code != 400:
+                print(f"❌ {label}: status {e.status_code}, expected 400")
+                ok = False
+            else:
+                print(f"  ✓ {label} -> 400")
+        except Exception as e:
+            print(f"❌ {label}: raised {e!r} instead of a 400")
+            ok = False
+    if ok:
+        print("✓ Malformed cursors are rejected with 400")
+    return ok
+
+
+async def main():
+    print("=== API Gateway Unit Tests ===")
+
+    tests = [
+        ("Cursor round-trip", test_cursor_round_trip),
+        ("Malformed cursors", test_malformed_cursors),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        passed = await test_fn()
+        results.append((name, passed))
+
+    print("\n=== Summary ===")
+    failed = [name for name, passed in results if not passed]
+
+    if failed:
+        print(f"❌ {len(failed)}/{len(tests)} tests FAILED:")
+        for name in failed:
+            print(f"  - {name}")
+        sys.exit(1)
+    else:
+        print(f"✅ All {len(tests)} gateway unit tests PASSED")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Retrieval unit tests: pure ranking/caching logic, no database or services needed.
+
+Tests:
+1. MMR reference: mmr_select picks what the original pure-Python MMR loop picked (200 random cases)
+2. MMR ties and missing embeddings: ties go to the earlier candidate; no embeddings = relevance order
+3. Top-k order: top_k_order equals a stable full sort (ties in input order), plus
+   min/max normalization and FeatureColumns.subset edge cases
+4. CSR BFS: CsrAdjacency.bfs returns what the recursive-CTE walk returns (hops, fanout
+   per node by weight then node_id, max_nodes cap in (hop, node_id) order)
+5. Result cache single-flight: concurrent misses share one compute (single and batch),
+   failures and cancellations reach waiters correctly, TTL and LRU bounds hold
+6. Benchmark harness: --set overrides coerce to field types and reject unknown keys,
+   percentiles, and --compare flags p95/QPS regressions past the limit only
+"""
+import asyncio, contextlib, io, os, random, sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "retrieval"))
+from graph_cache import CsrAdjacency  # noqa: E402
+from ranking import FeatureColumns, minmax_normalize, mmr_select, top_k_order  # noqa: E402
+from result_cache import RetrievalResultCache  # noqa: E402
+
+from bench_retrieval import compare, parse_overrides, pct_change, percentiles  # noqa: E402
+
+CASES = 200
+
+
+def _cosine(a, b):
+    """The pre-numpy cosine: 0 when either vector is missing or all zeros."""
+    if a is None or b is None:
+        return 0.0
+    num = da = db = 0.0
+    for x, y in zip(a, b):
+        num += x * y
+        da += x * x
+        db += y * y
+    if da <= 1e-12 or db <= 1e-12:
+        return 0.0
+    return num / (da ** 0.5 * db ** 0.5)
+
+
+def mmr_reference(relevance, embeddings, k, lam):
+    """The original O(k * n * selected) MMR loop over candidate indices, kept as the oracle."""
+    embed_map = {i: list(map(float, v)) for i, v in enumerate(embeddings if embeddings is not None else [])}
+    candidates = list(range(len(relevance)))
+    selected = []
+    while candidates and len(selected) < k:
+        best, best_value = None, -1e9
+        for c in candidates:
+            sim_to_sel = 0.0
+            for s in selected:
+                sim_to_sel = max(sim_to_sel, _cosine(embed_map.get(c), embed_map.get(s)))
+            value = lam * relevance[c] - (1.0 - lam) * sim_to_sel
+            if value > best_value:
+                best, best_value = c, value
+        selected.append(best)
+        candidates.remove(best)
+    return selected
+
+
+def random_case(rng):
+    """Candidates in rank order, an MMR pool over a prefix of them, some rows left empty."""
+    n = rng.randint(1, 40)
+    pool = rng.randint(0, n)
+    dim = rng.choice([2, 3, 8, 32])
+    relevance = sorted((round(rng.random(), 2) for _ in range(n)), reverse=True)
+    embeddings = np.array(
+        [[0.0] * dim if rng.random() < 0.15 else [rng.gauss(0, 1) for _ in range(dim)] for _ in range(pool)],
+        dtype=np.float32,
+    ).reshape(pool, dim)
+    return relevance, embeddings, rng.randint(0, n + 2), rng.choice([0.0, 0.3, 0.55, 0.7, 1.0])
+
+
+async def test_mmr_matches_reference():
+    """Test 1: the vectorized selection is the original loop's selection, step for step."""
+    print("\n=== Test 1: MMR vs Reference Loop ===")
+    rng = random.Random(6)
+    mismatches = 0
+    for case in range(CASES):
+        relevance, embeddings, k, lam = random_case(rng)
+        got = mmr_select(relevance, embeddings, k=k, lam=lam)
+        want = mmr_reference(relevance, embeddings, k, lam)
+        if got != want:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"❌ case {case}: n={len(relevance)} pool={len(embeddings)} k={k} lam={lam}: "
+                      f"got {got[:8]} want {want[:8]}")
+    if mismatches:
+        print(f"❌ {mismatches}/{CASES} cases differ from the reference loop")
+        return False
+    print(f"✓ {CASES} random cases select exactly what the reference loop selects")
+    return True
+
+
+async def test_mmr_ties_and_missing_embeddings():
+    """Test 2: deterministic tie-breaking and relevance-only selection without embeddings."""
+    print("\n=== Test 2: MMR Ties and Missing Embeddings ===")
+    ok = True
+    checks = [
+        # Equal relevance, no embeddings: candidates keep rank order
+        ("ties without embeddings", mmr_select([0.5] * 5, None, k=5, lam=0.7), [0, 1, 2, 3, 4]),
+        # Empty pool behaves like no embeddings
+        ("empty pool", mmr_select([0.9, 0.8, 0.7], np.zeros((0, 4), dtype=np.float32), k=2, lam=0.5), [0, 1]),
+        # Identical vectors: after the first pick both remaining candidates are equally redundant
+        ("ties with identical embeddings",
+         mmr_select([0.5, 0.5, 0.5], np.ones((3, 4), dtype=np.float32), k=3, lam=0.5), [0, 1, 2]),
+        # A duplicate of the top pick loses to a less relevant but orthogonal candidate
+        ("redundant candidate demoted",
+         mmr_select([1.0, 0.99, 0.6], np.array([[1, 0], [1, 0], [0, 1]], dtype=np.float32), k=2, lam=0.5), [0, 2]),
+        # Zero rows and candidates past the pool never count as redundant
+        ("zero row not redundant",
+         mmr_select([1.0, 0.99, 0.6], np.array([[1, 0], [0, 0]], dtype=np.float32), k=2, lam=0.5), [0, 1]),
+        ("past pool not redundant",
+         mmr_select([1.0, 0.99, 0.6], np.array([[1, 0]], dtype=np.float32), k=3, lam=0.5), [0, 1, 2]),
+        ("k=0", mmr_select([0.9, 0.8], None, k=0, lam=0.5), []),
+        ("k > candidates", mmr_select([0.9, 0.8], None, k=5, lam=0.5), [0, 1]),
+    ]
+    for label, got, want in checks:
+        if got != want:
+            print(f"❌ {label}: got {got}, want {want}")
+            ok = False
+        else:
+            print(f"  ✓ {label}: {got}")
+    if ok:
+        print("✓ Tie-breaking and missing-embedding handling hold")
+    return ok
+
+
+async def test_top_k_order():
+    """Test 3: argpartition top-k is the stable sort's prefix, ties included."""
+    print("\n=== Test 3: Top-k Order ===")
+    rng = random.Random(8)
+    ok = True
+    mismatches = 0
+    for case in range(CASES):
+        n = rng.randint(0, 60)
+        # Few distinct values, so most cases tie across the k-th score
+        scores = np.array([rng.choice([0.1, 0.25, 0.5, 0.5, 0.75, 1.0]) for _ in range(n)], dtype=np.float64)
+        k = rng.randint(-1, n + 3)
+        got = top_k_order(scores, k).tolist()
+        want = sorted(range(n), key=lambda i: (-scores[i], i))[:max(k, 0)]
+        if got != want:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"❌ case {case}: n={n} k={k}: got {got[:10]} want {want[:10]}")
+    if mismatches:
+        print(f"❌ {mismatches}/{CASES} top-k cases differ from a stable sort")
+        ok = False
+    else:
+        print(f"  ✓ {CASES} random cases equal the stable sort prefix")
+
+    checks = [
+        ("constant column normalizes to ones", minmax_normalize(np.array([3.0, 3.0])).tolist(), [1.0, 1.0]),
+        ("min/max scaled to [0, 1]", minmax_normalize(np.array([2.0, 4.0, 3.0])).tolist(), [0.0, 1.0, 0.5]),
+        ("empty column", minmax_normalize(np.array([])).tolist(), []),
+    ]
+    cols = FeatureColumns.from_rows([
+        {"id": sid, "vec_sim": v, "lex": 0.0, "edge_support": 0.0, "created_at_epoch": 0.0}
+        for sid, v in (("a", 0.1), ("b", 0.2), ("c", 0.3))
+    ])
+    sub = cols.subset(["c", "x", "a", "c"])
+    checks.append(("subset keeps request order, skips unknown and repeated ids",
+                   (sub.span_ids, sub.vec_sim.tolist()), (["c", "a"], [0.3, 0.1])))
+    for label, got, want in checks:
+        if got != want:
+            print(f"❌ {label}: got {got}, want {want}")
+            ok = False
+        else:
+            print(f"  ✓ {label}")
+    if ok:
+        print("✓ Top-k order and feature column helpers hold")
+    return ok
+
+
+def recursive_walk_reference(edges, seeds, depth, fanout, max_nodes):
+    """
+    The _expand_nodes_recursive SQL in Python: each walked row contributes its top `fanout`
+    neighbours (either direction, strongest edge per neighbour, weight desc then node_id),
+    min hop per node, then the first max(max_nodes, len(seeds)) by (hop, node_id).
+    """
+    neighbours = {}
+    for (src, dst, _type), weight in edges.items():
+        for a, b in ((src, dst), (dst, src)):
+            best = neighbours.setdefault(a, {})
+            best[b] = max(best.get(b, weight), weight)
+    top = {
+        node: [nb for nb, _ in sorted(nbs.items(), key=lambda kv: (-kv[1], kv[0]))[:fanout]]
+        for node, nbs in neighbours.items()
+    }
+    rows = {(nid, 0) for nid in seeds}
+    frontier = set(rows)
+    for _ in range(depth):
+        frontier = {(nb, hop + 1) for nid, hop in frontier for nb in top.get(nid, [])} - rows
+        rows |= frontier
+    best = {}
+    for nid, hop in rows:
+        best[nid] = min(hop, best.get(nid, hop))
+    kept = sorted(best.items(), key=lambda kv: (kv[1], kv[0]))[: max(max_nodes, len(seeds))]
+    return dict(kept)
+
+
+async def test_csr_bfs_matches_recursive_walk():
+    """Test 4: csr expansion is the recursive walk, including fanout ties and the node cap."""
+    print("\n=== Test 4: CSR BFS vs Recursive Walk ===")
+    rng = random.Random(5)
+    mismatches = 0
+    for case in range(CASES):
+        nodes = [f"{i:08x}-0000-4000-8000-000000000000" for i in rng.sample(range(1 << 20), rng.randint(1, 30))]
+        edges = {}
+        for _ in range(rng.randint(0, 80)):
+            # Coarse weights tie often; parallel edges of another type and self loops included
+            key = (rng.choice(nodes), rng.choice(nodes), rng.choice(["relates", "supports", "affects"]))
+            edges[key] = rng.choice([0.25, 0.5, 0.5, 0.75, 1.0])
+        seeds = rng.sample(nodes, rng.randint(1, min(3, len(nodes))))
+        if rng.random() < 0.2:
+            seeds.append("ffffffff-0000-4000-8000-000000000000")  # seed without edges stays at hop 0
+        depth, fanout, max_nodes = rng.randint(0, 3), rng.randint(1, 5), rng.choice([1, 3, 8, 2000])
+        got = CsrAdjacency.build(edges).bfs(seeds, depth=depth, fanout=fanout, max_nodes=max_nodes)
+        want = recursive_walk_reference(edges, seeds, depth, fanout, max_nodes)
+        if got != want:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"❌ case {case}: depth={depth} fanout={fanout} max_nodes={max_nodes}: "
+                      f"{len(got)} vs {len(want)} nodes, only csr: {sorted(set(got) - set(want))[:3]}")
+    if mismatches:
+        print(f"❌ {mismatches}/{CASES} graphs expand differently from the recursive walk")
+        return False
+    print(f"✓ {CASES} random graphs expand exactly like the recursive walk")
+    return True
+
+
+class Computer:
+    """compute callbacks that count calls, can be held open and can fail."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def many(self, keys, fail=None):
+        async def compute(indices):
+            self.calls.append([keys[i] for i in indices])
+            await self.release.wait()
+            if fail is not None:
+                raise fail
+            return [{"key": keys[i]} for i in indices]
+        return compute
+
+    def one(self, key, fail=None):
+        many = self.many([key], fail)
+        async def compute():
+            return (await many([0]))[0]
+        return compute
+
+
+async def test_result_cache_single_flight():
+    """Test 5: one compute per key however many requests miss it at once."""
+    print("\n=== Test 5: Result Cache Single-Flight ===")
+    checks = []
+
+    cache, comp = RetrievalResultCache(), Computer()
+    comp.release.clear()
+    tasks = [asyncio.create_task(cache.get_or_compute("a", comp.one("a"))) for _ in range(5)]
+    await asyncio.sleep(0)
+    comp.release.set()
+    outs = await asyncio.gather(*tasks)
+    checks.append(("concurrent misses compute once", (len(comp.calls), sorted(o[1] for o in outs)),
+                   (1, ["coalesced"] * 4 + ["miss"])))
+    checks.append(("waiters get the leader's result", all(o[0] is outs[0][0] for o in outs), True))
+    result, status, age = await cache.get_or_compute("a", comp.one("a"))
+    checks.append(("repeat is a hit without compute", (status, len(comp.calls), age >= 0), ("hit", 1, True)))
+
+    # A batch waits for keys another request is computing and computes only the rest
+    cache, comp = RetrievalResultCache(), Computer()
+    comp.release.clear()
+    single = asyncio.create_task(cache.get_or_compute("a", comp.one("a")))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(cache.get_or_compute_many(["a", "b"], comp.many(["a", "b"])))
+    await asyncio.sleep(0)
+    comp.release.set()
+    await single
+    outs = await batch
+    checks.append(("batch awaits in-flight keys", ([o[1] for o in outs], comp.calls),
+                   (["coalesced", "miss"], [["a"], ["b"]])))
+
+    # A failed leader fails its waiters and caches nothing
+    cache, comp = RetrievalResultCache(), Computer()
+    comp.release.clear()
+    boom = RuntimeError("pipeline failed")
+    tasks = [asyncio.create_task(cache.get_or_compute("a", comp.one("a", fail=boom))) for _ in range(3)]
+    await asyncio.sleep(0)
+    comp.release.set()
+    outs = await asyncio.gather(*tasks, return_exceptions=True)
+    checks.append(("failure reaches every waiter", [o is boom for o in outs], [True] * 3))
+    _, status, _ = await cache.get_or_compute("a", comp.one("a"))
+    checks.append(("failure is not cached", (status, cache.stats()["inflight"]), ("miss", 0)))
+
+    # A cancelled leader does not cancel its waiters: one of them computes instead
+    cache, comp = RetrievalResultCache(), Computer()
+    comp.release.clear()
+    leader = asyncio.create_task(cache.get_or_compute("a", comp.one("a")))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_compute("a", comp.one("a")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    comp.release.set()
+    result, status, _ = await follower
+    checks.append(("waiter recomputes after leader cancel", (status, result, len(comp.calls)), ("miss", {"key": "a"}, 2)))
+
+    # Bounds
+    cache, comp = RetrievalResultCache(ttl_s=0.0), Computer()
+    await cache.get_or_compute("a", comp.one("a"))
+    await asyncio.sleep(0.001)
+    _, status, _ = await cache.get_or_compute("a", comp.one("a"))
+    checks.append(("expired entry recomputes", (status, cache.expirations), ("miss", 1)))
+    cache, comp = RetrievalResultCache(max_entries=2), Computer()
+    for key in ("a", "b", "a", "c"):
+        await cache.get_or_compute(key, comp.one(key))
+    statuses = [(await cache.get_or_compute(key, comp.one(key)))[1] for key in ("a", "c", "b")]
+    checks.append(("LRU evicts the least recently used", (statuses, cache.evictions), (["hit", "hit", "miss"], 2)))
+
+    ok = True
+    for label, got, want in checks:
+        if got != want:
+            print(f"❌ {label}: got {got}, want {want}")
+            ok = False
+        else:
+            print(f"  ✓ {label}")
+    if ok:
+        print("✓ Result cache single-flight and bounds hold")
+    return ok
+
+
+def bench_report(p95, qps, stage_p50=10.0):
+    return {
+        "label": "", "qps": qps,
+        "latency_ms": {"p50": p95 / 2, "p95": p95, "p99": p95 * 1.5},
+        "stages": {"seed": {"ms": {"p50": stage_p50}}},
+    }
+
+
+async def test_bench_harness():
+    """Test 6: the pieces of bench_retrieval.py that decide pass/fail."""
+    print("\n=== Test 6: Benchmark Harness ===")
+    checks = []
+
+    cfg, changes = parse_overrides([
+        "expand_mode=csr", "hop_fanout=40", "mmr_lambda=0.5", "use_mmr=false", "bonus_map={\"decision\": 2.0}",
+    ])
+    checks.append(("overrides coerce to field types",
+                   (cfg.expand_mode, cfg.hop_fanout, cfg.mmr_lambda, cfg.use_mmr, cfg.bonus_map),
+                   ("csr", 40, 0.5, False, {"decision": 2.0})))
+    checks.append(("overrides are echoed for the report", sorted(changes),
+                   ["bonus_map", "expand_mode", "hop_fanout", "mmr_lambda", "use_mmr"]))
+    checks.append(("no overrides is the default config", parse_overrides([])[0].fingerprint(),
+                   type(cfg)().fingerprint()))
+    for bad in ("no_such_field=1", "hop_fanout"):
+        try:
+            parse_overrides([bad])
+            rejected = False
+        except SystemExit:
+            rejected = True
+        checks.append((f"override {bad!r} rejected", rejected, True))
+
+    checks.append(("percentiles", percentiles(list(range(1, 101))), {"p50": 50.5, "p95": 95.05, "p99": 99.01}))
+    checks.append(("percentiles of nothing", percentiles([]), {"p50": None, "p95": None, "p99": None}))
+    checks.append(("pct_change", (pct_change(110, 100), pct_change(90, 100), pct_change(5, 0), pct_change(None, 1)),
+                   (10.0, -10.0, None, None)))
+
+    base = bench_report(p95=100.0, qps=50.0)
+    cases = [
+        ("within limit", bench_report(p95=109.0, qps=46.0), True),
+        ("p95 regression", bench_report(p95=111.0, qps=50.0), False),
+        ("QPS regression", bench_report(p95=100.0, qps=44.0), False),
+        ("improvement", bench_report(p95=50.0, qps=100.0), True),
+        ("stage regression alone", bench_report(p95=100.0, qps=50.0, stage_p50=40.0), True),
+    ]
+    for label, report, want in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            got = compare(report, base, max_regression=10.0)
+        checks.append((f"compare: {label}", got, want))
+
+    ok = True
+    for label, got, want in checks:
+        if got != want:
+            print(f"❌ {label}: got {got}, want {want}")
+            ok = False
+        else:
+            print(f"  ✓ {label}")
+    if ok:
+        print("✓ Benchmark overrides, percentiles and regression checks hold")
+    return ok
+
+
+async def main():
+    print("=== Retrieval Unit Tests ===")
+
+    tests = [
+        ("MMR matches reference loop", test_mmr_matches_reference),
+        ("MMR ties and missing embeddings", test_mmr_ties_and_missing_embeddings),
+        ("Top-k order", test_top_k_order),
+        ("CSR BFS matches recursive walk", test_csr_bfs_matches_recursive_walk),
+        ("Result cache single-flight", test_result_cache_single_flight),
+        ("Benchmark harness", test_bench_harness),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        passed = await test_fn()
+        results.append((name, passed))
+
+    print("\n=== Summary ===")
+    failed = [name for name, passed in results if not passed]
+
+    if failed:
+        print(f"❌ {len(failed)}/{len(tests)} tests FAILED:")
+        for name in failed:
+            print(f"  - {name}")
+        sys.exit(1)
+    else:
+        print(f"✅ All {len(tests)} retrieval unit tests PASSED")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import contextlib
 import hashlib
 import json
+import logging
 import os
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
-import psycopg
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from jsonschema import Draft202012Validator, validate
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
 from pydantic import BaseModel, Field
 
+from downstream import DownstreamClient, http_limits_from_env
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("api-gateway")
+
 app = FastAPI(title="Continuuai API Gateway", version="0.2.0")
 
 # CORS configuration
@@ -27,11 +40,28 @@ app.add_middleware(
 
 RETRIEVAL_URL = os.environ.get("RETRIEVAL_URL", "http://localhost:8081")
 INFERENCE_URL = os.environ.get("INFERENCE_URL", "http://localhost:8082")
+# Per-route timeouts: inference (LLM) is slow, retrieval should not be
+RETRIEVAL_TIMEOUT_S = float(os.environ.get("RETRIEVAL_TIMEOUT_S", "60"))
+INFERENCE_TIMEOUT_S = float(os.environ.get("INFERENCE_TIMEOUT_S", "180"))
+# Downstream connection pools (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, ...)
+HTTP_LIMITS = http_limits_from_env(max_connections=100, max_keepalive=20)
 SCHEMA_PATH = os.environ.get("RESPONSE_SCHEMA_PATH", "/app/schemas/response-contract.v1.json")
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     DATABASE_URL = None
+# Shared bounded connection pool: requests beyond DB_POOL_MAX queue for up to
+# DB_POOL_TIMEOUT seconds (at most DB_POOL_MAX_WAITING of them, 0 = unbounded), then 503
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_WAITING = int(os.environ.get("DB_POOL_MAX_WAITING", "0"))
+# Rendered /v1/dashboard per org, reused while org_dashboard_snapshot.version is unchanged
+DASHBOARD_CACHE_MAX_ORGS = int(os.environ.get("DASHBOARD_CACHE_MAX_ORGS", "256"))
+DECISIONS_BATCH_MAX = int(os.environ.get("DECISIONS_BATCH_MAX", "100"))
+# Largest /v1/decisions page; bigger limits are clamped to it
+DECISIONS_PAGE_MAX = int(os.environ.get("DECISIONS_PAGE_MAX", "500"))
 
 SCHEMA = json.loads(open(SCHEMA_PATH, "r", encoding="utf-8").read())
 Draft202012Validator.check_schema(SCHEMA)
@@ -39,6 +69,126 @@ Draft202012Validator.check_schema(SCHEMA)
 def sha256b(s: str) -> bytes:
     return hashlib.sha256(s.encode("utf-8")).digest()
 
+retrieval_client = DownstreamClient("retrieval", RETRIEVAL_URL, timeout=RETRIEVAL_TIMEOUT_S, **HTTP_LIMITS)
+inference_client = DownstreamClient("inference", INFERENCE_URL, timeout=INFERENCE_TIMEOUT_S, **HTTP_LIMITS)
+
+class DatabasePool:
+    """
+    Shared psycopg AsyncConnectionPool for the DB-backed endpoints. Opened once, on
+    startup (or on first use when no startup hook ran), and closed on shutdown; never
+    replaced while open, so no pool is left holding connections and worker tasks.
+    A checkout that cannot get a connection
+    within DB_POOL_TIMEOUT, or finds DB_POOL_MAX_WAITING requests already queued,
+    becomes a 503 with Retry-After instead of another Postgres connection.
+    """
+
+    def __init__(self, conninfo: Optional[str]):
+        self.conninfo = conninfo
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._opening: Optional[asyncio.Task] = None
+        self.rejected = 0
+
+    async def pool(self) -> AsyncConnectionPool:
+        if not self.conninfo:
+            raise HTTPException(status_code=500, detail="DATABASE_URL not set")
+        if self._pool is None:
+            self._pool = AsyncConnectionPool(
+                self.conninfo,
+                min_size=DB_POOL_MIN,
+                max_size=DB_POOL_MAX,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                max_waiting=DB_POOL_MAX_WAITING,
+                timeout=DB_POOL_TIMEOUT,
+                check=AsyncConnectionPool.check_connection,  # health check on checkout
+                name="gateway",
+                open=False,
+            )
+            # Concurrent first requests share one open()
+            self._opening = asyncio.get_running_loop().create_task(self._pool.open())
+        opening = self._opening
+        if opening is not None:
+            try:
+                await opening
+            except Exception:
+                if self._opening is opening:
+                    failed, self._pool, self._opening = self._pool, None, None
+                    await failed.close()
+                raise
+            self._opening = None
+        return self._pool
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """Pooled connection; committed on exit, rolled back on error."""
+        pool = await self.pool()
+        try:
+            async with pool.connection() as conn:
+                yield conn
+        except (PoolTimeout, TooManyRequests) as e:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail=f"database busy: {e}", headers={"Retry-After": "1"})
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+        self._pool = None
+        self._opening = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.conninfo is not None,
+            "open": self._pool is not None and not self._pool.closed,
+            "min_size": DB_POOL_MIN,
+            "max_size": DB_POOL_MAX,
+            "max_lifetime": DB_POOL_MAX_LIFETIME,
+            "max_waiting": DB_POOL_MAX_WAITING,
+            "timeout": DB_POOL_TIMEOUT,
+            "rejected": self.rejected,
+            # pool_size, pool_available, requests_waiting, requests_wait_ms, requests_errors, ...
+            "stats": self._pool.get_stats() if self._pool is not None else {},
+        }
+
+db = DatabasePool(DATABASE_URL)
+
+# Triggers and indexes on the decision tables, which are created outside the
+# migrations: each installer (a SQL function from the migrations) is a no-op returning
+# 'missing' until the tables exist and 'present' once installed, so it runs on every start
+DECISION_SCHEMA_INSTALLERS = ("install_dashboard_snapshot", "install_decision_indexes")
+
+async def install_decision_schema() -> None:
+    async with db.connection() as conn:
+        for installer in DECISION_SCHEMA_INSTALLERS:
+            cur = await conn.execute("SELECT to_regprocedure(%s) IS NOT NULL", (f"{installer}()",))
+            if not (await cur.fetchone())[0]:
+                logger.warning("%s() not found; apply the migrations", installer)
+                continue
+            cur = await conn.execute(f"SELECT {installer}()")
+            status = (await cur.fetchone())[0]
+            if status == "missing":
+                logger.warning("%s skipped: decision tables not found", installer)
+            else:
+                logger.info("%s: %s", installer, status)
+
+@app.on_event("startup")
+async def startup():
+    if DATABASE_URL:
+        try:
+            await db.pool()
+        except Exception:
+            # Retried lazily on the first DB request
+            logger.warning("database pool open failed", exc_info=True)
+            return
+        try:
+            await install_decision_schema()
+        except Exception:
+            logger.warning("decision schema install failed", exc_info=True)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await retrieval_client.aclose()
+    await inference_client.aclose()
+    await db.aclose()
+
 class QueryRequest(BaseModel):
     org_id: str
     principal_id: str
@@ -101,42 +251,67 @@ class StreamCreateRequest(BaseModel):
     description: str = ""
     color: str = "#6366f1"
 
+class DecisionBatchGetRequest(BaseModel):
+    org_id: str = "00000000-0000-0000-0000-000000000000"
+    decision_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=DECISIONS_BATCH_MAX)
+
 @app.get("/healthz")
 def healthz():
     return {"ok": True}
 
-@app.post("/v1/query")
-async def query(req: QueryRequest):
-    # Extended timeout for LLM inference (120b model on CPU/GPU hybrid can be slow)
-    async with httpx.AsyncClient(timeout=180) as client:
-        r = await client.post(f"{RETRIEVAL_URL}/v1/retrieve", json=req.model_dump())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"retrieval error: {r.text}")
-        retrieval = r.json()
-
-        # Map retrieval results to inference evidence format
-        retrieval_results = retrieval.get("results", [])
-        evidence = [
-            {
-                "evidence_span_id": r.get("id", ""),
-                "artifact_id": r.get("artifact_id", ""),
-                "quote": r.get("text", ""),
-                "confidence": r.get("confidence", 0.75),
-                "occurred_at": r.get("created_at", ""),
-            }
-            for r in retrieval_results
-        ]
-        
-        payload = {
-            "mode": req.mode,
-            "query_text": req.query_text,
-            "evidence": evidence,
+def _require_debug_access(admin_token: Optional[str]) -> None:
+    """
+    Gate debug endpoints behind ADMIN_DEBUG_TOKEN (same rules as retrieval's):
+    without a token configured they are only served when ENV is dev/local.
+    """
+    expected_token = os.environ.get("ADMIN_DEBUG_TOKEN")
+    if expected_token and admin_token != expected_token:
+        raise HTTPException(status_code=403, detail="Forbidden: invalid or missing admin_token")
+    if not expected_token:
+        env_name = os.environ.get("ENV", "dev")
+        if env_name not in ("dev", "local", "development"):
+            raise HTTPException(status_code=403, detail="Forbidden: ADMIN_DEBUG_TOKEN not configured")
+
+@app.get("/v1/debug/http")
+def debug_http(admin_token: Optional[str] = None):
+    """Downstream HTTP client pool limits and usage."""
+    _require_debug_access(admin_token)
+    return {"retrieval": retrieval_client.stats(), "inference": inference_client.stats()}
+
+@app.get("/v1/debug/pool")
+def debug_pool(admin_token: Optional[str] = None):
+    """Database connection pool configuration and live stats."""
+    _require_debug_access(admin_token)
+    return db.stats()
+
+@app.get("/v1/debug/dashboard_cache")
+def debug_dashboard_cache(admin_token: Optional[str] = None):
+    """Dashboard snapshot availability and in-process cache usage."""
+    _require_debug_access(admin_token)
+    return dashboard_cache.stats()
+
+async def retrieve_evidence(req: QueryRequest) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Retrieval response and its results mapped to the inference evidence format."""
+    r = await retrieval_client.post("/v1/retrieve", json=req.model_dump())
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"retrieval error: {r.text}")
+    retrieval = r.json()
+
+    retrieval_results = retrieval.get("results", [])
+    evidence = [
+        {
+            "evidence_span_id": r.get("id", ""),
+            "artifact_id": r.get("artifact_id", ""),
+            "quote": r.get("text", ""),
+            "confidence": r.get("confidence", 0.75),
+            "occurred_at": r.get("created_at", ""),
         }
-        i = await client.post(f"{INFERENCE_URL}/v1/infer", json=payload)
-        if i.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"inference error: {i.text}")
-        out = i.json()
+        for r in retrieval_results
+    ]
+    return retrieval, evidence
 
+def finalize_answer(out: Dict[str, Any], retrieval: Dict[str, Any]) -> Dict[str, Any]:
+    """Gateway contract validation (raises 500) plus retrieval debug."""
     try:
         validate(instance=out, schema=SCHEMA)
     except Exception as e:
@@ -149,11 +324,85 @@ async def query(req: QueryRequest):
     }
     return out
 
-@app.post("/v1/ingest")
-def ingest(req: IngestRequest):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set for gateway (ingest requires DB)")
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, Any]]:
+    """(event, decoded data) pairs from a text/event-stream response."""
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].lstrip())
+
+@app.post("/v1/query")
+async def query(req: QueryRequest):
+    retrieval, evidence = await retrieve_evidence(req)
+
+    payload = {
+        "mode": req.mode,
+        "query_text": req.query_text,
+        "evidence": evidence,
+    }
+    # inference_client carries the extended LLM timeout (120b model on CPU/GPU hybrid can be slow)
+    i = await inference_client.post("/v1/infer", json=payload)
+    if i.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"inference error: {i.text}")
+    return finalize_answer(i.json(), retrieval)
+
+@app.post("/v1/query/stream")
+async def query_stream(req: QueryRequest):
+    """
+    Server-sent events version of /v1/query. Retrieval errors still fail the request
+    (502); after that the stream carries:
+      event: evidence  {"evidence": [...], "retrieval_debug": {...}}  as soon as retrieval returns
+      event: token     {"text": "..."}  answer chunks proxied from /v1/infer/stream
+      event: final     the contract-validated /v1/query response (its answer is authoritative)
+      event: error     {"status": ..., "detail": "..."}  instead of final on failure
+    """
+    retrieval, evidence = await retrieve_evidence(req)
+    payload = {
+        "mode": req.mode,
+        "query_text": req.query_text,
+        "evidence": evidence,
+    }
+
+    async def events() -> AsyncIterator[str]:
+        yield sse("evidence", {"evidence": evidence, "retrieval_debug": retrieval.get("debug", {})})
+        try:
+            async with inference_client.stream("POST", "/v1/infer/stream", json=payload) as i:
+                if i.status_code != 200:
+                    await i.aread()
+                    yield sse("error", {"status": 502, "detail": f"inference error: {i.text}"})
+                    return
+                async for event, data in iter_sse(i):
+                    if event == "token":
+                        yield sse("token", data)
+                    elif event == "final":
+                        yield sse("final", finalize_answer(data, retrieval))
+                        return
+                    elif event == "error":
+                        yield sse("error", data)
+                        return
+            yield sse("error", {"status": 502, "detail": "inference stream ended without a final answer"})
+        except HTTPException as e:
+            yield sse("error", {"status": e.status_code, "detail": e.detail})
+        except (httpx.HTTPError, ValueError) as e:
+            yield sse("error", {"status": 502, "detail": f"inference error: {e}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+@app.post("/v1/ingest")
+async def ingest(req: IngestRequest):
     occurred_at = datetime.now(timezone.utc) if not req.occurred_at else datetime.fromisoformat(req.occurred_at.replace("Z", "+00:00"))
     text = req.text_utf8
 
@@ -162,33 +411,33 @@ def ingest(req: IngestRequest):
         end = min(len(text), 240)
         spans = [EvidenceSpanIn(start_char=0, end_char=end, section_path="auto:0", confidence=0.70)]
 
-    with psycopg.connect(DATABASE_URL) as conn, conn.transaction():
-        prow = conn.execute(
+    async with db.connection() as conn, conn.transaction():
+        prow = await (await conn.execute(
             "SELECT principal_id FROM principal WHERE org_id=%s AND external_subject=%s",
             (req.org_id, req.actor_external_subject),
-        ).fetchone()
+        )).fetchone()
         if not prow:
-            principal_id = conn.execute(
+            principal_id = (await (await conn.execute(
                 "INSERT INTO principal(org_id, principal_type, external_subject, display_name) "
                 "VALUES (%s,'user',%s,%s) RETURNING principal_id",
                 (req.org_id, req.actor_external_subject, req.actor_external_subject),
-            ).fetchone()[0]
+            )).fetchone())[0]
         else:
             principal_id = prow[0]
 
-        arow = conn.execute(
+        arow = await (await conn.execute(
             "SELECT acl_id FROM acl WHERE org_id=%s AND name=%s",
             (req.org_id, req.acl_name),
-        ).fetchone()
+        )).fetchone()
         if not arow:
-            acl_id = conn.execute(
+            acl_id = (await (await conn.execute(
                 "INSERT INTO acl(org_id, name, description) VALUES (%s,%s,%s) RETURNING acl_id",
                 (req.org_id, req.acl_name, "auto-created"),
-            ).fetchone()[0]
+            )).fetchone())[0]
         else:
             acl_id = arow[0]
 
-        art_id = conn.execute(
+        art_id = (await (await conn.execute(
             "INSERT INTO artifact(org_id, source_system, source_uri, source_etag, captured_at, occurred_at, "
             "author_principal_id, content_type, storage_uri, sha256, size_bytes, acl_id, pii_classification) "
             "VALUES (%s,%s,%s,NULL,now(),%s,%s,%s,%s,%s,%s,%s,'none') RETURNING artifact_id",
@@ -204,25 +453,25 @@ def ingest(req: IngestRequest):
                 len(text),
                 acl_id,
             ),
-        ).fetchone()[0]
+        )).fetchone())[0]
 
-        at_id = conn.execute(
+        at_id = (await (await conn.execute(
             "INSERT INTO artifact_text(org_id, artifact_id, normaliser_version, language, text_utf8, text_sha256, structure_json) "
             "VALUES (%s,%s,'v1','en',%s,%s,'{}'::jsonb) RETURNING artifact_text_id",
             (req.org_id, art_id, text, sha256b(text)),
-        ).fetchone()[0]
+        )).fetchone())[0]
 
         for sp in spans:
             if sp.end_char < sp.start_char or sp.end_char > len(text):
                 raise HTTPException(status_code=400, detail="Invalid evidence span bounds")
-            conn.execute(
+            await conn.execute(
                 "INSERT INTO evidence_span(org_id, artifact_id, artifact_text_id, span_type, start_char, end_char, "
                 "section_path, extracted_by, confidence, created_at) "
                 "VALUES (%s,%s,%s,'text',%s,%s,%s,'gateway_ingest',%s,now())",
                 (req.org_id, art_id, at_id, sp.start_char, sp.end_char, sp.section_path, sp.confidence),
             )
 
-        ev_id = conn.execute(
+        ev_id = (await (await conn.execute(
             "INSERT INTO event_log(org_id, event_type, occurred_at, ingested_at, actor_principal_id, artifact_id, payload, idempotency_key, trace_id) "
             "VALUES (%s,%s,%s,now(),%s,%s,%s::jsonb,%s,%s) "
             "ON CONFLICT (org_id, idempotency_key) DO UPDATE SET ingested_at=EXCLUDED.ingested_at "
@@ -237,19 +486,16 @@ def ingest(req: IngestRequest):
                 req.idempotency_key,
                 req.trace_id,
             ),
-        ).fetchone()[0]
+        )).fetchone())[0]
 
     return {"ok": True, "event_id": str(ev_id), "artifact_id": str(art_id)}
 
 # ============ STREAMS API ============
 
 @app.get("/v1/streams")
-def list_streams(org_id: str = "00000000-0000-0000-0000-000000000000"):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn:
-        rows = conn.execute(
+async def list_streams(org_id: str = "00000000-0000-0000-0000-000000000000"):
+    async with db.connection() as conn:
+        rows = await (await conn.execute(
             """SELECT stream_id, stream_name, description, 
                       COALESCE(color, '#6366f1') as color,
                       COALESCE(status, 'active') as status,
@@ -258,7 +504,7 @@ def list_streams(org_id: str = "00000000-0000-0000-0000-000000000000"):
                WHERE org_id=%s AND (archived_at IS NULL OR status = 'active')
                ORDER BY stream_name""",
             (org_id,)
-        ).fetchall()
+        )).fetchall()
     
     return {
         "streams": [
@@ -275,66 +521,112 @@ def list_streams(org_id: str = "00000000-0000-0000-0000-000000000000"):
     }
 
 @app.post("/v1/streams")
-def create_stream(req: StreamCreateRequest):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn, conn.transaction():
-        row = conn.execute(
+async def create_stream(req: StreamCreateRequest):
+    async with db.connection() as conn, conn.transaction():
+        row = await (await conn.execute(
             """INSERT INTO decision_stream (org_id, stream_name, description, color, status)
                VALUES (%s, %s, %s, %s, 'active')
                ON CONFLICT (org_id, stream_name) DO UPDATE SET description = EXCLUDED.description
                RETURNING stream_id""",
             (req.org_id, req.name, req.description, req.color)
-        ).fetchone()
+        )).fetchone()
     
     return {"ok": True, "stream_id": str(row[0])}
 
 # ============ DECISIONS API ============
 
+def encode_decision_cursor(decided_at: datetime, decision_id: Any) -> str:
+    """Opaque keyset cursor: the (decided_at, decision_id) of the last row on a page."""
+    raw = f"{decided_at.isoformat()}|{decision_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_decision_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        decided_at, decision_id = raw.split("|")
+        return datetime.fromisoformat(decided_at), uuid.UUID(decision_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/v1/decisions")
-def list_decisions(
+async def list_decisions(
     org_id: str = "00000000-0000-0000-0000-000000000000",
     stream_id: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None,
 ):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn:
-        query = """
-            SELECT d.decision_id, d.title, d.what_decided, d.reasoning, d.decided_at,
-                   d.status, d.revisit_date, ds.stream_name, ds.color,
+    """
+    Newest decisions first, keyset-paginated on (decided_at, decision_id): pass the
+    previous page's next_cursor to continue (null on the last page). limit is clamped
+    to 1..DECISIONS_PAGE_MAX. Reasoning is truncated in SQL and open dissent /
+    uncertainty are counted for the page only.
+    """
+    limit = min(max(limit, 1), DECISIONS_PAGE_MAX)
+    page_filter = ""
+    params: List[Any] = [org_id]
+    if stream_id:
+        page_filter += " AND d.stream_id = %s"
+        params.append(stream_id)
+    if status:
+        page_filter += " AND d.status = %s"
+        params.append(status)
+    if cursor:
+        page_filter += " AND (d.decided_at, d.decision_id) < (%s, %s)"
+        params.extend(decode_decision_cursor(cursor))
+    # One extra row tells whether another page follows
+    params.append(limit + 1)
+
+    async with db.connection() as conn:
+        cur = await conn.execute(
+            f"""
+            WITH page AS (
+                SELECT d.decision_id, d.stream_id, d.decided_by, d.title, d.what_decided,
+                       CASE WHEN length(d.reasoning) > 200
+                            THEN left(d.reasoning, 200) || '...' ELSE d.reasoning END AS reasoning,
+                       d.decided_at, d.status, d.revisit_date
+                FROM decision d
+                WHERE d.org_id = %s{page_filter}
+                ORDER BY d.decided_at DESC, d.decision_id DESC
+                LIMIT %s
+            )
+            SELECT page.decision_id, page.title, page.what_decided, page.reasoning, page.decided_at,
+                   page.status, page.revisit_date, ds.stream_name, ds.color,
                    p.display_name as decided_by_name,
-                   (SELECT COUNT(*) FROM dissent_record dr WHERE dr.decision_id = d.decision_id AND dr.status = 'open') as open_dissent,
-                   (SELECT COUNT(*) FROM uncertainty_record ur WHERE ur.decision_id = d.decision_id AND ur.status = 'open') as open_uncertainty
-            FROM decision d
-            JOIN decision_stream ds ON d.stream_id = ds.stream_id
-            JOIN principal p ON d.decided_by = p.principal_id
-            WHERE d.org_id = %s
-        """
-        params = [org_id]
-        
-        if stream_id:
-            query += " AND d.stream_id = %s"
-            params.append(stream_id)
-        if status:
-            query += " AND d.status = %s"
-            params.append(status)
-        
-        query += " ORDER BY d.decided_at DESC LIMIT %s"
-        params.append(limit)
-        
-        rows = conn.execute(query, params).fetchall()
-    
+                   COALESCE(dr.open_dissent, 0), COALESCE(ur.open_uncertainty, 0)
+            FROM page
+            JOIN decision_stream ds ON page.stream_id = ds.stream_id
+            JOIN principal p ON page.decided_by = p.principal_id
+            LEFT JOIN (
+                SELECT dr.decision_id, COUNT(*) AS open_dissent
+                FROM dissent_record dr JOIN page USING (decision_id)
+                WHERE dr.status = 'open'
+                GROUP BY dr.decision_id
+            ) dr ON dr.decision_id = page.decision_id
+            LEFT JOIN (
+                SELECT ur.decision_id, COUNT(*) AS open_uncertainty
+                FROM uncertainty_record ur JOIN page USING (decision_id)
+                WHERE ur.status = 'open'
+                GROUP BY ur.decision_id
+            ) ur ON ur.decision_id = page.decision_id
+            ORDER BY page.decided_at DESC, page.decision_id DESC
+            """,
+            params,
+        )
+        rows = await cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_decision_cursor(rows[-1][4], rows[-1][0])
+
     return {
         "decisions": [
             {
                 "id": str(row[0]),
                 "title": row[1],
                 "what_decided": row[2],
-                "reasoning": row[3][:200] + "..." if len(row[3]) > 200 else row[3],
+                "reasoning": row[3],
                 "decided_at": row[4].isoformat() if row[4] else None,
                 "status": row[5],
                 "revisit_date": str(row[6]) if row[6] else None,
@@ -344,55 +636,48 @@ def list_decisions(
                 "open_uncertainty_count": row[11]
             }
             for row in rows
-        ]
+        ],
+        "next_cursor": next_cursor,
     }
 
-@app.get("/v1/decisions/{decision_id}")
-def get_decision(decision_id: str, org_id: str = "00000000-0000-0000-0000-000000000000"):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn:
-        # Get decision
-        row = conn.execute(
-            """
-            SELECT d.decision_id, d.title, d.what_decided, d.reasoning, 
-                   d.constraints_at_time, d.alternatives_considered,
-                   d.decided_at, d.status, d.revisit_date,
-                   ds.stream_id, ds.stream_name, ds.color,
-                   p.principal_id, p.display_name
-            FROM decision d
-            JOIN decision_stream ds ON d.stream_id = ds.stream_id
-            JOIN principal p ON d.decided_by = p.principal_id
-            WHERE d.decision_id = %s AND d.org_id = %s
-            """,
-            (decision_id, org_id)
-        ).fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail="Decision not found")
-        
-        # Get dissent records
-        dissent_rows = conn.execute(
-            """SELECT dissent_id, dissenter_name, concern, reasoning, status, resolution
-               FROM dissent_record WHERE decision_id = %s ORDER BY created_at""",
-            (decision_id,)
-        ).fetchall()
-        
-        # Get uncertainty records
-        uncertainty_rows = conn.execute(
-            """SELECT uncertainty_id, aspect, description, impact_if_wrong, mitigation, status, resolution
-               FROM uncertainty_record WHERE decision_id = %s ORDER BY created_at""",
-            (decision_id,)
-        ).fetchall()
-        
-        # Get outcomes
-        outcome_rows = conn.execute(
-            """SELECT outcome_id, outcome_type, description, lessons_learned, recorded_at
-               FROM decision_outcome WHERE decision_id = %s ORDER BY recorded_at DESC""",
-            (decision_id,)
-        ).fetchall()
-    
+# Decision detail with dissent, uncertainty and outcomes aggregated per decision in one
+# statement (LATERAL json_agg), for any number of ids
+DECISION_DETAIL_SQL = """
+    SELECT d.decision_id, d.title, d.what_decided, d.reasoning, 
+           d.constraints_at_time, d.alternatives_considered,
+           d.decided_at, d.status, d.revisit_date,
+           ds.stream_id, ds.stream_name, ds.color,
+           p.principal_id, p.display_name,
+           dissent.items, uncertainty.items, outcomes.items
+    FROM decision d
+    JOIN decision_stream ds ON d.stream_id = ds.stream_id
+    JOIN principal p ON d.decided_by = p.principal_id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', dr.dissent_id::text, 'person', dr.dissenter_name, 'concern', dr.concern,
+                   'reasoning', dr.reasoning, 'status', dr.status, 'resolution', dr.resolution
+               ) ORDER BY dr.created_at), '[]'::json) AS items
+        FROM dissent_record dr WHERE dr.decision_id = d.decision_id
+    ) dissent
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', ur.uncertainty_id::text, 'aspect', ur.aspect, 'description', ur.description,
+                   'impact_if_wrong', ur.impact_if_wrong, 'mitigation', ur.mitigation,
+                   'status', ur.status, 'resolution', ur.resolution
+               ) ORDER BY ur.created_at), '[]'::json) AS items
+        FROM uncertainty_record ur WHERE ur.decision_id = d.decision_id
+    ) uncertainty
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', o.outcome_id::text, 'type', o.outcome_type, 'description', o.description,
+                   'lessons_learned', o.lessons_learned, 'recorded_at', o.recorded_at
+               ) ORDER BY o.recorded_at DESC), '[]'::json) AS items
+        FROM decision_outcome o WHERE o.decision_id = d.decision_id
+    ) outcomes
+    WHERE d.decision_id = ANY(%s) AND d.org_id = %s
+"""
+
+def format_decision(row: Tuple) -> Dict[str, Any]:
     return {
         "id": str(row[0]),
         "title": row[1],
@@ -412,46 +697,48 @@ def get_decision(decision_id: str, org_id: str = "00000000-0000-0000-0000-000000
             "id": str(row[12]),
             "name": row[13]
         },
-        "dissent": [
-            {
-                "id": str(d[0]),
-                "person": d[1],
-                "concern": d[2],
-                "reasoning": d[3],
-                "status": d[4],
-                "resolution": d[5]
-            }
-            for d in dissent_rows
-        ],
-        "uncertainty": [
-            {
-                "id": str(u[0]),
-                "aspect": u[1],
-                "description": u[2],
-                "impact_if_wrong": u[3],
-                "mitigation": u[4],
-                "status": u[5],
-                "resolution": u[6]
-            }
-            for u in uncertainty_rows
-        ],
+        "dissent": row[14],
+        "uncertainty": row[15],
         "outcomes": [
-            {
-                "id": str(o[0]),
-                "type": o[1],
-                "description": o[2],
-                "lessons_learned": o[3],
-                "recorded_at": o[4].isoformat() if o[4] else None
-            }
-            for o in outcome_rows
+            # json renders timestamps without trailing fractional zeros; keep isoformat()
+            {**o, "recorded_at": datetime.fromisoformat(o["recorded_at"]).isoformat() if o["recorded_at"] else None}
+            for o in row[16]
         ]
     }
 
+async def fetch_decisions(org_id: str, decision_ids: List[uuid.UUID]) -> Dict[str, Dict[str, Any]]:
+    """Formatted decision details by id (ids not found in the org are absent)."""
+    async with db.connection() as conn:
+        cur = await conn.execute(DECISION_DETAIL_SQL, (decision_ids, org_id))
+        rows = await cur.fetchall()
+    return {str(row[0]): format_decision(row) for row in rows}
+
+@app.get("/v1/decisions/{decision_id}")
+async def get_decision(decision_id: str, org_id: str = "00000000-0000-0000-0000-000000000000"):
+    try:
+        key = uuid.UUID(decision_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    decisions = await fetch_decisions(org_id, [key])
+    if not decisions:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    return decisions[str(key)]
+
+@app.post("/v1/decisions:batchGet")
+async def batch_get_decisions(req: DecisionBatchGetRequest):
+    """
+    Up to DECISIONS_BATCH_MAX decision details in one round trip, in request order
+    (duplicates collapsed); ids not found in the org are listed under "missing".
+    """
+    ids = list(dict.fromkeys(req.decision_ids))
+    decisions = await fetch_decisions(req.org_id, ids)
+    return {
+        "decisions": [decisions[str(i)] for i in ids if str(i) in decisions],
+        "missing": [str(i) for i in ids if str(i) not in decisions],
+    }
+
 @app.post("/v1/decisions")
-def record_decision(req: DecisionRequest):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
+async def record_decision(req: DecisionRequest):
     decided_at = datetime.now(timezone.utc)
     revisit_date = None
     if req.revisit_date:
@@ -460,9 +747,9 @@ def record_decision(req: DecisionRequest):
         except ValueError:
             pass
     
-    with psycopg.connect(DATABASE_URL) as conn, conn.transaction():
+    async with db.connection() as conn, conn.transaction():
         # Insert the decision
-        decision_row = conn.execute(
+        decision_row = await (await conn.execute(
             """
             INSERT INTO decision (
                 org_id, stream_id, title, what_decided, reasoning,
@@ -483,12 +770,12 @@ def record_decision(req: DecisionRequest):
                 decided_at,
                 revisit_date
             )
-        ).fetchone()
+        )).fetchone()
         decision_id = decision_row[0]
         
         # Insert dissent records
         for d in req.dissent:
-            conn.execute(
+            await conn.execute(
                 """
                 INSERT INTO dissent_record (org_id, decision_id, dissenter_name, concern, reasoning)
                 VALUES (%s, %s, %s, %s, %s)
@@ -498,7 +785,7 @@ def record_decision(req: DecisionRequest):
         
         # Insert uncertainty records
         for u in req.uncertainty:
-            conn.execute(
+            await conn.execute(
                 """
                 INSERT INTO uncertainty_record (org_id, decision_id, aspect, description, impact_if_wrong, mitigation)
                 VALUES (%s, %s, %s, %s, %s, %s)
@@ -509,7 +796,7 @@ def record_decision(req: DecisionRequest):
         # Create artifact and evidence spans for retrieval
         combined_text = f"{req.title}\n\n{req.what_decided}\n\nReasoning: {req.reasoning}"
         
-        art_id = conn.execute(
+        art_id = (await (await conn.execute(
             """
             INSERT INTO artifact(
                 org_id, source_system, source_uri, captured_at, occurred_at,
@@ -533,26 +820,26 @@ def record_decision(req: DecisionRequest):
                 req.org_id,
                 req.stream_id
             )
-        ).fetchone()[0]
+        )).fetchone())[0]
         
         # Update decision with artifact link
-        conn.execute(
+        await conn.execute(
             "UPDATE decision SET artifact_id = %s WHERE decision_id = %s",
             (art_id, decision_id)
         )
         
         # Insert artifact_text for search
-        at_id = conn.execute(
+        at_id = (await (await conn.execute(
             """
             INSERT INTO artifact_text(org_id, artifact_id, normaliser_version, language, text_utf8, text_sha256, structure_json)
             VALUES (%s, %s, 'v1', 'en', %s, %s, '{}'::jsonb)
             RETURNING artifact_text_id
             """,
             (req.org_id, art_id, combined_text, sha256b(combined_text))
-        ).fetchone()[0]
+        )).fetchone())[0]
         
         # Create evidence span for the whole decision
-        conn.execute(
+        await conn.execute(
             """
             INSERT INTO evidence_span(org_id, artifact_id, artifact_text_id, span_type, start_char, end_char, section_path, extracted_by, confidence)
             VALUES (%s, %s, %s, 'text', 0, %s, 'decision', 'decision_record', 1.0)
@@ -561,7 +848,7 @@ def record_decision(req: DecisionRequest):
         )
         
         # Log event
-        ev_id = conn.execute(
+        ev_id = (await (await conn.execute(
             """
             INSERT INTO event_log(org_id, event_type, occurred_at, ingested_at, actor_principal_id, artifact_id, payload)
             VALUES (%s, 'decision_recorded', %s, now(), %s, %s, %s::jsonb)
@@ -581,7 +868,7 @@ def record_decision(req: DecisionRequest):
                     "revisit_date": req.revisit_date
                 })
             )
-        ).fetchone()[0]
+        )).fetchone())[0]
     
     return {
         "ok": True,
@@ -593,15 +880,12 @@ def record_decision(req: DecisionRequest):
 # ============ INSIGHTS API (Dashboard) ============
 
 @app.get("/v1/insights")
-def list_insights(
+async def list_insights(
     org_id: str = "00000000-0000-0000-0000-000000000000",
     status: str = "active"
 ):
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn:
-        rows = conn.execute(
+    async with db.connection() as conn:
+        rows = await (await conn.execute(
             """
             SELECT insight_id, insight_type, severity, title, description, decision_ids, created_at
             FROM insight
@@ -612,7 +896,7 @@ def list_insights(
             LIMIT 20
             """,
             (org_id, status)
-        ).fetchall()
+        )).fetchall()
     
     return {
         "insights": [
@@ -629,78 +913,148 @@ def list_insights(
         ]
     }
 
-@app.get("/v1/dashboard")
-def get_dashboard(org_id: str = "00000000-0000-0000-0000-000000000000"):
-    """Dashboard endpoint: returns needs-attention items, recent decisions, and stats."""
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="DATABASE_URL not set")
-    
-    with psycopg.connect(DATABASE_URL) as conn:
-        # Decisions due for revisit
-        revisit_due = conn.execute(
-            """
-            SELECT decision_id, title, revisit_date, ds.stream_name
-            FROM decision d
-            JOIN decision_stream ds ON d.stream_id = ds.stream_id
-            WHERE d.org_id = %s AND d.status = 'active' 
-                  AND d.revisit_date IS NOT NULL AND d.revisit_date <= CURRENT_DATE
-            ORDER BY revisit_date
-            LIMIT 5
-            """,
-            (org_id,)
-        ).fetchall()
-        
-        # Open dissent
-        open_dissent = conn.execute(
-            """
-            SELECT dr.dissent_id, d.decision_id, d.title, dr.dissenter_name, dr.concern, ds.stream_name
-            FROM dissent_record dr
-            JOIN decision d ON dr.decision_id = d.decision_id
-            JOIN decision_stream ds ON d.stream_id = ds.stream_id
-            WHERE dr.org_id = %s AND dr.status = 'open'
-            ORDER BY dr.created_at DESC
-            LIMIT 5
-            """,
-            (org_id,)
-        ).fetchall()
-        
-        # Active insights
-        insights = conn.execute(
-            """
-            SELECT insight_id, insight_type, severity, title, description
-            FROM insight
-            WHERE org_id = %s AND status = 'active'
-            ORDER BY CASE severity WHEN 'attention' THEN 1 WHEN 'warning' THEN 2 ELSE 3 END
-            LIMIT 5
-            """,
-            (org_id,)
-        ).fetchall()
-        
-        # Recent decisions
-        recent = conn.execute(
-            """
-            SELECT d.decision_id, d.title, d.decided_at, ds.stream_name, ds.color, p.display_name
-            FROM decision d
-            JOIN decision_stream ds ON d.stream_id = ds.stream_id
-            JOIN principal p ON d.decided_by = p.principal_id
-            WHERE d.org_id = %s
-            ORDER BY d.decided_at DESC
-            LIMIT 10
-            """,
-            (org_id,)
-        ).fetchall()
-        
-        # Stats
-        stats = conn.execute(
+class DashboardCache:
+    """
+    Rendered dashboards keyed by org and validated by ETag. The ETag comes from the
+    org's org_dashboard_snapshot version (bumped by triggers on every decision, dissent,
+    insight and stream write, migration 0017, and on principal renames, migration 0020)
+    plus the current date (revisit-due items
+    depend on it), so a 304 or cache hit costs one primary-key lookup. Whether the
+    snapshot triggers are installed (by install_dashboard_snapshot() on startup) is
+    re-checked every SNAPSHOT_CHECK_INTERVAL_S; without them the dashboard is computed
+    live and the ETag hashes the body.
+    """
+    SNAPSHOT_CHECK_INTERVAL_S = 60.0
+
+    def __init__(self, max_orgs: int):
+        self.max_orgs = max_orgs
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._snapshot_available = False
+        self._snapshot_checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def snapshot_available(self, conn: Any) -> bool:
+        if time.monotonic() - self._snapshot_checked_at >= self.SNAPSHOT_CHECK_INTERVAL_S:
+            cur = await conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_trigger "
+                "WHERE tgrelid = to_regclass('decision') AND tgname = 'org_dashboard_snapshot_decision')"
+            )
+            self._snapshot_available = (await cur.fetchone())[0]
+            self._snapshot_checked_at = time.monotonic()
+        return self._snapshot_available
+
+    def get(self, org_id: str, etag: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(org_id)
+        if entry is None or entry[0] != etag:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(org_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, org_id: str, etag: str, body: Dict[str, Any]) -> None:
+        self._entries[org_id] = (etag, body)
+        self._entries.move_to_end(org_id)
+        while len(self._entries) > self.max_orgs:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "snapshot_available": self._snapshot_available,
+            "orgs": len(self._entries),
+            "max_orgs": self.max_orgs,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+dashboard_cache = DashboardCache(DASHBOARD_CACHE_MAX_ORGS)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag.removeprefix("W/") in [t.removeprefix("W/") for t in tags]
+
+async def load_dashboard(conn: Any, org_id: str, snapshot: Optional[Tuple]) -> Dict[str, Any]:
+    """Dashboard body: needs-attention items, recent decisions, and stats."""
+    # Decisions due for revisit (total due from the same scan)
+    cur = await conn.execute(
+        """
+        SELECT decision_id, title, revisit_date, ds.stream_name, COUNT(*) OVER () AS total_due
+        FROM decision d
+        JOIN decision_stream ds ON d.stream_id = ds.stream_id
+        WHERE d.org_id = %s AND d.status = 'active' 
+              AND d.revisit_date IS NOT NULL AND d.revisit_date <= CURRENT_DATE
+        ORDER BY revisit_date
+        LIMIT 5
+        """,
+        (org_id,)
+    )
+    revisit_due = await cur.fetchall()
+
+    # Open dissent
+    cur = await conn.execute(
+        """
+        SELECT dr.dissent_id, d.decision_id, d.title, dr.dissenter_name, dr.concern, ds.stream_name
+        FROM dissent_record dr
+        JOIN decision d ON dr.decision_id = d.decision_id
+        JOIN decision_stream ds ON d.stream_id = ds.stream_id
+        WHERE dr.org_id = %s AND dr.status = 'open'
+        ORDER BY dr.created_at DESC
+        LIMIT 5
+        """,
+        (org_id,)
+    )
+    open_dissent = await cur.fetchall()
+
+    # Active insights
+    cur = await conn.execute(
+        """
+        SELECT insight_id, insight_type, severity, title, description
+        FROM insight
+        WHERE org_id = %s AND status = 'active'
+        ORDER BY CASE severity WHEN 'attention' THEN 1 WHEN 'warning' THEN 2 ELSE 3 END
+        LIMIT 5
+        """,
+        (org_id,)
+    )
+    insights = await cur.fetchall()
+
+    # Recent decisions
+    cur = await conn.execute(
+        """
+        SELECT d.decision_id, d.title, d.decided_at, ds.stream_name, ds.color, p.display_name
+        FROM decision d
+        JOIN decision_stream ds ON d.stream_id = ds.stream_id
+        JOIN principal p ON d.decided_by = p.principal_id
+        WHERE d.org_id = %s
+        ORDER BY d.decided_at DESC
+        LIMIT 10
+        """,
+        (org_id,)
+    )
+    recent = await cur.fetchall()
+
+    # Stats: snapshot counters, or live counts without migration 0017
+    if snapshot is not None:
+        stats = (snapshot[2], snapshot[3], snapshot[4])
+    else:
+        cur = await conn.execute(
             """
             SELECT 
                 (SELECT COUNT(*) FROM decision WHERE org_id = %s) as total_decisions,
                 (SELECT COUNT(*) FROM decision WHERE org_id = %s AND status = 'active') as active_decisions,
-                (SELECT COUNT(*) FROM dissent_record WHERE org_id = %s AND status = 'open') as open_dissent,
-                (SELECT COUNT(*) FROM decision WHERE org_id = %s AND revisit_date <= CURRENT_DATE AND status = 'active') as revisit_due
+                (SELECT COUNT(*) FROM dissent_record WHERE org_id = %s AND status = 'open') as open_dissent
             """,
-            (org_id, org_id, org_id, org_id)
-        ).fetchone()
+            (org_id, org_id, org_id)
+        )
+        stats = await cur.fetchone()
     
     needs_attention = []
     
@@ -752,6 +1106,43 @@ def get_dashboard(org_id: str = "00000000-0000-0000-0000-000000000000"):
             "total_decisions": stats[0],
             "active_decisions": stats[1],
             "open_dissent": stats[2],
-            "revisit_due": stats[3]
+            "revisit_due": revisit_due[0][4] if revisit_due else 0
         }
     }
+
+@app.get("/v1/dashboard")
+async def get_dashboard(
+    org_id: str = "00000000-0000-0000-0000-000000000000",
+    if_none_match: Optional[str] = Header(None),
+):
+    """Dashboard endpoint: returns needs-attention items, recent decisions, and stats."""
+    async with db.connection() as conn:
+        snapshot = None
+        if await dashboard_cache.snapshot_available(conn):
+            cur = await conn.execute(
+                """
+                SELECT CURRENT_DATE, COALESCE(s.version, 0), COALESCE(s.total_decisions, 0),
+                       COALESCE(s.active_decisions, 0), COALESCE(s.open_dissent, 0)
+                FROM (SELECT 1) one
+                LEFT JOIN org_dashboard_snapshot s ON s.org_id = %s
+                """,
+                (org_id,)
+            )
+            snapshot = await cur.fetchone()
+            etag = f'"dash-{snapshot[1]}-{snapshot[0]:%Y%m%d}"'
+            if etag_matches(if_none_match, etag):
+                dashboard_cache.not_modified += 1
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+            body = dashboard_cache.get(org_id, etag)
+            if body is not None:
+                return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+        body = await load_dashboard(conn, org_id, snapshot)
+
+    if snapshot is not None:
+        dashboard_cache.put(org_id, etag, body)
+    else:
+        etag = '"dash-' + hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:20] + '"'
+        if etag_matches(if_none_match, etag):
+            dashboard_cache.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
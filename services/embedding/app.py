@@ -71,9 +71,12 @@ def generate_embeddings(req: GenerateEmbeddingsRequest):
         # Find evidence spans without embeddings (or all if force_regenerate)
         query = """
             SELECT es.evidence_span_id::text, es.org_id::text,
-                   SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char) as span_text
+                   COALESCE(est.span_text,
+                            SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char)) as span_text
             FROM evidence_span es
             JOIN artifact_text at ON es.artifact_text_id = at.artifact_text_id
+            -- span text side table (migration 0016); avoids detoasting the whole artifact text
+            LEFT JOIN evidence_span_text est ON est.evidence_span_id = es.evidence_span_id
             LEFT JOIN evidence_embedding ee ON es.evidence_span_id = ee.evidence_span_id
                 AND ee.model_name = %s
                 AND ee.model_version = %s
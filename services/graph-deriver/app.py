@@ -33,11 +33,54 @@ def stable_hash(org_id: str, text: str) -> str:
     return hashlib.sha256(f"{org_id}:{text}".encode("utf-8")).hexdigest()[:24]
 
 
+class SchemaCapabilities:
+    """
+    Optional tables present in the database, detected once and re-detected only
+    when schema_migrations changes (checked once per poll cycle).
+    """
+
+    OPTIONAL_TABLES = ("span_node",)
+
+    def __init__(self):
+        self.tables: frozenset = frozenset()
+        self._migrations_fingerprint: Optional[tuple] = None
+
+    @property
+    def has_span_node(self) -> bool:
+        return "span_node" in self.tables
+
+    def refresh(self, conn) -> None:
+        """Cheap schema_migrations probe; full detection only after a migration ran."""
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL;")
+            if cur.fetchone()[0]:
+                cur.execute("SELECT count(*), max(applied_at) FROM schema_migrations;")
+                fingerprint = tuple(cur.fetchone())
+            else:
+                fingerprint = None
+            changed = fingerprint is None or fingerprint != self._migrations_fingerprint
+            if changed:
+                cur.execute("""
+                    SELECT c.relname
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = current_schema()
+                      AND c.relkind IN ('r', 'p')
+                      AND c.relname = ANY(%s);
+                """, (list(self.OPTIONAL_TABLES),))
+                self.tables = frozenset(row[0] for row in cur.fetchall())
+                self._migrations_fingerprint = fingerprint
+        conn.commit()
+        if changed:
+            logger.info(f"Schema capabilities: {sorted(self.tables) or 'none'}")
+
+
 class GraphDeriver:
     """Derives graph nodes/edges from event stream"""
     
-    def __init__(self, conn):
+    def __init__(self, conn, capabilities: Optional[SchemaCapabilities] = None):
         self.conn = conn
+        self.capabilities = capabilities or SchemaCapabilities()
         
     def upsert_node(self, org_id: str, node_type: str, key: str, 
                     title: str, canonical_text: Optional[str] = None,
@@ -105,31 +148,17 @@ class GraphDeriver:
             """, (event_id, edge_id))
 
             # 2) Link spans directly to both src/dst nodes via span_node (if table exists)
-            cur.execute("""
-                DO $$
-                BEGIN
-                  IF EXISTS (
-                    SELECT 1 FROM information_schema.tables
-                    WHERE table_schema = 'public' AND table_name = 'span_node'
-                  ) THEN
+            if self.capabilities.has_span_node:
+                cur.execute("""
                     INSERT INTO span_node (org_id, evidence_span_id, node_id)
-                    SELECT ge.org_id, es.evidence_span_id, ge.src_node_id
+                    SELECT ge.org_id, es.evidence_span_id, n.node_id
                     FROM edge_evidence ee
                     JOIN graph_edge ge ON ge.edge_id = ee.edge_id
                     JOIN evidence_span es ON es.evidence_span_id = ee.evidence_span_id
+                    CROSS JOIN LATERAL (VALUES (ge.src_node_id), (ge.dst_node_id)) AS n(node_id)
                     WHERE ee.edge_id = %s
                     ON CONFLICT (org_id, evidence_span_id, node_id) DO NOTHING;
-
-                    INSERT INTO span_node (org_id, evidence_span_id, node_id)
-                    SELECT ge.org_id, es.evidence_span_id, ge.dst_node_id
-                    FROM edge_evidence ee
-                    JOIN graph_edge ge ON ge.edge_id = ee.edge_id
-                    JOIN evidence_span es ON es.evidence_span_id = ee.evidence_span_id
-                    WHERE ee.edge_id = %s
-                    ON CONFLICT (org_id, evidence_span_id, node_id) DO NOTHING;
-                  END IF;
-                END $$;
-            """, (edge_id, edge_id))
+                """, (edge_id,))
 
             self.conn.commit()
     
@@ -355,6 +384,7 @@ class GraphDeriver:
 def main():
     """Main daemon loop"""
     logger.info(f"Starting graph-deriver, polling every {POLL_INTERVAL_SEC}s")
+    capabilities = SchemaCapabilities()
     
     while True:
         try:
@@ -366,8 +396,9 @@ def main():
                 password=DB_PASS
             )
             conn.autocommit = False
-            
-            deriver = GraphDeriver(conn)
+
+            capabilities.refresh(conn)
+            deriver = GraphDeriver(conn, capabilities)
             
             # Get last processed event for each org
             with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
@@ -423,6 +454,10 @@ def main():
                               last_processed_at = now();
                         """, (org_id, str(event["event_id"])))
                         conn.commit()
+
+                    # Let retrieval replicas refresh their cached adjacency for this org
+                    cur.execute("SELECT pg_notify('graph_changed', %s);", (org_id,))
+                    conn.commit()
             
             conn.close()
             
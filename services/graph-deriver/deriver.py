@@ -64,15 +64,17 @@ def process_one(conn, org_id: str) -> bool:
     decision_title = payload.get("decision_title") or f"Decision inferred from {event_type}"
 
     # Retrieve evidence spans tied to this event's artifact
-    # Join with artifact_text to get the actual text content
+    # Text comes from evidence_span_text, falling back to slicing artifact_text
     spans = []
     if artifact_id:
         spans = conn.execute(
             "SELECT es.evidence_span_id::text, es.artifact_id::text, "
-            "       SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char) as text, "
+            "       COALESCE(est.span_text, "
+            "                SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char)) as text, "
             "       es.start_char, es.end_char, es.confidence "
             "FROM evidence_span es "
             "JOIN artifact_text at ON es.artifact_text_id = at.artifact_text_id "
+            "LEFT JOIN evidence_span_text est ON est.evidence_span_id = es.evidence_span_id "
             "WHERE es.artifact_id=%s::uuid AND es.org_id=%s",
             (artifact_id, org_id),
         ).fetchall()
@@ -113,6 +115,8 @@ def process_one(conn, org_id: str) -> bool:
         attach_edge_evidence(conn, edge_id, span_id, confidence, evidence_type)
 
     conn.execute("UPDATE event_log SET processed_at=now() WHERE event_id=%s::uuid", (event_id,))
+    # Delivered on commit; retrieval replicas refresh their cached adjacency for this org
+    conn.execute("SELECT pg_notify('graph_changed', %s)", (org_id,))
     evidence_msg = f", attached {len(edge_evidence_pairs)} edge_evidence" if edge_evidence_pairs else ""
     print(f"processed event {event_id} -> nodes(decision={decision_node}, topic={topic_node}){evidence_msg}")
     return True
@@ -9,11 +9,14 @@ import os
 import re
 import logging
 import httpx
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from jsonschema import validate, Draft202012Validator
 
+from downstream import DownstreamClient, http_limits_from_env
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
 logger = logging.getLogger("inference")
 
@@ -25,12 +28,24 @@ LLAMA_SERVER_URL = os.environ.get("LLAMA_SERVER_URL", "http://localhost:8084")
 MAX_TOKENS = int(os.environ.get("LLM_MAX_TOKENS", "1024"))
 TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.3"))
 USE_STUB = os.environ.get("USE_STUB", "false").lower() == "true"
+LLM_TIMEOUT_S = float(os.environ.get("LLM_TIMEOUT_S", "120"))
+LLM_HEALTH_TIMEOUT_S = float(os.environ.get("LLM_HEALTH_TIMEOUT_S", "5"))
+# llama-server connection pool (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, ...)
+HTTP_LIMITS = http_limits_from_env(max_connections=16, max_keepalive=8)
 
 # Load schema
 SCHEMA = json.loads(open(SCHEMA_PATH, "r", encoding="utf-8").read())
 Draft202012Validator.check_schema(SCHEMA)
 
 
+llm_client = DownstreamClient("llama-server", LLAMA_SERVER_URL, timeout=LLM_TIMEOUT_S, **HTTP_LIMITS)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await llm_client.aclose()
+
+
 class EvidenceIn(BaseModel):
     evidence_span_id: str
     artifact_id: str
@@ -137,24 +152,37 @@ def cleanup_llm_output(raw: str) -> str:
     return text
 
 
+def streamable_answer(raw: str) -> str:
+    """
+    Cleaned text of a partial completion that later tokens cannot change: stops before
+    the last <|tag|> (cleanup drops its content up to the next tag) and holds back a
+    trailing partial word / "<" that could still turn into a tag.
+    """
+    cut = raw.rfind("<|")
+    if cut != -1:
+        raw = raw[:cut]
+    raw = re.sub(r'(?:<|\w+\|?)$', '', raw)
+    return cleanup_llm_output(raw)
+
+
+def completion_body(prompt: str, stream: bool) -> Dict[str, Any]:
+    return {
+        "prompt": prompt,
+        "n_predict": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "stop": ["<|user|>", "<|system|>", "\n\n\n"],
+        "stream": stream,
+    }
+
+
 async def call_llama_server(prompt: str) -> str:
     """Call llama-server completion endpoint"""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{LLAMA_SERVER_URL}/completion",
-                json={
-                    "prompt": prompt,
-                    "n_predict": MAX_TOKENS,
-                    "temperature": TEMPERATURE,
-                    "stop": ["<|user|>", "<|system|>", "\n\n\n"],
-                    "stream": False
-                }
-            )
-            response.raise_for_status()
-            result = response.json()
-            raw = result.get("content", "").strip()
-            return cleanup_llm_output(raw)
+        response = await llm_client.post("/completion", json=completion_body(prompt, stream=False))
+        response.raise_for_status()
+        result = response.json()
+        raw = result.get("content", "").strip()
+        return cleanup_llm_output(raw)
     except httpx.TimeoutException:
         logger.error("LLM request timed out")
         raise HTTPException(status_code=504, detail="LLM request timed out")
@@ -163,6 +191,27 @@ async def call_llama_server(prompt: str) -> str:
         raise HTTPException(status_code=502, detail=f"LLM request failed: {e}")
 
 
+async def stream_llama_server(prompt: str) -> AsyncIterator[str]:
+    """Raw content chunks from llama-server's streaming completion (SSE "data: {...}" lines)"""
+    try:
+        async with llm_client.stream("POST", "/completion", json=completion_body(prompt, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = json.loads(line[len("data:"):])
+                if chunk.get("content"):
+                    yield chunk["content"]
+                if chunk.get("stop"):
+                    break
+    except httpx.TimeoutException:
+        logger.error("LLM stream timed out")
+        raise HTTPException(status_code=504, detail="LLM request timed out")
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"LLM stream failed: {e}")
+        raise HTTPException(status_code=502, detail=f"LLM request failed: {e}")
+
+
 def stub_response(req: InferRequest) -> dict:
     """Fallback stub response when LLM is unavailable"""
     top = req.evidence[:3]
@@ -193,14 +242,80 @@ async def healthz():
     llm_status = "unknown"
     if not USE_STUB:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                r = await client.get(f"{LLAMA_SERVER_URL}/health")
-                llm_status = "ok" if r.status_code == 200 else "unavailable"
+            r = await llm_client.get("/health", timeout=LLM_HEALTH_TIMEOUT_S)
+            llm_status = "ok" if r.status_code == 200 else "unavailable"
         except:
             llm_status = "unavailable"
     return {"ok": True, "llm_status": llm_status, "stub_mode": USE_STUB}
 
 
+def _require_debug_access(admin_token: str | None) -> None:
+    """
+    Gate debug endpoints behind ADMIN_DEBUG_TOKEN (same rules as retrieval's):
+    without a token configured they are only served when ENV is dev/local.
+    """
+    expected_token = os.environ.get("ADMIN_DEBUG_TOKEN")
+    if expected_token and admin_token != expected_token:
+        raise HTTPException(status_code=403, detail="Forbidden: invalid or missing admin_token")
+    if not expected_token:
+        env_name = os.environ.get("ENV", "dev")
+        if env_name not in ("dev", "local", "development"):
+            raise HTTPException(status_code=403, detail="Forbidden: ADMIN_DEBUG_TOKEN not configured")
+
+
+@app.get("/v1/debug/http")
+async def debug_http(admin_token: str | None = None):
+    """llama-server client pool limits and usage."""
+    _require_debug_access(admin_token)
+    return llm_client.stats()
+
+
+def no_evidence_response(req: InferRequest) -> dict:
+    return {
+        "contract_version": "v1",
+        "mode": req.mode,
+        "answer": "I don't have sufficient evidence in the current memory slice to answer that safely.",
+        "evidence": [],
+        "policy": {"status": "insufficient_evidence", "notes": ["no_evidence_provided"]},
+        "debug": {"stub": False, "reason": "no_evidence"}
+    }
+
+
+def llm_response(req: InferRequest, answer: str) -> dict:
+    return {
+        "contract_version": "v1",
+        "mode": req.mode,
+        "answer": answer,
+        "evidence": [e.model_dump() for e in req.evidence[:5]],
+        "policy": {"status": "ok", "notes": ["llm_inference", "evidence_anchored"]},
+        "debug": {
+            "stub": False,
+            "evidence_count_in": len(req.evidence),
+            "model": "gemma-3-27b-it",
+            "temperature": TEMPERATURE
+        }
+    }
+
+
+def fallback_response(req: InferRequest) -> dict:
+    logger.warning("LLM unavailable, falling back to stub")
+    out = stub_response(req)
+    out["debug"]["fallback"] = True
+    return out
+
+
+def validate_contract(out: dict) -> None:
+    """Contract validation (hard gate)"""
+    try:
+        validate(instance=out, schema=SCHEMA)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Contract validation failed: {e}")
+
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/v1/infer")
 async def infer(req: InferRequest):
     """Main inference endpoint - evidence-anchored responses"""
@@ -209,53 +324,78 @@ async def infer(req: InferRequest):
     if USE_STUB:
         out = stub_response(req)
     elif not req.evidence:
-        out = {
-            "contract_version": "v1",
-            "mode": req.mode,
-            "answer": "I don't have sufficient evidence in the current memory slice to answer that safely.",
-            "evidence": [],
-            "policy": {"status": "insufficient_evidence", "notes": ["no_evidence_provided"]},
-            "debug": {"stub": False, "reason": "no_evidence"}
-        }
+        out = no_evidence_response(req)
     else:
         # Build prompt and call LLM
         prompt = build_prompt(req.mode, req.query_text, req.evidence)
         logger.info(f"Calling LLM for {req.mode} query with {len(req.evidence)} evidence items")
         
         try:
-            answer = await call_llama_server(prompt)
-            
-            # Build evidence list for response
-            evidence_out = [e.model_dump() for e in req.evidence[:5]]
-            
-            out = {
-                "contract_version": "v1",
-                "mode": req.mode,
-                "answer": answer,
-                "evidence": evidence_out,
-                "policy": {"status": "ok", "notes": ["llm_inference", "evidence_anchored"]},
-                "debug": {
-                    "stub": False,
-                    "evidence_count_in": len(req.evidence),
-                    "model": "gemma-3-27b-it",
-                    "temperature": TEMPERATURE
-                }
-            }
+            out = llm_response(req, await call_llama_server(prompt))
         except HTTPException:
             # LLM failed - fall back to stub
-            logger.warning("LLM unavailable, falling back to stub")
-            out = stub_response(req)
-            out["debug"]["fallback"] = True
-
-    # Contract validation (hard gate)
-    try:
-        validate(instance=out, schema=SCHEMA)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Contract validation failed: {e}")
+            out = fallback_response(req)
 
+    validate_contract(out)
     return out
 
 
+@app.post("/v1/infer/stream")
+async def infer_stream(req: InferRequest):
+    """
+    Server-sent events version of /v1/infer: "token" events ({"text": ...}) carry the
+    cleaned answer incrementally as llama-server generates it, then one "final" event
+    carries the full contract-validated response (its answer is authoritative), or an
+    "error" event ({"status", "detail"}) if validation fails. If llama-server fails
+    before any token was sent, the fallback answer is streamed instead; once tokens
+    have been sent it ends with an "error" event, so no fallback text is appended to
+    a partial answer.
+    """
+
+    async def events() -> AsyncIterator[str]:
+        canned = True
+        if USE_STUB:
+            out = stub_response(req)
+        elif not req.evidence:
+            out = no_evidence_response(req)
+        else:
+            prompt = build_prompt(req.mode, req.query_text, req.evidence)
+            logger.info(f"Streaming LLM for {req.mode} query with {len(req.evidence)} evidence items")
+            raw, sent = "", ""
+            try:
+                async for chunk in stream_llama_server(prompt):
+                    raw += chunk
+                    stable = streamable_answer(raw)
+                    if len(stable) > len(sent) and stable.startswith(sent):
+                        yield sse("token", {"text": stable[len(sent):]})
+                        sent = stable
+                out = llm_response(req, cleanup_llm_output(raw))
+                canned = False
+                # Tail held back by streamable_answer
+                if out["answer"].startswith(sent) and len(out["answer"]) > len(sent):
+                    yield sse("token", {"text": out["answer"][len(sent):]})
+            except HTTPException as e:
+                if sent:
+                    yield sse("error", {"status": e.status_code, "detail": e.detail})
+                    return
+                out = fallback_response(req)
+        if canned:
+            # Stub, no-evidence and fallback answers arrive whole
+            yield sse("token", {"text": out["answer"]})
+        try:
+            validate_contract(out)
+        except HTTPException as e:
+            yield sse("error", {"status": e.status_code, "detail": e.detail})
+            return
+        yield sse("final", out)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
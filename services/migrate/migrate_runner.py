@@ -67,6 +67,7 @@ def main() -> None:
 
     with psycopg.connect(dsn) as conn:
         ensure_schema_migrations(conn)
+        applied = []
         for f in files:
             if already_applied(conn, f.name):
                 # hash drift detection (best-effort if column exists)
@@ -82,6 +83,12 @@ def main() -> None:
                 continue
             print(f"apply {f.name}")
             apply_file(conn, f)
+            applied.append(f.name)
+
+        if applied:
+            # Running services re-detect their schema capabilities on this notification
+            with conn.transaction():
+                conn.execute("SELECT pg_notify('schema_migrated', %s)", (applied[-1],))
 
     print("migrations complete")
 
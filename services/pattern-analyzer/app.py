@@ -21,6 +21,7 @@ from detectors import (
     ValuesConflictDetector,
     OutcomeNeededDetector,
 )
+from detectors.base import close_http_clients
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
@@ -275,6 +276,7 @@ def startup():
 
 @app.on_event("shutdown")
 def shutdown():
-    """Shutdown scheduler."""
+    """Shutdown scheduler and the shared HTTP clients."""
     logger.info("Shutting down pattern analyzer")
     scheduler.shutdown()
+    close_http_clients()
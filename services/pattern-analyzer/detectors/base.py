@@ -2,12 +2,31 @@
 from __future__ import annotations
 
 import logging
+import os
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Any, Dict, List
+
 from psycopg import Connection
 
+from downstream import SyncDownstreamClient, http_limits_from_env
+
 logger = logging.getLogger("pattern-analyzer")
 
+EMBEDDING_URL = os.environ.get("EMBEDDING_URL", "http://embedding:8080")
+INFERENCE_URL = os.environ.get("INFERENCE_URL", "http://inference:8082")
+# Pool shared by every detector (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, ...)
+HTTP_LIMITS = http_limits_from_env(max_connections=20, max_keepalive=10)
+
+
+embedding_client = SyncDownstreamClient("embedding", EMBEDDING_URL, timeout=30.0, **HTTP_LIMITS)
+inference_client = SyncDownstreamClient("inference", INFERENCE_URL, timeout=30.0, **HTTP_LIMITS)
+
+
+def close_http_clients() -> None:
+    """Close the shared clients (on shutdown)."""
+    embedding_client.close()
+    inference_client.close()
+
 
 class BaseDetector(ABC):
     """
@@ -26,6 +45,16 @@ class BaseDetector(ABC):
         self.conn = conn
         self.org_id = org_id
 
+    @property
+    def embedding(self) -> SyncDownstreamClient:
+        """Shared pooled client for the embedding service."""
+        return embedding_client
+
+    @property
+    def inference(self) -> SyncDownstreamClient:
+        """Shared pooled client for the inference service."""
+        return inference_client
+
     @abstractmethod
     def detect(self) -> List[Dict[str, Any]]:
         """
@@ -4,7 +4,6 @@ from __future__ import annotations
 import hashlib
 import os
 from typing import List, Dict, Any, Optional
-import httpx
 import numpy as np
 
 from .base import BaseDetector
@@ -15,8 +14,6 @@ class DecisionConflictDetector(BaseDetector):
 
     def __init__(self, conn, org_id: str):
         super().__init__(conn, org_id)
-        self.embedding_url = os.environ.get("EMBEDDING_URL", "http://embedding:8080")
-        self.inference_url = os.environ.get("INFERENCE_URL", "http://inference:8082")
         self.conflict_threshold = float(os.environ.get("CONFLICT_SIMILARITY_THRESHOLD", "0.75"))
         self.lookback_months = int(os.environ.get("CONFLICT_LOOKBACK_MONTHS", "12"))
 
@@ -207,8 +204,8 @@ class DecisionConflictDetector(BaseDetector):
     def _generate_embedding(self, text: str) -> Optional[List[float]]:
         """Call embedding service."""
         try:
-            response = httpx.post(
-                f"{self.embedding_url}/v1/embed",
+            response = self.embedding.post(
+                "/v1/embed",
                 json={"texts": [text]},
                 timeout=10.0,
             )
@@ -293,8 +290,8 @@ If no, explain how they are compatible or complementary.
 Be concise (2-3 sentences)."""
 
         try:
-            response = httpx.post(
-                f"{self.inference_url}/infer",
+            response = self.inference.post(
+                "/infer",
                 json={
                     "mode": "reflection",
                     "query_text": prompt,
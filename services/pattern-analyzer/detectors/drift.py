@@ -4,7 +4,6 @@ from __future__ import annotations
 import hashlib
 import os
 from typing import List, Dict, Any, Optional
-import httpx
 import numpy as np
 
 from .base import BaseDetector
@@ -15,8 +14,6 @@ class AssumptionDriftDetector(BaseDetector):
 
     def __init__(self, conn, org_id: str):
         super().__init__(conn, org_id)
-        self.embedding_url = os.environ.get("EMBEDDING_URL", "http://embedding:8080")
-        self.inference_url = os.environ.get("INFERENCE_URL", "http://inference:8082")
         self.lookback_months = int(os.environ.get("DRIFT_LOOKBACK_MONTHS", "12"))
         self.similarity_threshold = float(os.environ.get("DRIFT_SIMILARITY_THRESHOLD", "0.85"))
 
@@ -166,8 +163,8 @@ class AssumptionDriftDetector(BaseDetector):
     def _generate_embedding(self, text: str) -> Optional[List[float]]:
         """Call embedding service to generate embedding."""
         try:
-            response = httpx.post(
-                f"{self.embedding_url}/v1/embed",
+            response = self.embedding.post(
+                "/v1/embed",
                 json={"texts": [text]},
                 timeout=10.0,
             )
@@ -260,8 +257,8 @@ Keep your response concise (2-3 sentences)."""
 
         try:
             # Call inference service in reflection mode
-            response = httpx.post(
-                f"{self.inference_url}/infer",
+            response = self.inference.post(
+                "/infer",
                 json={
                     "mode": "reflection",
                     "query_text": prompt,
@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import os
 from typing import List, Dict, Any
-import httpx
 
 from .base import BaseDetector
 
@@ -13,7 +12,6 @@ class ValuesConflictDetector(BaseDetector):
 
     def __init__(self, conn, org_id: str):
         super().__init__(conn, org_id)
-        self.inference_url = os.environ.get("INFERENCE_URL", "http://inference:8082")
         self.lookback_months = int(os.environ.get("VALUES_LOOKBACK_MONTHS", "6"))
 
     def detect(self) -> List[Dict[str, Any]]:
@@ -160,8 +158,8 @@ If no, respond with "COMPATIBLE" and explain how it aligns or is neutral.
 Keep response to 2-3 sentences."""
 
         try:
-            response = httpx.post(
-                f"{self.inference_url}/infer",
+            response = self.inference.post(
+                "/infer",
                 json={
                     "mode": "reflection",
                     "query_text": prompt,
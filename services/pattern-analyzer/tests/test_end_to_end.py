@@ -1,5 +1,6 @@
 import importlib.util
 import os
+import sys
 import uuid
 from pathlib import Path
 
@@ -10,6 +11,8 @@ from fastapi.testclient import TestClient
 ROOT = Path(__file__).resolve().parents[2]
 ANALYZER_PATH = ROOT / "services" / "pattern-analyzer" / "app.py"
 API_GATEWAY_PATH = ROOT / "services" / "api-gateway" / "app.py"
+# Both services import the shared downstream module their Dockerfiles copy in
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
 
 
 def load_module(path: Path, name: str):
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
-import os, json
-from typing import List, Dict
+import asyncio
+import dataclasses
+import logging
+import os, json, time
+from typing import Any, List, Dict, Optional, Tuple
 
-import httpx
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+import psycopg
+from fastapi import FastAPI, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from psycopg_pool import AsyncConnectionPool
+from pydantic import AliasChoices, BaseModel, Field
 
-from service import RetrievalService, RetrievalConfig
+from downstream import DownstreamClient, http_limits_from_env
+from embedding_cache import QueryEmbeddingCache, normalize_query
+from graph_cache import GraphCache
+from metrics import OrgSizeBuckets, StatsCollector, observe_batch, observe_retrieval, seed_recall_summary
+from result_cache import RetrievalResultCache
+from service import AsyncRetrievalService, RetrievalConfig, configure_async_connection
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("retrieval")
 
 app = FastAPI(title="Continuuai Retrieval", version="0.3.0")
 
 DB = os.environ["DATABASE_URL"]
 EMBEDDING_URL = os.environ.get("EMBEDDING_URL", "http://embedding:8080")
+EMBEDDING_TIMEOUT_S = float(os.environ.get("EMBEDDING_TIMEOUT_S", "30"))
 
 # Initialize retrieval service with config
 bonus_map_env = os.environ.get("GRAPH_BONUS_MAP")
@@ -27,6 +41,9 @@ cfg = RetrievalConfig(
     seed_k=int(os.environ.get("SEED_K", "40")),
     hop_depth=int(os.environ.get("HOP_DEPTH", "2")),
     hop_fanout=int(os.environ.get("HOP_FANOUT", "80")),
+    expand_mode=os.environ.get("EXPAND_MODE", "iterative"),
+    expand_max_nodes=int(os.environ.get("EXPAND_MAX_NODES", "2000")),
+    hop_decay=float(os.environ.get("HOP_DECAY", "1.0")),
     final_k=int(os.environ.get("FINAL_K", "12")),
     alpha_vec=float(os.environ.get("ALPHA_VEC", "0.55")),
     beta_bm25=float(os.environ.get("BETA_BM25", "0.25")),
@@ -38,20 +55,138 @@ cfg = RetrievalConfig(
     mmr_lambda=float(os.environ.get("MMR_LAMBDA", "0.7")),
     mmr_pool=int(os.environ.get("MMR_POOL", "100")),
 
+    seed_mode=os.environ.get("SEED_MODE", "fused"),
+    seed_rrf_k=int(os.environ.get("SEED_RRF_K", "60")),
+    acl_seed_mode=os.environ.get("ACL_SEED_MODE", "post"),
+    acl_overfetch=int(os.environ.get("ACL_OVERFETCH", "4")),
+    acl_overfetch_max=int(os.environ.get("ACL_OVERFETCH_MAX", "64")),
+
     bonus_decision=float(os.environ.get("GRAPH_BONUS_DECISION", "1.2")),
     bonus_outcome=float(os.environ.get("GRAPH_BONUS_OUTCOME", "1.1")),
     bonus_assumption=float(os.environ.get("GRAPH_BONUS_ASSUMPTION", "1.05")),
     bonus_map=bonus_map,
 )
-retrieval_svc = RetrievalService(dsn=DB, cfg=cfg)
 
-class RetrievalRequest(BaseModel):
+# Server-side caps on per-request overrides; larger requested values are clamped
+# (reported in debug.overrides.clamped)
+OVERRIDE_CAPS: Dict[str, int] = {
+    "seed_k": int(os.environ.get("MAX_SEED_K", "200")),
+    "hop_depth": int(os.environ.get("MAX_HOP_DEPTH", "4")),
+    "hop_fanout": int(os.environ.get("MAX_HOP_FANOUT", "400")),
+    "final_k": int(os.environ.get("MAX_FINAL_K", "50")),
+    "mmr_pool": int(os.environ.get("MAX_MMR_POOL", "500")),
+}
+# Most queries accepted by one /v1/retrieve/batch call
+RETRIEVE_BATCH_MAX = int(os.environ.get("RETRIEVE_BATCH_MAX", "100"))
+OVERRIDE_FIELDS: Tuple[str, ...] = (
+    "seed_k", "hop_depth", "hop_fanout", "final_k",
+    "alpha_vec", "beta_bm25", "gamma_graph", "delta_recency", "recency_halflife_days",
+    "use_mmr", "mmr_lambda", "mmr_pool",
+)
+
+# Connection pool shared across requests (DB_POOL_ENABLED=false falls back to connect-per-query)
+DB_POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "true").lower() in ("1","true","yes")
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+db_pool: AsyncConnectionPool | None = None
+if DB_POOL_ENABLED:
+    db_pool = AsyncConnectionPool(
+        DB,
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        timeout=DB_POOL_TIMEOUT,
+        check=AsyncConnectionPool.check_connection,  # health check on checkout
+        configure=configure_async_connection,  # pgvector adapters, once per connection
+        name="retrieval",
+        open=False,
+    )
+
+# In-process CSR adjacency cache (used when EXPAND_MODE=csr), invalidated by the
+# graph deriver's NOTIFY graph_changed (delta refresh from graph_edge.updated_at) and
+# NOTIFY graph_edge_removed from the graph_edge triggers (full rebuild, migration 0019)
+graph_cache = GraphCache(
+    refresh_interval=float(os.environ.get("GRAPH_CACHE_REFRESH_S", "30")),
+    full_rebuild_interval=float(os.environ.get("GRAPH_CACHE_REBUILD_S", "600")),
+    max_orgs=int(os.environ.get("GRAPH_CACHE_MAX_ORGS", "64")),
+)
+
+retrieval_svc = AsyncRetrievalService(dsn=DB, cfg=cfg, pool=db_pool, graph_cache=graph_cache)
+
+# Query text -> embedding cache keyed by (normalized text, model, version); the shared
+# Postgres tier (QUERY_EMBED_CACHE_SHARED) needs the pool and migration 0014
+QUERY_EMBED_CACHE_ENABLED = os.environ.get("QUERY_EMBED_CACHE_ENABLED", "true").lower() in ("1","true","yes")
+QUERY_EMBED_CACHE_SHARED = os.environ.get("QUERY_EMBED_CACHE_SHARED", "false").lower() in ("1","true","yes")
+embedding_cache = QueryEmbeddingCache(
+    model_name=os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+    model_version=os.environ.get("EMBEDDING_VERSION", "v1"),
+    ttl_s=float(os.environ.get("QUERY_EMBED_CACHE_TTL_S", "3600")),
+    max_bytes=int(float(os.environ.get("QUERY_EMBED_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    pool=db_pool if QUERY_EMBED_CACHE_SHARED else None,
+) if QUERY_EMBED_CACHE_ENABLED else None
+
+# Full result cache keyed by (org, ACL fingerprint, normalized query, config, org data
+# generation); needs migration 0015 (org_data_generation), otherwise every query runs
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "true").lower() in ("1","true","yes")
+result_cache = RetrievalResultCache(
+    ttl_s=float(os.environ.get("RESULT_CACHE_TTL_S", "300")),
+    max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(float(os.environ.get("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024),
+) if RESULT_CACHE_ENABLED else None
+
+# Keep-alive pool to the embedding service, shared by all requests
+# (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, ...)
+embedding_client = DownstreamClient(
+    "embedding", EMBEDDING_URL, timeout=EMBEDDING_TIMEOUT_S,
+    **http_limits_from_env(max_connections=100, max_keepalive=20),
+)
+
+# Prometheus: per-stage histograms labeled by org size bucket (span count, refreshed in
+# the background every ORG_SIZE_TTL_S) plus cache / pool / HTTP client stats at scrape time
+org_sizes = OrgSizeBuckets(retrieval_svc.org_span_count, ttl_s=float(os.environ.get("ORG_SIZE_TTL_S", "600")))
+REGISTRY.register(StatsCollector({
+    "result_cache": lambda: result_cache.stats() if result_cache is not None else None,
+    "embedding_cache": lambda: embedding_cache.stats() if embedding_cache is not None else None,
+    "db_pool": lambda: db_pool.get_stats() if db_pool is not None else None,
+    "embedding_http": embedding_client.stats,
+    "graph_cache": graph_cache.stats,
+}))
+
+_background_tasks: List[asyncio.Task] = []
+
+class RetrievalOverrides(BaseModel):
+    # Optional per-request overrides of the service RetrievalConfig (unset = service default)
+    seed_k: Optional[int] = Field(None, ge=1)
+    hop_depth: Optional[int] = Field(None, ge=0)
+    hop_fanout: Optional[int] = Field(None, ge=1)
+    final_k: Optional[int] = Field(None, ge=1)
+    alpha_vec: Optional[float] = Field(None, ge=0, le=1)
+    beta_bm25: Optional[float] = Field(None, ge=0, le=1)
+    gamma_graph: Optional[float] = Field(None, ge=0, le=1)
+    delta_recency: Optional[float] = Field(None, ge=0, le=1)
+    recency_halflife_days: Optional[float] = Field(None, gt=0)
+    use_mmr: Optional[bool] = None
+    mmr_lambda: Optional[float] = Field(None, ge=0, le=1)
+    mmr_pool: Optional[int] = Field(None, ge=1, validation_alias=AliasChoices("mmr_pool", "mmr_top_before"))
+
+class RetrievalRequest(RetrievalOverrides):
     org_id: str
     principal_id: str
     mode: str = Field(..., pattern="^(recall|reflection|projection)$")
     query_text: str
     scopes: List[str] = []
 
+class RetrievalBatchRequest(RetrievalOverrides):
+    """Many queries for one principal; overrides apply to every query."""
+    org_id: str
+    principal_id: str
+    mode: str = Field(..., pattern="^(recall|reflection|projection)$")
+    query_texts: List[str] = Field(..., min_length=1, max_length=RETRIEVE_BATCH_MAX)
+    scopes: List[str] = []
+
 class EvidenceSpan(BaseModel):
     id: str
     artifact_id: str
@@ -67,35 +202,281 @@ class RetrievalResponse(BaseModel):
     results: List[dict]
     debug: dict
 
+class RetrievalBatchResponse(BaseModel):
+    org_id: str
+    top_k: int
+    results: List[RetrievalResponse]  # one per query_texts entry, same order
+    debug: dict
 
-async def get_query_embedding(query_text: str) -> List[float] | None:
-    """Get embedding for query text from embedding service."""
+
+async def fetch_query_embeddings(query_texts: List[str]) -> List[List[float]] | None:
+    """Get embeddings for query texts from embedding service, in one call."""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{EMBEDDING_URL}/v1/embed",
-                json={"texts": [query_text]}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return data["embeddings"][0]
-            else:
-                return None
+        response = await embedding_client.post("/v1/embed", json={"texts": query_texts})
+        if response.status_code == 200:
+            data = response.json()
+            return data["embeddings"]
+        else:
+            return None
     except Exception as e:
-        print(f"Embedding service error: {e}")
+        logger.error(f"Embedding service error: {e}")
         return None
 
 
+async def fetch_query_embedding(query_text: str) -> List[float] | None:
+    """Get embedding for query text from embedding service."""
+    embeddings = await fetch_query_embeddings([query_text])
+    return embeddings[0] if embeddings else None
+
+
+async def get_query_embedding(query_text: str) -> List[float] | None:
+    """Query embedding, served from the query-embedding cache when enabled."""
+    if embedding_cache is None:
+        return await fetch_query_embedding(query_text)
+    return await embedding_cache.get_or_compute(
+        query_text,
+        fetch_query_embedding,
+        use_shared=retrieval_svc.capabilities.has_table("query_embedding_cache"),
+    )
+
+
+async def get_query_embeddings(query_texts: List[str]) -> List[List[float] | None]:
+    """Query embeddings for a batch: cache hits first, one embedding call for the rest."""
+    if embedding_cache is None:
+        embeddings = await fetch_query_embeddings(query_texts)
+        return embeddings if embeddings is not None else [None] * len(query_texts)
+    return await embedding_cache.get_or_compute_many(
+        query_texts,
+        fetch_query_embeddings,
+        use_shared=retrieval_svc.capabilities.has_table("query_embedding_cache"),
+    )
+
+
+def request_config(req: RetrievalOverrides) -> Tuple[RetrievalConfig, Dict[str, Any]]:
+    """Service config with the request's overrides applied and capped, plus a debug summary."""
+    applied: Dict[str, Any] = {}
+    clamped: List[str] = []
+    for name in OVERRIDE_FIELDS:
+        value = getattr(req, name)
+        if value is None:
+            continue
+        cap = OVERRIDE_CAPS.get(name)
+        if cap is not None and value > cap:
+            value = cap
+            clamped.append(name)
+        applied[name] = value
+    if not applied:
+        return cfg, {}
+    return dataclasses.replace(cfg, **applied), {"applied": applied, "clamped": clamped}
+
+
+async def cached_retrieve(req: RetrievalRequest) -> dict:
+    """
+    Embed + run the pipeline through the result cache. The cache probe (visible ACLs +
+    org data generation) is one round trip; a hit skips the query embedding as well,
+    and on a miss the probed ACL set is reused by the pipeline.
+    """
+    req_cfg, overrides = request_config(req)
+
+    async def run(visible=None) -> dict:
+        query_embedding = await get_query_embedding(req.query_text)
+        if not query_embedding:
+            raise HTTPException(status_code=500, detail="Failed to get query embedding")
+        return await retrieval_svc.retrieve(
+            org_id=req.org_id,
+            query_text=req.query_text,
+            query_embedding=query_embedding,
+            user_id=req.principal_id,
+            acl_groups=req.scopes,
+            visible=visible,
+            cfg=req_cfg,
+        )
+
+    probe = await retrieval_svc.cache_probe(req.org_id, req.principal_id) if result_cache is not None else None
+    if probe is None:
+        result = await run()
+        result["debug"]["cache"] = {"status": "disabled" if result_cache is None else "unavailable"}
+        result["debug"]["overrides"] = overrides
+        return result
+
+    visible_acls, acl_source, generation = probe
+    key = result_cache.key(
+        req.org_id, visible_acls, req.query_text, req.scopes, req_cfg.fingerprint(), generation
+    )
+    result, status, age_s = await result_cache.get_or_compute(key, lambda: run((visible_acls, acl_source)))
+    # Cached entries are shared between requests: copy before personalizing
+    return {
+        **result,
+        "query": req.query_text,
+        "debug": {
+            **result["debug"],
+            "cache": {"status": status, "key": key[:16], "generation": generation, "age_s": round(age_s, 3)},
+            "overrides": overrides,
+        },
+    }
+
+
+async def cached_retrieve_batch(req: RetrievalBatchRequest) -> dict:
+    """
+    cached_retrieve for many queries: queries that normalize alike share one entry,
+    and after one cache probe for the principal hits are served, keys another request
+    is computing are awaited, and the remaining misses are embedded in one call and
+    run through one batched pipeline.
+    """
+    req_cfg, overrides = request_config(req)
+    texts = req.query_texts
+    groups: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        groups.setdefault(normalize_query(text), []).append(i)
+    firsts = [indices[0] for indices in groups.values()]
+    timings = None
+    pipeline_queries = 0
+
+    async def run(indices: List[int], visible=None) -> List[dict]:
+        nonlocal timings, pipeline_queries
+        queries = [texts[firsts[g]] for g in indices]
+        embeddings = await get_query_embeddings(queries)
+        if any(not e for e in embeddings):
+            raise HTTPException(status_code=500, detail="Failed to get query embedding")
+        batch = await retrieval_svc.retrieve_batch(
+            org_id=req.org_id,
+            queries=list(zip(queries, embeddings)),
+            user_id=req.principal_id,
+            acl_groups=req.scopes,
+            visible=visible,
+            cfg=req_cfg,
+        )
+        timings = batch["timings"]
+        pipeline_queries += len(indices)
+        return batch["results"]
+
+    probe = await retrieval_svc.cache_probe(req.org_id, req.principal_id) if result_cache is not None else None
+    if probe is None:
+        cache = {"status": "disabled" if result_cache is None else "unavailable"}
+        outcomes = [(result, cache) for result in await run(list(range(len(firsts))))]
+    else:
+        visible_acls, acl_source, generation = probe
+        keys = [
+            result_cache.key(req.org_id, visible_acls, texts[i], req.scopes, req_cfg.fingerprint(), generation)
+            for i in firsts
+        ]
+        cached = await result_cache.get_or_compute_many(keys, lambda indices: run(indices, (visible_acls, acl_source)))
+        outcomes = [
+            (result, {"status": status, "key": key[:16], "generation": generation, "age_s": round(age_s, 3)})
+            for key, (result, status, age_s) in zip(keys, cached)
+        ]
+
+    # Cached entries are shared between requests: copy before personalizing
+    results: List[dict | None] = [None] * len(texts)
+    for indices, (result, cache) in zip(groups.values(), outcomes):
+        for i in indices:
+            results[i] = {
+                **result,
+                "query": texts[i],
+                "debug": {**result["debug"], "cache": cache, "overrides": overrides},
+            }
+
+    return {
+        "org_id": req.org_id,
+        "top_k": req_cfg.final_k,
+        "results": results,
+        "debug": {
+            "queries": len(texts),
+            "cache_hits": sum(1 for r in results if r["debug"]["cache"]["status"] == "hit"),
+            "pipeline_queries": pipeline_queries,
+            "timings": timings,
+            "overrides": overrides,
+        },
+    }
+
+
+async def listen_db_events():
+    """
+    React to database notifications:
+      graph_changed (payload org_id, from the graph deriver) -> mark cached adjacency dirty
+      graph_edge_removed (payload org_id, from graph_edge triggers) -> rebuild cached adjacency
+      schema_migrated (from the migrate runner) -> re-detect schema capabilities
+    """
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(DB, autocommit=True) as conn:
+                await conn.execute("LISTEN graph_changed")
+                await conn.execute("LISTEN graph_edge_removed")
+                await conn.execute("LISTEN schema_migrated")
+                # Notifications may have been missed while disconnected
+                graph_cache.mark_dirty(rebuild=True)
+                retrieval_svc.capabilities.invalidate()
+                async for note in conn.notifies():
+                    if note.channel == "graph_changed":
+                        graph_cache.mark_dirty(note.payload or None)
+                    elif note.channel == "graph_edge_removed":
+                        graph_cache.mark_dirty(note.payload or None, rebuild=True)
+                    elif note.channel == "schema_migrated":
+                        retrieval_svc.capabilities.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"db event listener error: {e}")
+            await asyncio.sleep(5)
+
+
+@app.on_event("startup")
+async def startup():
+    if db_pool is not None:
+        await db_pool.open()
+    try:
+        await retrieval_svc.detect_capabilities()
+    except Exception as e:
+        # Detection is retried lazily on the first query
+        logger.warning(f"schema capability detection failed: {e}")
+    _background_tasks.append(asyncio.create_task(listen_db_events()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    await embedding_client.aclose()
+    if db_pool is not None:
+        await db_pool.close()
+
+
+def _require_debug_access(admin_token: str | None) -> None:
+    """
+    Gate debug endpoints behind ADMIN_DEBUG_TOKEN.
+    SECURITY: Only enable in non-prod or with admin_token verification.
+    """
+    expected_token = os.environ.get("ADMIN_DEBUG_TOKEN")
+    
+    # If token is required but not provided or wrong, deny
+    if expected_token and admin_token != expected_token:
+        raise HTTPException(status_code=403, detail="Forbidden: invalid or missing admin_token")
+    
+    # If no token configured, allow (for local dev only—warn in prod)
+    if not expected_token:
+        env_name = os.environ.get("ENV", "dev")
+        if env_name not in ("dev", "local", "development"):
+            raise HTTPException(status_code=403, detail="Forbidden: ADMIN_DEBUG_TOKEN not configured")
+
+
 @app.get("/v1/health")
 async def health():
     return {"ok": True}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/v1/debug/weights")
 async def debug_weights():
     return {
         "seed_k": cfg.seed_k,
         "hop_depth": cfg.hop_depth,
         "hop_fanout": cfg.hop_fanout,
+        "expand_mode": cfg.expand_mode,
+        "expand_max_nodes": cfg.expand_max_nodes,
+        "hop_decay": cfg.hop_decay,
         "final_k": cfg.final_k,
         "alpha_vec": cfg.alpha_vec,
         "beta_bm25": cfg.beta_bm25,
@@ -105,6 +486,12 @@ async def debug_weights():
         "use_mmr": cfg.use_mmr,
         "mmr_lambda": cfg.mmr_lambda,
         "mmr_pool": cfg.mmr_pool,
+        "seed_mode": cfg.seed_mode,
+        "seed_rrf_k": cfg.seed_rrf_k,
+        "acl_seed_mode": cfg.acl_seed_mode,
+        "acl_overfetch": cfg.acl_overfetch,
+        "acl_overfetch_max": cfg.acl_overfetch_max,
+        "override_caps": OVERRIDE_CAPS,
         "graph_bonus_map": cfg.bonus_map or {
             "decision": cfg.bonus_decision,
             "outcome": cfg.bonus_outcome,
@@ -118,17 +505,7 @@ async def debug_sql(admin_token: str | None = None):
     Expose active SQL fragments for observability.
     SECURITY: Only enable in non-prod or with admin_token verification.
     """
-    expected_token = os.environ.get("ADMIN_DEBUG_TOKEN")
-    
-    # If token is required but not provided or wrong, deny
-    if expected_token and admin_token != expected_token:
-        raise HTTPException(status_code=403, detail="Forbidden: invalid or missing admin_token")
-    
-    # If no token configured, allow (for local dev only—warn in prod)
-    if not expected_token:
-        env_name = os.environ.get("ENV", "dev")
-        if env_name not in ("dev", "local", "development"):
-            raise HTTPException(status_code=403, detail="Forbidden: ADMIN_DEBUG_TOKEN not configured")
+    _require_debug_access(admin_token)
     
     return {
         "vector_search": "SELECT es.evidence_span_id, es.content_text, es.embedding <=> %s::vector AS distance FROM evidence_span es WHERE es.org_id = %s ORDER BY distance LIMIT %s",
@@ -140,6 +517,66 @@ async def debug_sql(admin_token: str | None = None):
         "note": "Placeholders (%s) show parameterized positions; actual queries use psycopg3 parameter binding"
     }
 
+@app.get("/v1/debug/pool")
+async def debug_pool(admin_token: str | None = None):
+    """Connection pool configuration and live stats (pool_size, pool_available, requests_waiting, ...)."""
+    _require_debug_access(admin_token)
+
+    if db_pool is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "name": db_pool.name,
+        "min_size": db_pool.min_size,
+        "max_size": db_pool.max_size,
+        "max_lifetime": db_pool.max_lifetime,
+        "timeout": db_pool.timeout,
+        "stats": db_pool.get_stats(),
+    }
+
+@app.get("/v1/debug/http")
+async def debug_http(admin_token: str | None = None):
+    """Downstream HTTP client pool limits and usage (requests, errors, in-flight, open connections)."""
+    _require_debug_access(admin_token)
+    return {"embedding": embedding_client.stats()}
+
+@app.get("/v1/debug/capabilities")
+async def debug_capabilities(admin_token: str | None = None):
+    """Optional schema features detected at startup / after the last migration."""
+    _require_debug_access(admin_token)
+    return retrieval_svc.capabilities.stats()
+
+@app.get("/v1/debug/acl_seed")
+async def debug_acl_seed(admin_token: str | None = None):
+    """
+    Seed recall loss to ACLs: share of seed_k vector slots not filled by visible spans.
+    Totals of the retrieval_seed_recall_loss histogram (see /metrics for the distribution).
+    """
+    _require_debug_access(admin_token)
+    return {"mode": cfg.acl_seed_mode, **seed_recall_summary()}
+
+@app.get("/v1/debug/embedding_cache")
+async def debug_embedding_cache(admin_token: str | None = None):
+    """Query-embedding cache size, hit/miss counters and configuration."""
+    _require_debug_access(admin_token)
+    if embedding_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **embedding_cache.stats()}
+
+@app.get("/v1/debug/result_cache")
+async def debug_result_cache(admin_token: str | None = None):
+    """Result cache size, hit/miss/coalesced counters and configuration."""
+    _require_debug_access(admin_token)
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **result_cache.stats()}
+
+@app.get("/v1/debug/graph_cache")
+async def debug_graph_cache(admin_token: str | None = None):
+    """Per-org CSR adjacency sizes, ages and refresh counts."""
+    _require_debug_access(admin_token)
+    return {"enabled": cfg.expand_mode == "csr", **graph_cache.stats()}
+
 @app.post("/v1/retrieve", response_model=RetrievalResponse)
 async def retrieve(req: RetrievalRequest) -> RetrievalResponse:
     """
@@ -153,19 +590,22 @@ async def retrieve(req: RetrievalRequest) -> RetrievalResponse:
     7. Return top-k
     """
     
-    # Get query embedding for semantic search
-    query_embedding = await get_query_embedding(req.query_text)
-    
-    if not query_embedding:
-        raise HTTPException(status_code=500, detail="Failed to get query embedding")
-    
-    # Use the graph-neighborhood retrieval service
-    result = retrieval_svc.retrieve(
-        org_id=req.org_id,
-        query_text=req.query_text,
-        query_embedding=query_embedding,
-        user_id=req.principal_id,
-        acl_groups=req.scopes
-    )
+    started = time.perf_counter()
+    # Query embedding + graph-neighborhood retrieval, served from the result cache when possible
+    result = await cached_retrieve(req)
+    observe_retrieval(result["debug"], org_sizes.label(req.org_id), time.perf_counter() - started)
     
     return RetrievalResponse(**result)
+
+@app.post("/v1/retrieve/batch", response_model=RetrievalBatchResponse)
+async def retrieve_batch(req: RetrievalBatchRequest) -> RetrievalBatchResponse:
+    """
+    Same retrieval as /v1/retrieve for up to RETRIEVE_BATCH_MAX queries of one principal:
+    one embedding call for all uncached queries, and each pipeline stage run once for
+    the whole batch (set-based SQL over every query), so round trips stay flat in N.
+    """
+    started = time.perf_counter()
+    batch = await cached_retrieve_batch(req)
+    observe_batch(batch, org_sizes.label(req.org_id), time.perf_counter() - started)
+
+    return RetrievalBatchResponse(**batch)
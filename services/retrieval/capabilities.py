@@ -0,0 +1,101 @@
+"""Schema capabilities registry: optional tables and pgvector features, detected once and refreshed on migration."""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Generator, List, Optional, Sequence, Tuple
+
+# Optional relations whose presence selects a code path in the pipeline
+OPTIONAL_TABLES: Tuple[str, ...] = (
+    "span_node",
+    "principal_acl_visibility",
+    "query_embedding_cache",
+    "org_data_generation",
+    "evidence_span_text",
+)
+
+
+@dataclass
+class SchemaCapabilities:
+    """
+    Detected with a single catalog lookup on first use (or at startup), then served
+    from memory. invalidate() -- wired to NOTIFY schema_migrated from the migrate
+    runner -- makes the next pipeline run re-detect.
+    """
+    tables: FrozenSet[str] = frozenset()
+    vector_version: Optional[Tuple[int, ...]] = None
+    detected_at: Optional[float] = None
+    detections: int = 0
+    _stale: bool = True
+    _generation: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def has_table(self, name: str) -> bool:
+        return name in self.tables
+
+    @property
+    def has_span_node(self) -> bool:
+        return self.has_table("span_node")
+
+    @property
+    def has_acl_visibility(self) -> bool:
+        return self.has_table("principal_acl_visibility")
+
+    @property
+    def has_data_generation(self) -> bool:
+        return self.has_table("org_data_generation")
+
+    @property
+    def has_span_text(self) -> bool:
+        return self.has_table("evidence_span_text")
+
+    @property
+    def supports_iterative_scan(self) -> bool:
+        """pgvector >= 0.8 can keep scanning an index until filtered LIMIT rows are found."""
+        return self.vector_version is not None and self.vector_version >= (0, 8, 0)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stale = True
+            self._generation += 1
+
+    def ensure(self) -> Generator[Tuple[str, Sequence[Any]], List[Dict[str, Any]], "SchemaCapabilities"]:
+        """Pipeline step: detect if stale, otherwise return immediately without a round trip."""
+        if not self._stale:
+            return self
+        generation = self._generation
+        rows = yield (
+            """
+            SELECT
+                ARRAY(
+                    SELECT c.relname::text
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = current_schema()
+                      AND c.relkind IN ('r', 'p', 'v', 'm')
+                      AND c.relname = ANY(%s)
+                ) AS tables,
+                (SELECT extversion FROM pg_extension WHERE extname = 'vector') AS vector_version
+            """,
+            (list(OPTIONAL_TABLES),),
+        )
+        version = rows[0]["vector_version"]
+        with self._lock:
+            self.tables = frozenset(rows[0]["tables"])
+            self.vector_version = tuple(int(p) for p in version.split(".") if p.isdigit()) if version else None
+            self.detected_at = time.time()
+            self.detections += 1
+            # An invalidate() that raced with this lookup keeps the registry stale
+            self._stale = self._generation != generation
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": {name: name in self.tables for name in OPTIONAL_TABLES},
+            "vector_version": ".".join(map(str, self.vector_version)) if self.vector_version else None,
+            "iterative_scan": self.supports_iterative_scan,
+            "detected_at": self.detected_at,
+            "detections": self.detections,
+            "stale": self._stale,
+        }
@@ -0,0 +1,241 @@
+"""Query-embedding cache: in-process LRU + TTL, optionally backed by a shared Postgres table."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg_pool import AsyncConnectionPool
+
+from service import vector_to_array
+
+logger = logging.getLogger("retrieval.embedding_cache")
+
+# Prune expired rows from the shared table once per this many writes
+_PRUNE_EVERY = 500
+
+
+def normalize_query(text: str) -> str:
+    """NFKC, collapse whitespace, trim: queries differing only in spacing share an entry."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+@dataclass
+class QueryEmbeddingCache:
+    """
+    Query text -> embedding, keyed by (normalized text, model name, model version) so a
+    model upgrade never serves stale vectors. Entries are float32 arrays; the in-process
+    tier is bounded by max_bytes (LRU eviction) and ttl_s. With a pool, misses also
+    consult and fill query_embedding_cache so replicas share work.
+    """
+    model_name: str
+    model_version: str
+    ttl_s: float = 3600.0
+    max_bytes: int = 64 * 1024 * 1024
+    pool: Optional[AsyncConnectionPool] = None
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    _entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = field(default_factory=OrderedDict)
+    _bytes: int = 0
+    _writes: int = 0
+
+    def key(self, text: str) -> str:
+        raw = f"{self.model_name}\x00{self.model_version}\x00{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self,
+        text: str,
+        compute: Callable[[str], Awaitable[Optional[List[float]]]],
+        use_shared: bool = True,
+    ) -> Optional[List[float]]:
+        key = self.key(text)
+        vec = self._get_local(key)
+        if vec is not None:
+            self.hits += 1
+            return vec.tolist()
+
+        if use_shared and self.pool is not None:
+            vec = await self._get_shared(key)
+            if vec is not None:
+                self.shared_hits += 1
+                self._put_local(key, vec)
+                return vec.tolist()
+
+        self.misses += 1
+        embedding = await compute(text)
+        if embedding is None:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        self._put_local(key, vec)
+        if use_shared and self.pool is not None:
+            await self._put_shared([(key, vec)])
+        # The float32 values hits will return, so a query scores the same on every call
+        return vec.tolist()
+
+    async def get_or_compute_many(
+        self,
+        texts: Sequence[str],
+        compute_many: Callable[[List[str]], Awaitable[Optional[List[List[float]]]]],
+        use_shared: bool = True,
+    ) -> List[Optional[List[float]]]:
+        """
+        get_or_compute for many texts: local hits first, then one shared-tier lookup and
+        one compute_many call for the rest (texts normalizing alike are embedded once).
+        """
+        keys = [self.key(text) for text in texts]
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            vec = self._get_local(key)
+            if vec is not None:
+                self.hits += 1
+                out[i] = vec.tolist()
+            else:
+                missing.append(i)
+
+        if missing and use_shared and self.pool is not None:
+            found = await self._get_shared_many(list({keys[i] for i in missing}))
+            still_missing = []
+            for i in missing:
+                vec = found.get(keys[i])
+                if vec is None:
+                    still_missing.append(i)
+                    continue
+                self.shared_hits += 1
+                self._put_local(keys[i], vec)
+                out[i] = vec.tolist()
+            missing = still_missing
+        if not missing:
+            return out
+
+        first_text: Dict[str, str] = {}
+        for i in missing:
+            first_text.setdefault(keys[i], texts[i])
+        self.misses += len(first_text)
+        embeddings = await compute_many(list(first_text.values()))
+        if embeddings is None:
+            return out
+        vecs = [(key, np.asarray(embedding, dtype=np.float32)) for key, embedding in zip(first_text, embeddings)]
+        for key, vec in vecs:
+            self._put_local(key, vec)
+        if use_shared and self.pool is not None:
+            await self._put_shared(vecs)
+        computed = {key: vec.tolist() for key, vec in vecs}
+        for i in missing:
+            out[i] = computed[keys[i]]
+        return out
+
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vec = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return vec
+
+    def _put_local(self, key: str, vec: np.ndarray) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, vec)
+        self._bytes += vec.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, vec = self._entries.pop(key)
+        self._bytes -= vec.nbytes
+
+    async def _get_shared(self, key: str) -> Optional[np.ndarray]:
+        try:
+            async with self.pool.connection() as conn:
+                cur = await conn.execute(
+                    """
+                    SELECT embedding
+                    FROM query_embedding_cache
+                    WHERE cache_key = %s
+                      AND created_at > now() - make_interval(secs => %s)
+                    """,
+                    (key, self.ttl_s),
+                    binary=True,
+                )
+                row = await cur.fetchone()
+        except Exception as e:
+            logger.warning(f"query embedding cache read error: {e}")
+            return None
+        return vector_to_array(row[0]) if row else None
+
+    async def _get_shared_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        try:
+            async with self.pool.connection() as conn:
+                cur = await conn.execute(
+                    """
+                    SELECT cache_key, embedding
+                    FROM query_embedding_cache
+                    WHERE cache_key = ANY(%s)
+                      AND created_at > now() - make_interval(secs => %s)
+                    """,
+                    (keys, self.ttl_s),
+                    binary=True,
+                )
+                rows = await cur.fetchall()
+        except Exception as e:
+            logger.warning(f"query embedding cache read error: {e}")
+            return {}
+        return {row[0]: vector_to_array(row[1]) for row in rows}
+
+    async def _put_shared(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        writes_before = self._writes
+        self._writes += len(items)
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.executemany(
+                        """
+                        INSERT INTO query_embedding_cache (cache_key, model_name, model_version, embedding)
+                        VALUES (%s, %s, %s, %s::vector)
+                        ON CONFLICT (cache_key) DO UPDATE
+                          SET embedding = EXCLUDED.embedding, created_at = now()
+                        """,
+                        [
+                            (key, self.model_name, self.model_version, "[" + ",".join(map(str, vec.tolist())) + "]")
+                            for key, vec in items
+                        ],
+                    )
+                if self._writes // _PRUNE_EVERY > writes_before // _PRUNE_EVERY:
+                    await conn.execute(
+                        "DELETE FROM query_embedding_cache WHERE created_at < now() - make_interval(secs => %s)",
+                        (self.ttl_s,),
+                    )
+        except Exception as e:
+            logger.warning(f"query embedding cache write error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "model": {"name": self.model_name, "version": self.model_version},
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "shared_store": self.pool is not None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,299 @@
+"""In-process CSR adjacency index over graph_edge, one per org, for graph expansion without SQL."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EdgeKey = Tuple[str, str, str]  # (src_node_id, dst_node_id, edge_type)
+Step = Generator[Tuple[str, Sequence[Any]], List[Dict[str, Any]], "CsrAdjacency"]
+
+
+@dataclass
+class CsrAdjacency:
+    """
+    Undirected adjacency in compressed sparse row form.
+    Row i holds the neighbours of node_ids[i], strongest edge weight first and
+    node_id as tie-break (node indices follow sorted node_id order), with one
+    entry per neighbour carrying its strongest edge.
+    """
+    node_ids: List[str]
+    index: Dict[str, int]
+    indptr: np.ndarray      # int64, len(node_ids) + 1
+    indices: np.ndarray     # int32 neighbour indices
+    weights: np.ndarray     # float32 edge weights
+    edge_types: np.ndarray  # int16 codes into edge_type_names
+    edge_type_names: List[str]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def entry_count(self) -> int:
+        return int(self.indices.shape[0])
+
+    @classmethod
+    def build(cls, edges: Dict[EdgeKey, float]) -> "CsrAdjacency":
+        node_ids = sorted({n for (src, dst, _t) in edges for n in (src, dst)})
+        index = {nid: i for i, nid in enumerate(node_ids)}
+        type_names = sorted({t for (_s, _d, t) in edges})
+        type_code = {t: i for i, t in enumerate(type_names)}
+
+        m = len(edges)
+        src = np.fromiter((index[k[0]] for k in edges), dtype=np.int64, count=m)
+        dst = np.fromiter((index[k[1]] for k in edges), dtype=np.int64, count=m)
+        wt = np.fromiter(edges.values(), dtype=np.float32, count=m)
+        et = np.fromiter((type_code[k[2]] for k in edges), dtype=np.int16, count=m)
+
+        # Both directions: expansion follows outgoing and incoming edges alike
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src])
+        w = np.concatenate([wt, wt])
+        t = np.concatenate([et, et])
+
+        # Keep the strongest edge per (row, col)
+        order = np.lexsort((-w, cols, rows))
+        rows, cols, w, t = rows[order], cols[order], w[order], t[order]
+        keep = np.ones(rows.shape[0], dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, w, t = rows[keep], cols[keep], w[keep], t[keep]
+
+        # Row-major, weight desc, neighbour id asc
+        order = np.lexsort((cols, -w, rows))
+        rows, cols, w, t = rows[order], cols[order], w[order], t[order]
+
+        n = len(node_ids)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        if n:
+            np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(
+            node_ids=node_ids,
+            index=index,
+            indptr=indptr,
+            indices=cols.astype(np.int32),
+            weights=w,
+            edge_types=t,
+            edge_type_names=type_names,
+        )
+
+    def bfs(self, seed_node_ids: Sequence[str], depth: int, fanout: int, max_nodes: int) -> Dict[str, int]:
+        """
+        Breadth-first expansion taking at most `fanout` neighbours per node.
+        Returns node_id -> hop distance from the nearest seed, capped at max_nodes
+        in (hop, node_id) order, matching the recursive SQL walk.
+        """
+        hops: Dict[str, int] = {nid: 0 for nid in seed_node_ids}
+        n = self.node_count
+        frontier = np.array([self.index[nid] for nid in seed_node_ids if nid in self.index], dtype=np.int64)
+        if n == 0 or frontier.size == 0 or fanout <= 0:
+            return hops
+
+        visited = np.zeros(n, dtype=bool)
+        visited[frontier] = True
+        for hop in range(1, depth + 1):
+            starts = self.indptr[frontier]
+            ends = np.minimum(self.indptr[frontier + 1], starts + fanout)
+            slices = [self.indices[s:e] for s, e in zip(starts, ends) if e > s]
+            if not slices:
+                break
+            nxt = np.unique(np.concatenate(slices))
+            nxt = nxt[~visited[nxt]]
+            if nxt.size == 0:
+                break
+            visited[nxt] = True
+            for i in nxt:
+                hops[self.node_ids[i]] = hop
+            frontier = nxt.astype(np.int64)
+
+        if len(hops) > max_nodes:
+            kept = sorted(hops.items(), key=lambda kv: (kv[1], kv[0]))[: max(max_nodes, len(seed_node_ids))]
+            hops = dict(kept)
+        return hops
+
+
+@dataclass
+class _OrgGraph:
+    edges: Dict[EdgeKey, float]
+    csr: CsrAdjacency
+    watermark: Optional[datetime]
+    built_at: float
+    checked_at: float
+    built_mark: int     # mark sequence when the last full fetch started
+    checked_mark: int   # mark sequence when the last fetch (full or delta) started
+    refreshes: int = 0
+
+
+@dataclass
+class GraphCache:
+    """
+    Per-org CSR adjacency, refreshed incrementally from graph_edge.updated_at.
+    mark_dirty() (wired to the deriver's NOTIFY graph_changed) forces a delta fetch on
+    next use; mark_dirty(rebuild=True) (NOTIFY graph_edge_removed, sent by graph_edge
+    triggers on deletes and key changes) forces a full rebuild, as does the periodic
+    full_rebuild_interval. Marks are sequence-numbered, so one arriving while a fetch is
+    in flight still applies to the graph that fetch stores. ensure() coalesces
+    concurrent refreshes of one org for async callers.
+    """
+    refresh_interval: float = 30.0
+    full_rebuild_interval: float = 600.0
+    max_orgs: int = 64
+    full_rebuilds: int = 0
+    coalesced: int = 0
+    _graphs: "OrderedDict[str, _OrgGraph]" = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _mark_seq: int = 0
+    _dirty_marks: Dict[Optional[str], int] = field(default_factory=dict)    # org_id (None = all) -> last mark
+    _rebuild_marks: Dict[Optional[str], int] = field(default_factory=dict)
+    _inflight: Dict[str, asyncio.Event] = field(default_factory=dict)
+
+    def mark_dirty(self, org_id: Optional[str] = None, rebuild: bool = False) -> None:
+        with self._lock:
+            self._mark_seq += 1
+            self._dirty_marks[org_id] = self._mark_seq
+            if rebuild:
+                self._rebuild_marks[org_id] = self._mark_seq
+
+    def _last_mark(self, marks: Dict[Optional[str], int], org_id: str) -> int:
+        return max(marks.get(org_id, 0), marks.get(None, 0))
+
+    def _needs_rebuild(self, g: Optional[_OrgGraph], org_id: str, now: float) -> bool:
+        return (
+            g is None
+            or now - g.built_at > self.full_rebuild_interval
+            or self._last_mark(self._rebuild_marks, org_id) > g.built_mark
+        )
+
+    def _needs_delta(self, g: _OrgGraph, org_id: str, now: float) -> bool:
+        return now - g.checked_at > self.refresh_interval or self._last_mark(self._dirty_marks, org_id) > g.checked_mark
+
+    def needs_refresh(self, org_id: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            g = self._graphs.get(org_id)
+            return self._needs_rebuild(g, org_id, now) or self._needs_delta(g, org_id, now)
+
+    async def ensure(self, org_id: str, run: Callable[[Step], Awaitable[CsrAdjacency]]) -> None:
+        """
+        Refresh org_id's adjacency ahead of a pipeline run, sharing one fetch between
+        concurrent callers: followers wait for the leader's refresh instead of each
+        scanning graph_edge. The pipeline's expand step then finds it fresh (and
+        refreshes by itself if the leader failed).
+        """
+        flight = self._inflight.get(org_id)
+        if flight is not None:
+            self.coalesced += 1
+            await flight.wait()
+            return
+        if not self.needs_refresh(org_id):
+            return
+        flight = self._inflight[org_id] = asyncio.Event()
+        try:
+            await run(self.adjacency(org_id))
+        finally:
+            self._inflight.pop(org_id, None)
+            flight.set()
+
+    def adjacency(self, org_id: str) -> Step:
+        """Pipeline step returning a fresh-enough CsrAdjacency for org_id."""
+        now = time.monotonic()
+        with self._lock:
+            g = self._graphs.get(org_id)
+            if g is not None:
+                self._graphs.move_to_end(org_id)
+            rebuild = self._needs_rebuild(g, org_id, now)
+            started = self._mark_seq
+
+        if rebuild:
+            rows = yield (
+                """
+                SELECT src_node_id::text AS src, dst_node_id::text AS dst, edge_type, weight, updated_at
+                FROM graph_edge
+                WHERE org_id = %s
+                """,
+                (org_id,),
+            )
+            edges = {(r["src"], r["dst"], r["edge_type"]): float(r["weight"]) for r in rows}
+            g = _OrgGraph(
+                edges=edges,
+                csr=CsrAdjacency.build(edges),
+                watermark=max((r["updated_at"] for r in rows), default=None),
+                built_at=now,
+                checked_at=now,
+                built_mark=started,
+                checked_mark=started,
+            )
+            self.full_rebuilds += 1
+            self._store(org_id, g)
+            return g.csr
+
+        if self._needs_delta(g, org_id, now):
+            # >= so rows sharing the watermark timestamp are never skipped; merging is idempotent
+            rows = yield (
+                """
+                SELECT src_node_id::text AS src, dst_node_id::text AS dst, edge_type, weight, updated_at
+                FROM graph_edge
+                WHERE org_id = %s
+                  AND (%s::timestamptz IS NULL OR updated_at >= %s::timestamptz)
+                """,
+                (org_id, g.watermark, g.watermark),
+            )
+            changed = {(r["src"], r["dst"], r["edge_type"]): float(r["weight"]) for r in rows}
+            if any(g.edges.get(k) != v for k, v in changed.items()):
+                edges = {**g.edges, **changed}
+                stamps = [r["updated_at"] for r in rows if r["updated_at"] is not None]
+                if g.watermark is not None:
+                    stamps.append(g.watermark)
+                g = _OrgGraph(
+                    edges=edges,
+                    csr=CsrAdjacency.build(edges),
+                    watermark=max(stamps, default=None),
+                    built_at=g.built_at,
+                    checked_at=now,
+                    built_mark=g.built_mark,
+                    checked_mark=started,
+                    refreshes=g.refreshes + 1,
+                )
+                self._store(org_id, g)
+            else:
+                g.checked_at = now
+                g.checked_mark = started
+        return g.csr
+
+    def _store(self, org_id: str, g: _OrgGraph) -> None:
+        with self._lock:
+            self._graphs[org_id] = g
+            self._graphs.move_to_end(org_id)
+            while len(self._graphs) > self.max_orgs:
+                self._graphs.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "orgs": len(self._graphs),
+                "max_orgs": self.max_orgs,
+                "refresh_interval": self.refresh_interval,
+                "full_rebuild_interval": self.full_rebuild_interval,
+                "full_rebuilds": self.full_rebuilds,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+                "by_org": {
+                    org_id: {
+                        "nodes": g.csr.node_count,
+                        "edges": len(g.edges),
+                        "adjacency_entries": g.csr.entry_count,
+                        "age_s": round(now - g.built_at, 1),
+                        "incremental_refreshes": g.refreshes,
+                        "dirty": self._last_mark(self._dirty_marks, org_id) > g.checked_mark,
+                        "rebuild_pending": self._last_mark(self._rebuild_marks, org_id) > g.built_mark,
+                    }
+                    for org_id, g in self._graphs.items()
+                },
+            }
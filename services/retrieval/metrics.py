@@ -0,0 +1,174 @@
+"""Prometheus metrics for the retrieval service: per-stage latency, SQL round trips and rows, cache stats."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from prometheus_client import Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+
+logger = logging.getLogger("retrieval.metrics")
+
+STAGE_SECONDS = Histogram(
+    "retrieval_stage_seconds",
+    "Wall time per pipeline stage (including its SQL round trips)",
+    ["stage", "org_size"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+STAGE_ROUND_TRIPS = Histogram(
+    "retrieval_stage_round_trips",
+    "SQL round trips per pipeline stage",
+    ["stage", "org_size"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16),
+)
+STAGE_ROWS = Histogram(
+    "retrieval_stage_rows",
+    "Rows fetched per pipeline stage",
+    ["stage", "org_size"],
+    buckets=(0, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+REQUEST_SECONDS = Histogram(
+    "retrieval_request_seconds",
+    "End-to-end /v1/retrieve latency by result cache status",
+    ["org_size", "cache"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+BATCH_SECONDS = Histogram(
+    "retrieval_batch_seconds",
+    "End-to-end /v1/retrieve/batch latency",
+    ["org_size"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+BATCH_QUERIES = Histogram(
+    "retrieval_batch_queries",
+    "Queries per /v1/retrieve/batch call, by how they were served",
+    ["org_size", "served"],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+)
+SEED_RECALL_LOSS = Histogram(
+    "retrieval_seed_recall_loss",
+    "Share of seed_k vector slots not filled by spans visible to the caller",
+    ["org_size"],
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+
+# Evidence span count upper bounds -> org_size label
+_ORG_SIZE_BUCKETS: Tuple[Tuple[int, str], ...] = (
+    (1_000, "lt_1k"),
+    (10_000, "1k_10k"),
+    (100_000, "10k_100k"),
+    (1_000_000, "100k_1m"),
+)
+
+
+def org_size_label(span_count: int) -> str:
+    for bound, label in _ORG_SIZE_BUCKETS:
+        if span_count < bound:
+            return label
+    return "1m_plus"
+
+
+class OrgSizeBuckets:
+    """
+    org_id -> org_size label, from a span count refreshed in the background every
+    ttl_s so requests never wait on the count ("unknown" until the first one lands).
+    """
+
+    def __init__(self, count_spans: Callable[[str], Awaitable[int]], ttl_s: float = 600.0):
+        self.count_spans = count_spans
+        self.ttl_s = ttl_s
+        self._labels: Dict[str, Tuple[float, str]] = {}
+        self._refreshing: Set[str] = set()
+
+    def label(self, org_id: str) -> str:
+        entry = self._labels.get(org_id)
+        if (entry is None or entry[0] < time.monotonic()) and org_id not in self._refreshing:
+            self._refreshing.add(org_id)
+            asyncio.get_running_loop().create_task(self._refresh(org_id))
+        return entry[1] if entry is not None else "unknown"
+
+    async def _refresh(self, org_id: str) -> None:
+        try:
+            count = await self.count_spans(org_id)
+            self._labels[org_id] = (time.monotonic() + self.ttl_s, org_size_label(count))
+        except Exception as e:
+            logger.warning(f"org size refresh failed for {org_id}: {e}")
+        finally:
+            self._refreshing.discard(org_id)
+
+
+def observe_retrieval(debug: Dict[str, Any], org_size: str, seconds: float) -> None:
+    """Record one /v1/retrieve call; stage metrics only when the pipeline actually ran."""
+    cache_status = debug.get("cache", {}).get("status", "disabled")
+    REQUEST_SECONDS.labels(org_size, cache_status).observe(seconds)
+    if cache_status in ("hit", "coalesced"):
+        return
+    for stage, stats in debug["timings"]["stages"].items():
+        STAGE_SECONDS.labels(stage, org_size).observe(stats["ms"] / 1000.0)
+        STAGE_ROUND_TRIPS.labels(stage, org_size).observe(stats["round_trips"])
+        STAGE_ROWS.labels(stage, org_size).observe(stats["rows"])
+    SEED_RECALL_LOSS.labels(org_size).observe(debug["acl_seed"]["recall_loss"])
+
+
+def observe_batch(batch: Dict[str, Any], org_size: str, seconds: float) -> None:
+    """Record one /v1/retrieve/batch call; its shared stage timings stay out of the per-query stage histograms."""
+    debug = batch["debug"]
+    BATCH_SECONDS.labels(org_size).observe(seconds)
+    BATCH_QUERIES.labels(org_size, "cache").observe(debug["cache_hits"])
+    BATCH_QUERIES.labels(org_size, "pipeline").observe(debug["pipeline_queries"])
+    for result in batch["results"]:
+        if result["debug"]["cache"]["status"] not in ("hit", "coalesced"):
+            SEED_RECALL_LOSS.labels(org_size).observe(result["debug"]["acl_seed"]["recall_loss"])
+
+
+def seed_recall_summary() -> Dict[str, Any]:
+    """SEED_RECALL_LOSS totals across org sizes (pipeline runs only), for /v1/debug/acl_seed."""
+    count = loss_sum = lossless = 0.0
+    for metric in SEED_RECALL_LOSS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                count += sample.value
+            elif sample.name.endswith("_sum"):
+                loss_sum += sample.value
+            elif sample.name.endswith("_bucket") and float(sample.labels["le"]) == 0.0:
+                lossless += sample.value
+    return {
+        "queries": int(count),
+        "recall_loss_avg": loss_sum / count if count else 0.0,
+        "lossy_queries": int(count - lossless),
+    }
+
+
+class StatsCollector:
+    """
+    Exposes existing stats() dicts (result / embedding caches, DB pool, HTTP clients)
+    at scrape time as retrieval_<source>_<key>; cumulative keys become counters.
+    """
+    COUNTERS = frozenset({
+        "hits", "shared_hits", "misses", "coalesced", "expirations", "evictions",
+        "requests", "errors", "full_rebuilds",
+    })
+
+    def __init__(self, sources: Dict[str, Callable[[], Optional[Dict[str, Any]]]]):
+        self.sources = sources
+
+    def describe(self) -> Iterator[Metric]:
+        # Metric names depend on the stats() keys; skip the collect() at registration
+        return iter(())
+
+    def collect(self) -> Iterator[Metric]:
+        for source, stats_fn in self.sources.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for key, value in (stats or {}).items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"retrieval_{source}_{key}"
+                if key in self.COUNTERS:
+                    yield CounterMetricFamily(name, f"{source} {key}", value=value)
+                else:
+                    yield GaugeMetricFamily(name, f"{source} {key}", value=value)
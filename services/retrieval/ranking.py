@@ -0,0 +1,181 @@
+"""Vectorized ranking helpers for the retrieval pipeline."""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class FeatureColumns:
+    """Per-span ranking features as parallel arrays, one row per span id."""
+    span_ids: List[str]
+    vec_sim: np.ndarray
+    lex: np.ndarray
+    edge_support: np.ndarray
+    created_at_epoch: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.span_ids)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "FeatureColumns":
+        """Build from rows carrying id, vec_sim, lex, edge_support and created_at_epoch."""
+        n = len(rows)
+
+        def column(name: str) -> np.ndarray:
+            return np.fromiter((r[name] for r in rows), dtype=np.float64, count=n)
+
+        return cls(
+            span_ids=[r["id"] for r in rows],
+            vec_sim=column("vec_sim"),
+            lex=column("lex"),
+            edge_support=column("edge_support"),
+            created_at_epoch=column("created_at_epoch"),
+        )
+
+    def subset(self, span_ids: Sequence[str]) -> "FeatureColumns":
+        """Rows for span_ids (first occurrence, unknown ids skipped), in that order."""
+        position = {sid: i for i, sid in enumerate(self.span_ids)}
+        seen = set()
+        ids: List[str] = []
+        for sid in span_ids:
+            if sid in position and sid not in seen:
+                seen.add(sid)
+                ids.append(sid)
+        take = np.fromiter((position[sid] for sid in ids), dtype=np.int64, count=len(ids))
+        return FeatureColumns(
+            span_ids=ids,
+            vec_sim=self.vec_sim[take],
+            lex=self.lex[take],
+            edge_support=self.edge_support[take],
+            created_at_epoch=self.created_at_epoch[take],
+        )
+
+
+def minmax_normalize(values: np.ndarray) -> np.ndarray:
+    """Scale to [0, 1]; a constant column maps to all ones."""
+    if values.size == 0:
+        return values
+    vmin = values.min()
+    span = values.max() - vmin
+    if span < 1e-9:
+        return np.ones_like(values)
+    return (values - vmin) / span
+
+
+def recency_bonus(created_at_epoch: np.ndarray, now_epoch: float, halflife_days: float) -> np.ndarray:
+    """Exponential decay in (0, 1] by age; future timestamps count as age 0."""
+    age_days = np.maximum(0.0, (now_epoch - created_at_epoch) / 86400.0)
+    return np.exp(-math.log(2) * age_days / max(1e-6, halflife_days))
+
+
+def top_k_order(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, ties in input order.
+    argpartition finds the k-th score in O(n); only entries at or above it are sorted.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        idx = np.flatnonzero(scores >= kth)
+    else:
+        idx = np.arange(n)
+    order = idx[np.lexsort((idx, -scores[idx]))]
+    return order[:k]
+
+
+def score_columns(
+    cols: FeatureColumns,
+    weights: Tuple[float, float, float, float],
+    now_epoch: float,
+    halflife_days: float,
+    k: int,
+) -> Tuple[List[Tuple[str, float]], Dict[str, float]]:
+    """
+    Hybrid score = alpha*vec + beta*lex + gamma*graph (each min/max normalized)
+    + delta*recency, then the top k as (span_id, score), best first.
+    Also returns per-feature timings in milliseconds.
+    """
+    alpha, beta, gamma, delta = weights
+    timings: Dict[str, float] = {}
+    t = time.perf_counter()
+
+    def lap(name: str) -> None:
+        nonlocal t
+        now = time.perf_counter()
+        timings[name] = round((now - t) * 1000.0, 3)
+        t = now
+
+    vec = minmax_normalize(cols.vec_sim)
+    lap("vec_sim")
+    lex = minmax_normalize(cols.lex)
+    lap("lex")
+    graph = minmax_normalize(cols.edge_support)
+    lap("edge_support")
+    rec = recency_bonus(cols.created_at_epoch, now_epoch, halflife_days)
+    lap("recency")
+    scores = alpha * vec + beta * lex + gamma * graph + delta * rec
+    lap("combine")
+    order = top_k_order(scores, k)
+    ranked = [(cols.span_ids[i], float(scores[i])) for i in order]
+    lap("top_k")
+    return ranked, timings
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows as float32; all-zero rows stay zero (similarity 0)."""
+    m = np.asarray(matrix, dtype=np.float32)
+    if m.size == 0:
+        return m.reshape(m.shape[0], -1)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    return m / norms
+
+
+def mmr_select(
+    relevance: Sequence[float],
+    embeddings: Optional[np.ndarray],
+    k: int,
+    lam: float,
+) -> List[int]:
+    """
+    Maximal Marginal Relevance over candidates in rank order.
+
+    relevance[i] is candidate i's score. embeddings holds vectors for the
+    leading len(embeddings) candidates (the MMR pool); zero rows and
+    candidates past the pool never count as redundant. Each
+    step picks argmax(lam * rel - (1 - lam) * max_sim_to_selected), ties going
+    to the earlier candidate. Similarities are clamped at 0 and computed once
+    as a pool x pool matmul; a running max keeps each step O(pool).
+    Returns selected candidate indices in selection order.
+    """
+    rel = np.asarray(relevance, dtype=np.float64)
+    n = rel.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    if embeddings is not None and len(embeddings):
+        e = normalize_rows(embeddings)
+        sim = np.maximum(e @ e.T, 0.0)
+    else:
+        sim = None
+
+    max_sim = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(k):
+        value = lam * rel - (1.0 - lam) * max_sim
+        value[~available] = -np.inf
+        best = int(np.argmax(value))
+        selected.append(best)
+        available[best] = False
+        if sim is not None and best < sim.shape[0]:
+            np.maximum(max_sim[: sim.shape[0]], sim[best], out=max_sim[: sim.shape[0]])
+    return selected
@@ -0,0 +1,184 @@
+"""Full retrieval result cache: in-process LRU + TTL with single-flight misses."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from embedding_cache import normalize_query
+
+
+def acl_fingerprint(acl_ids: Sequence[str]) -> str:
+    """Order-independent digest of a visible ACL set: principals seeing the same ACLs share entries."""
+    return hashlib.sha256("\x00".join(sorted(acl_ids)).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RetrievalResultCache:
+    """
+    (org, ACL fingerprint, normalized query, scopes, config fingerprint, org data
+    generation) -> retrieval result. The generation comes from org_data_generation,
+    bumped by triggers on ingest, graph derivation and embedding writes, so a write
+    makes every cached result for the org unreachable; ttl_s bounds the recency drift.
+    Memory is bounded by max_entries and max_bytes (LRU eviction). Concurrent misses on
+    one key share a single pipeline run, whether they come from single or batch lookups.
+    """
+    ttl_s: float = 300.0
+    max_entries: int = 2000
+    max_bytes: int = 64 * 1024 * 1024
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    _entries: "OrderedDict[str, Tuple[float, float, int, Dict[str, Any]]]" = field(default_factory=OrderedDict)
+    _inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = field(default_factory=dict)
+    _bytes: int = 0
+
+    def key(
+        self,
+        org_id: str,
+        acl_ids: Sequence[str],
+        query_text: str,
+        scopes: Sequence[str],
+        config_fingerprint: str,
+        generation: int,
+    ) -> str:
+        raw = "\x00".join([
+            org_id,
+            acl_fingerprint(acl_ids),
+            normalize_query(query_text),
+            ",".join(sorted(scopes)),
+            config_fingerprint,
+            str(generation),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], str, float]:
+        """Returns (result, "hit" | "miss" | "coalesced", age_s)."""
+        async def compute_one(_indices: List[int]) -> List[Dict[str, Any]]:
+            return [await compute()]
+
+        return (await self.get_or_compute_many([key], compute_one))[0]
+
+    async def get_or_compute_many(
+        self,
+        keys: Sequence[str],
+        compute: Callable[[List[int]], Awaitable[List[Dict[str, Any]]]],
+    ) -> List[Tuple[Dict[str, Any], str, float]]:
+        """
+        get_or_compute for distinct keys: hits are served, keys another request is
+        computing are awaited, and the rest are registered as in flight and computed
+        by one compute(indices into keys) call returning their results in order.
+        Returns (result, "hit" | "miss" | "coalesced", age_s) per key.
+        """
+        out: List[Any] = [None] * len(keys)
+        pending = list(range(len(keys)))
+        while pending:
+            lead: List[int] = []
+            follow: List[Tuple[int, "asyncio.Future[Dict[str, Any]]"]] = []
+            for i in pending:
+                entry = self._get(keys[i])
+                if entry is not None:
+                    self.hits += 1
+                    created_at, result = entry
+                    out[i] = (result, "hit", time.monotonic() - created_at)
+                    continue
+                flight = self._inflight.get(keys[i])
+                if flight is not None:
+                    follow.append((i, flight))
+                else:
+                    lead.append(i)
+
+            if lead:
+                self.misses += len(lead)
+                flights = {}
+                for i in lead:
+                    flight = asyncio.get_running_loop().create_future()
+                    # Followers may all be gone; don't log an unretrieved exception
+                    flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    self._inflight[keys[i]] = flights[i] = flight
+                try:
+                    results = await compute(lead)
+                except asyncio.CancelledError:
+                    for flight in flights.values():
+                        flight.cancel()
+                    raise
+                except BaseException as e:
+                    for flight in flights.values():
+                        flight.set_exception(e)
+                    raise
+                else:
+                    for i, result in zip(lead, results):
+                        self._put(keys[i], result)
+                        flights[i].set_result(result)
+                        out[i] = (result, "miss", 0.0)
+                finally:
+                    for i in lead:
+                        self._inflight.pop(keys[i], None)
+
+            retry = []
+            for i, flight in follow:
+                try:
+                    result = await asyncio.shield(flight)
+                except asyncio.CancelledError:
+                    if flight.cancelled() and not asyncio.current_task().cancelling():
+                        retry.append(i)  # the leading request was cancelled; retry (maybe as leader)
+                        continue
+                    raise
+                self.coalesced += 1
+                out[i] = (result, "coalesced", 0.0)
+            pending = retry
+        return out
+
+    def _get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, created_at, _, result = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return created_at, result
+
+    def _put(self, key: str, result: Dict[str, Any]) -> None:
+        if key in self._entries:
+            self._drop(key)
+        size = len(json.dumps(result, default=str))
+        now = time.monotonic()
+        self._entries[key] = (now + self.ttl_s, now, size, result)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
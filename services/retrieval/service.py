@@ -1,12 +1,32 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import copy
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Dict, Generator, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
 
-import math
+import hashlib
+import json
+import numpy as np
 import psycopg
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+from pgvector.psycopg import register_vector, register_vector_async
+
+from capabilities import SchemaCapabilities
+from graph_cache import GraphCache
+from ranking import FeatureColumns, mmr_select, score_columns
+
+T = TypeVar("T")
+
+# A pipeline step yields (sql, params) and is sent back the fetched rows.
+# Steps hold no cursor, so the same step runs under a sync or an async driver.
+# A third element (sql, params, True) asks for binary-format results.
+Query = Union[Tuple[str, Sequence[Any]], Tuple[str, Sequence[Any], bool]]
+Rows = List[Dict[str, Any]]
+Step = Generator[Query, Rows, T]
 
 
 @dataclass
@@ -14,6 +34,9 @@ class RetrievalConfig:
     seed_k: int = 40                 # initial top-k from vector/lexical
     hop_depth: int = 2               # 1-2 is usually plenty
     hop_fanout: int = 80             # limit neighbors per hop to control blow-up
+    expand_mode: str = "iterative"   # "iterative" (per-hop queries), "recursive" (one WITH RECURSIVE walk) or "csr" (in-process adjacency cache)
+    expand_max_nodes: int = 2000     # cap on nodes returned by the recursive walk
+    hop_decay: float = 1.0           # graph support multiplier per hop from the nearest seed node (1.0 = no decay)
     final_k: int = 12                # return top spans
     alpha_vec: float = 0.55
     beta_bm25: float = 0.25
@@ -23,33 +46,155 @@ class RetrievalConfig:
     use_mmr: bool = True             # enable MMR diversity selection
     mmr_lambda: float = 0.7          # higher favors relevance, lower favors diversity
     mmr_pool: int = 100              # consider top-N candidates before MMR subset
+    seed_mode: str = "fused"         # "fused" (one CTE statement) or "split" (vector + lexical statements)
+    seed_rrf_k: int = 60             # reciprocal-rank-fusion constant for seed ordering
+    acl_seed_mode: str = "post"      # "post" (filter after ranking), "filtered" (ACL inside the ANN scan) or "adaptive" (over-fetch, then filter); fused seed only
+    acl_overfetch: int = 4           # adaptive: initial over-fetch factor on seed_k
+    acl_overfetch_max: int = 64      # adaptive: stop widening past this factor
     bonus_decision: float = 1.2      # legacy per-type knobs (kept for compat)
     bonus_outcome: float = 1.1
     bonus_assumption: float = 1.05
     bonus_map: Optional[Dict[str, float]] = None  # overrides legacy knobs when provided
 
+    def fingerprint(self) -> str:
+        """Digest of every knob, part of the result cache key."""
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def configure_connection(conn: psycopg.Connection) -> None:
+    """Register the pgvector adapters (vector <-> numpy float32); use as a pool `configure` hook."""
+    register_vector(conn)
+    conn.commit()
+
+
+async def configure_async_connection(conn: psycopg.AsyncConnection) -> None:
+    """Async counterpart of configure_connection."""
+    await register_vector_async(conn)
+    await conn.commit()
+
 
-def _recency_bonus(ts: datetime, halflife_days: float) -> float:
-    now = datetime.now(timezone.utc)
-    age_days = max(0.0, (now - ts).total_seconds() / 86400.0)
-    # exponential decay, returns (0,1]
-    return math.exp(-math.log(2) * age_days / max(1e-6, halflife_days))
+def _drive(cur, step: Step[T]) -> T:
+    """Run a pipeline step to completion on a sync cursor."""
+    try:
+        query = next(step)
+        while True:
+            sql, params, *binary = query
+            cur.execute(sql, params, binary=bool(binary and binary[0]))
+            query = step.send(cur.fetchall())
+    except StopIteration as stop:
+        return stop.value
 
 
-def _safe_normalize(values: Dict[str, float]) -> Dict[str, float]:
-    if not values:
-        return {}
-    vmin = min(values.values())
-    vmax = max(values.values())
-    if abs(vmax - vmin) < 1e-9:
-        return {k: 1.0 for k in values}
-    return {k: (v - vmin) / (vmax - vmin) for k, v in values.items()}
+async def _adrive(cur, step: Step[T]) -> T:
+    """Run a pipeline step to completion on an async cursor."""
+    try:
+        query = next(step)
+        while True:
+            sql, params, *binary = query
+            await cur.execute(sql, params, binary=bool(binary and binary[0]))
+            query = step.send(await cur.fetchall())
+    except StopIteration as stop:
+        return stop.value
+
+
+class StageTrace:
+    """
+    Per-stage wall time, SQL round trips and rows fetched for one pipeline run.
+    step() wraps a pipeline step (timing includes the driver executing its queries);
+    stage() times in-process work.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._started = time.perf_counter()
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self.stages.setdefault(name, {"ms": 0.0, "round_trips": 0, "rows": 0})
+
+    def step(self, name: str, step: Step[T]) -> Step[T]:
+        entry = self._entry(name)
+        t0 = time.perf_counter()
+        try:
+            query = next(step)
+            while True:
+                entry["round_trips"] += 1
+                rows = yield query
+                entry["rows"] += len(rows)
+                query = step.send(rows)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            entry["ms"] += (time.perf_counter() - t0) * 1000.0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        entry = self._entry(name)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["ms"] += (time.perf_counter() - t0) * 1000.0
+
+    def summary(self) -> Dict[str, Any]:
+        stages = {name: {**e, "ms": round(e["ms"], 3)} for name, e in self.stages.items()}
+        return {
+            "stages": stages,
+            "total_ms": round((time.perf_counter() - self._started) * 1000.0, 3),
+            "round_trips": sum(e["round_trips"] for e in stages.values()),
+            "rows": sum(e["rows"] for e in stages.values()),
+        }
+
+
+def vector_to_array(value: Any) -> np.ndarray:
+    """pgvector value -> float32 array, whether or not the adapters are registered."""
+    if hasattr(value, "to_numpy"):  # pgvector.Vector (newer pgvector releases)
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # Binary wire format: int16 dim, int16 unused, then big-endian float32s
+        return np.frombuffer(value, dtype=">f4", offset=4).astype(np.float32)
+    if isinstance(value, str):
+        return np.array(value.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def vector_literal(value: Sequence[float]) -> str:
+    """pgvector text form, for passing many vectors as one text[] parameter."""
+    return "[" + ",".join(repr(float(x)) for x in value) + "]"
 
 
 class RetrievalService:
-    def __init__(self, dsn: str, cfg: Optional[RetrievalConfig] = None):
+    def __init__(
+        self,
+        dsn: str,
+        cfg: Optional[RetrievalConfig] = None,
+        pool: Optional[ConnectionPool] = None,
+        graph_cache: Optional[GraphCache] = None,
+        capabilities: Optional[SchemaCapabilities] = None,
+    ):
         self.dsn = dsn
         self.cfg = cfg or RetrievalConfig()
+        self.pool = pool
+        self.graph_cache = graph_cache or GraphCache()
+        self.capabilities = capabilities or SchemaCapabilities()
+
+    def with_config(self, cfg: RetrievalConfig) -> "RetrievalService":
+        """Same pool, caches and capabilities under another config (per-request overrides)."""
+        view = copy.copy(self)
+        view.cfg = cfg
+        return view
+
+    @contextmanager
+    def _connection(self) -> Iterator[psycopg.Connection]:
+        """Borrow a pooled connection when a pool is configured, else connect directly."""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with psycopg.connect(self.dsn) as conn:
+                configure_connection(conn)
+                yield conn
 
     def retrieve(
         self,
@@ -59,63 +204,162 @@ class RetrievalService:
         user_id: str = "system",
         acl_groups: Sequence[str] = (),
         now: Optional[datetime] = None,
+        visible: Optional[Tuple[List[str], str]] = None,
+        cfg: Optional[RetrievalConfig] = None,
     ) -> Dict[str, Any]:
         """
         Returns top evidence spans after:
         seed -> graph expand -> hybrid score -> policy filter.
+        visible = (acl_ids, source) from cache_probe skips the ACL lookup;
+        cfg replaces the service config for this call.
         """
-        now = now or datetime.now(timezone.utc)
+        svc = self if cfg is None else self.with_config(cfg)
+        with self._connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                return _drive(cur, svc._pipeline(org_id, query_text, query_embedding, user_id, acl_groups, now, visible))
+
+    def retrieve_batch(
+        self,
+        org_id: str,
+        queries: Sequence[Tuple[str, Sequence[float]]],
+        user_id: str = "system",
+        acl_groups: Sequence[str] = (),
+        now: Optional[datetime] = None,
+        visible: Optional[Tuple[List[str], str]] = None,
+        cfg: Optional[RetrievalConfig] = None,
+    ) -> Dict[str, Any]:
+        """
+        Many (query_text, query_embedding) pairs for one principal in a fixed number of
+        round trips. Returns {"results": [one retrieve() result per query], "timings"}.
+        """
+        svc = self if cfg is None else self.with_config(cfg)
+        with self._connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                return _drive(cur, svc._batch_pipeline(org_id, queries, user_id, acl_groups, now, visible))
 
-        with psycopg.connect(self.dsn, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                # 1) seed spans (vector + lexical)
-                seed_spans = self._seed_spans(cur, org_id, query_text, query_embedding)
+    def _pipeline(
+        self,
+        org_id: str,
+        query_text: str,
+        query_embedding: Sequence[float],
+        user_id: str,
+        acl_groups: Sequence[str],
+        now: Optional[datetime],
+        visible: Optional[Tuple[List[str], str]] = None,
+    ) -> Step[Dict[str, Any]]:
+        """One query is a batch of one."""
+        batch = yield from self._batch_pipeline(
+            org_id, [(query_text, query_embedding)], user_id, acl_groups, now, visible
+        )
+        return batch["results"][0]
 
-                # 2) derive seed nodes from spans (via edge_evidence)
-                seed_node_ids = self._seed_nodes_from_spans(cur, org_id, [s["id"] for s in seed_spans])
+    def _batch_pipeline(
+        self,
+        org_id: str,
+        queries: Sequence[Tuple[str, Sequence[float]]],
+        user_id: str,
+        acl_groups: Sequence[str],
+        now: Optional[datetime],
+        visible: Optional[Tuple[List[str], str]] = None,
+    ) -> Step[Dict[str, Any]]:
+        """
+        The retrieval pipeline for (query_text, query_embedding) pairs of one principal:
+        acl -> seed -> seed nodes -> graph expand -> candidates -> features -> policy
+        filter -> hybrid score (+ MMR) -> hydrate. The ACL set is resolved once; seeds,
+        seed nodes, expansion, candidates and features each run as one set-based
+        statement over all queries (rows tagged with the query index); policy, MMR
+        embeddings and hydration fetch the union of span ids once. Ranking and MMR
+        selection are per query, so a query's result does not depend on its batch.
+        """
+        now = now or datetime.now(timezone.utc)
+        trace = StageTrace()
+        texts = [text for text, _ in queries]
+        embeddings = [emb for _, emb in queries]
 
-                # 3) expand neighborhood to collect candidate nodes
-                expanded_node_ids = self._expand_nodes(cur, org_id, seed_node_ids)
+        if visible is not None:
+            visible_acls, acl_source = visible
+        else:
+            visible_acls, acl_source = yield from trace.step("acl", self._visible_acls(org_id, user_id))
 
-                # 4) collect candidate spans from:
-                #    - original seed spans
-                #    - spans attached to edges among expanded nodes
-                candidate_span_ids = self._candidate_spans(
-                    cur, org_id, 
-                    seed_span_ids=[s["id"] for s in seed_spans], 
-                    node_ids=expanded_node_ids
-                )
+        seeds = yield from trace.step("seed", self._seed_spans(org_id, texts, embeddings, visible_acls))
+        seed_span_ids = [[s["id"] for s in seed_spans] for seed_spans, _ in seeds]
+        seed_node_ids = yield from trace.step("seed_nodes", self._seed_nodes_from_spans(org_id, seed_span_ids))
+        node_hops = yield from trace.step("expand", self._expand_nodes(org_id, seed_node_ids))
+        candidate_span_ids = yield from trace.step(
+            "candidates", self._candidate_spans(org_id, seed_span_ids, node_hops)
+        )
+        features = yield from trace.step(
+            "features", self._span_features(org_id, texts, embeddings, candidate_span_ids, node_hops)
+        )
+        allowed = set((yield from trace.step("policy", self._policy_filter(
+            org_id, visible_acls, list(dict.fromkeys(sid for f in features for sid in f.span_ids))
+        ))))
 
-                # 5) fetch features for candidate spans (vector sim, bm25-ish, recency, graph stats)
-                features = self._span_features(
-                    cur, org_id, query_text, query_embedding, 
-                    candidate_span_ids, expanded_node_ids
-                )
+        allowed_ids: List[List[str]] = []
+        ranked: List[List[Tuple[str, float]]] = []
+        scoring_ms: List[Dict[str, float]] = []
+        with trace.stage("rank"):
+            for (seed_spans, seed_stats), f in zip(seeds, features):
+                ids = [sid for sid in f.span_ids if sid in allowed]
+                self._seed_recall(seed_spans, set(ids), seed_stats)
+                r, ms = self._score_and_rank(f, ids, now)
+                allowed_ids.append(ids)
+                ranked.append(r)
+                scoring_ms.append(ms)
 
-                # 6) policy filter (org-level only for now; extend with ACL later)
-                allowed_ids = self._policy_filter(cur, org_id, user_id, acl_groups, list(features.keys()), now)
-
-                # 7) score + rank
-                ranked = self._score_and_rank(features, allowed_ids)
-
-                # Optional MMR selection for diversity on embedding space
-                if self.cfg.use_mmr:
-                    # pool is top mmr_pool from ranked
-                    pool_ids = [sid for sid, _ in ranked[: self.cfg.mmr_pool]]
-                    embed_map = self._span_embeddings(cur, pool_ids)
-                    top_ids = self._mmr_select(
-                        query_embedding=query_embedding,
-                        ranked=ranked,
-                        embed_map=embed_map,
+        if self.cfg.use_mmr:
+            pools = [[sid for sid, _ in r[: self.cfg.mmr_pool]] for r in ranked]
+            embed_map = yield from trace.step(
+                "mmr", self._span_embeddings(list(dict.fromkeys(sid for pool in pools for sid in pool)))
+            )
+            with trace.stage("mmr"):
+                # Each query sees only its own pool's embeddings
+                top_ids = [
+                    self._mmr_select(
+                        query_embedding=emb,
+                        ranked=r,
+                        embed_map={sid: embed_map[sid] for sid in pool if sid in embed_map},
                         k=self.cfg.final_k,
                         lam=self.cfg.mmr_lambda,
                     )
-                else:
-                    top_ids = [sid for sid, _ in ranked[: self.cfg.final_k]]
+                    for emb, r, pool in zip(embeddings, ranked, pools)
+                ]
+        else:
+            top_ids = [[sid for sid, _ in r[: self.cfg.final_k]] for r in ranked]
 
-                # 8) hydrate and return top spans
-                spans = self._hydrate_spans(cur, org_id, top_ids)
+        span_rows = yield from trace.step(
+            "hydrate", self._span_rows(org_id, list(dict.fromkeys(sid for ids in top_ids for sid in ids)))
+        )
+        timings = trace.summary()
 
+        results = []
+        for i, text in enumerate(texts):
+            spans = self._dedup_by_artifact_overlap(
+                [dict(span_rows[sid]) for sid in top_ids[i] if sid in span_rows], max_k=len(top_ids[i])
+            )
+            seed_spans, seed_stats = seeds[i]
+            results.append(self._result(
+                org_id, text, spans, seed_spans, seed_stats, seed_node_ids[i], list(node_hops[i]),
+                candidate_span_ids[i], allowed_ids[i], acl_source, visible_acls, scoring_ms[i], timings,
+            ))
+        return {"results": results, "timings": timings}
+
+    def _result(
+        self,
+        org_id: str,
+        query_text: str,
+        spans: List[Dict[str, Any]],
+        seed_spans: List[Dict[str, Any]],
+        seed_stats: Dict[str, Any],
+        seed_node_ids: List[str],
+        expanded_node_ids: List[str],
+        candidate_span_ids: List[str],
+        allowed_ids: List[str],
+        acl_source: str,
+        visible_acls: List[str],
+        scoring_ms: Dict[str, float],
+        timings: Dict[str, Any],
+    ) -> Dict[str, Any]:
         return {
             "org_id": org_id,
             "query": query_text,
@@ -123,24 +367,237 @@ class RetrievalService:
             "results": spans,
             "debug": {
                 "seed_spans": len(seed_spans),
+                "seed_mode": self.cfg.seed_mode,
+                "acl_seed": seed_stats,
                 "seed_nodes": len(seed_node_ids),
+                "expand_mode": self.cfg.expand_mode,
                 "expanded_nodes_count": len(expanded_node_ids),
                 "candidate_spans_count": len(candidate_span_ids),
                 "allowed_spans_count": len(allowed_ids),
+                "acl_source": acl_source,
+                "visible_acls": len(visible_acls),
+                "scoring_ms": scoring_ms,
                 "returned": len(spans),
-                "mmr": {"enabled": self.cfg.use_mmr, "lambda": self.cfg.mmr_lambda, "pool": self.cfg.mmr_pool}
+                "mmr": {"enabled": self.cfg.use_mmr, "lambda": self.cfg.mmr_lambda, "pool": self.cfg.mmr_pool},
+                "timings": timings,
             },
         }
 
+    def _seed_recall(self, seed_spans: List[Dict[str, Any]], allowed: set, seed_stats: Dict[str, Any]) -> None:
+        """Seed recall loss: share of the seed_k vector slots not filled by spans the caller may see."""
+        vec_seed_ids = [s["id"] for s in seed_spans if s["from_vec"]]
+        visible_vec_seeds = sum(1 for sid in vec_seed_ids if sid in allowed)
+        seed_stats.update(
+            vec_seeds=len(vec_seed_ids),
+            visible_vec_seeds=visible_vec_seeds,
+            recall_loss=round(1.0 - min(visible_vec_seeds, self.cfg.seed_k) / max(1, self.cfg.seed_k), 4),
+        )
+
     # ----------------------------- SQL steps -----------------------------
+    # Steps take per-query lists: every statement carries a 0-based query index (qi),
+    # and per-query limits are applied with window functions partitioned by qi.
 
-    def _seed_spans(self, cur, org_id: str, query_text: str, query_embedding: Sequence[float]) -> List[Dict[str, Any]]:
+    def _seed_spans(
+        self,
+        org_id: str,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        visible_acls: List[str],
+    ) -> Step[List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]]:
         """
         Seed using pgvector similarity + optional lexical.
         Requires: evidence_embedding.embedding vector + pgvector extension.
+        Returns (seed spans, ACL seed stats) per query; adaptive widening re-runs only
+        the queries still short of visible seeds.
         """
+        if self.cfg.seed_mode != "fused":
+            out = []
+            for text, emb in zip(texts, embeddings):
+                seeds = yield from self._seed_spans_split(org_id, text, emb)
+                out.append((seeds, {"mode": "post", "vec_fetch": self.cfg.seed_k, "rounds": 1}))
+            return out
+
+        mode = self.cfg.acl_seed_mode
+        if mode == "filtered":
+            caps = yield from self.capabilities.ensure()
+            if caps.supports_iterative_scan:
+                # Keep scanning index lists until LIMIT visible rows are found (pgvector >= 0.8)
+                yield (
+                    """
+                    SELECT set_config('ivfflat.iterative_scan', 'relaxed_order', true),
+                           set_config('hnsw.iterative_scan', 'relaxed_order', true)
+                    """,
+                    (),
+                )
+
+        out: List[Any] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        factor = max(1, self.cfg.acl_overfetch) if mode == "adaptive" else 1
+        rounds = 0
+        while pending:
+            vec_fetch = self.cfg.seed_k * factor
+            fetched = yield from self._seed_spans_fused(
+                org_id, [texts[i] for i in pending], [embeddings[i] for i in pending], visible_acls, mode, vec_fetch
+            )
+            rounds += 1
+            still_short = []
+            for i, (seeds, vec_fetched) in zip(pending, fetched):
+                vec_seeds = sum(1 for s in seeds if s["from_vec"])
+                # Widen only while visible seeds are short and the scan was not exhausted
+                if (
+                    mode != "adaptive"
+                    or vec_seeds >= self.cfg.seed_k
+                    or vec_fetched < vec_fetch
+                    or factor >= self.cfg.acl_overfetch_max
+                ):
+                    out[i] = (seeds, {"mode": mode, "vec_fetch": vec_fetch, "rounds": rounds})
+                else:
+                    still_short.append(i)
+            pending = still_short
+            factor = min(factor * 4, self.cfg.acl_overfetch_max)
+        return out
+
+    def _seed_spans_fused(
+        self,
+        org_id: str,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        visible_acls: List[str],
+        acl_mode: str,
+        vec_fetch: int,
+    ) -> Step[List[Tuple[List[Dict[str, Any]], int]]]:
+        """
+        Vector and lexical seed in one statement: the query vectors and tsqueries are
+        unnested once, each query's ANN and lexical top-k run as LATERAL subqueries and
+        are full-outer-joined, with vec_sim, lex_rank and the RRF score side by side.
+
+        acl_mode "filtered" puts the ACL predicate inside the ANN scan; "adaptive"
+        scans vec_fetch nearest spans org-wide and keeps the seed_k nearest visible
+        ones; "post" leaves ACLs to the policy filter. Returns (seeds, rows the ANN
+        scan produced) per query.
+        """
+        acl_join = ""
+        if acl_mode in ("filtered", "adaptive"):
+            acl_join = "JOIN artifact a ON a.artifact_id = es.artifact_id AND a.acl_id = ANY(%(acls)s::uuid[])"
+        if acl_mode == "adaptive":
+            vec_raw_join, vec_filter_join = "", f"JOIN evidence_span es ON es.evidence_span_id = r.id {acl_join}"
+        else:
+            vec_raw_join, vec_filter_join = acl_join, ""
+
+        rows = yield (
+            f"""
+            WITH q AS MATERIALIZED (
+                SELECT u.qi - 1 AS qi, u.emb::vector AS emb, websearch_to_tsquery('english', u.txt) AS tsq
+                FROM unnest(%(embs)s::text[], %(qs)s::text[]) WITH ORDINALITY AS u(emb, txt, qi)
+            ),
+            vec_raw AS (
+                SELECT q.qi, v.id, v.created_at, v.vec_sim
+                FROM q
+                CROSS JOIN LATERAL (
+                    SELECT 
+                        ee.evidence_span_id AS id, 
+                        es.created_at,
+                        1 - (ee.embedding <=> q.emb) AS vec_sim
+                    FROM evidence_embedding ee
+                    JOIN evidence_span es ON ee.evidence_span_id = es.evidence_span_id
+                    {vec_raw_join}
+                    WHERE es.org_id = %(org_id)s
+                    ORDER BY ee.embedding <=> q.emb
+                    LIMIT %(vec_fetch)s
+                ) v
+            ),
+            vec_ranked AS (
+                SELECT r.qi, r.id, r.created_at, r.vec_sim,
+                       row_number() OVER (PARTITION BY r.qi ORDER BY r.vec_sim DESC) AS vec_pos
+                FROM vec_raw r
+                {vec_filter_join}
+            ),
+            vec AS (
+                SELECT * FROM vec_ranked WHERE vec_pos <= %(vec_k)s
+            ),
+            lex AS (
+                SELECT q.qi, l.id, l.created_at, l.lex_rank,
+                       row_number() OVER (PARTITION BY q.qi ORDER BY l.lex_rank DESC) AS lex_pos
+                FROM q
+                CROSS JOIN LATERAL (
+                    SELECT 
+                        es.evidence_span_id AS id, 
+                        es.created_at,
+                        ts_rank(at.fts_en, q.tsq) AS lex_rank
+                    FROM evidence_span es
+                    JOIN artifact_text at ON es.artifact_text_id = at.artifact_text_id
+                    {acl_join}
+                    WHERE es.org_id = %(org_id)s
+                      AND at.fts_en @@ q.tsq
+                    ORDER BY lex_rank DESC
+                    LIMIT %(lex_k)s
+                ) l
+            ),
+            fused AS (
+                SELECT 
+                    COALESCE(v.qi, l.qi) AS qi,
+                    COALESCE(v.id, l.id)::text AS id,
+                    COALESCE(v.created_at, l.created_at) AS created_at,
+                    COALESCE(v.vec_sim, 0.0) AS vec_sim,
+                    COALESCE(l.lex_rank, 0.0) AS lex_rank,
+                    COALESCE(1.0 / (%(rrf_k)s + v.vec_pos), 0.0)
+                      + COALESCE(1.0 / (%(rrf_k)s + l.lex_pos), 0.0) AS rrf,
+                    v.id IS NOT NULL AS from_vec
+                FROM vec v
+                FULL OUTER JOIN lex l ON l.qi = v.qi AND l.id = v.id
+            ),
+            fetched AS (
+                SELECT qi, count(*) AS n FROM vec_raw GROUP BY qi
+            )
+            -- One row per query at least, so vec_fetched is reported even when nothing matched
+            SELECT q.qi, f.id, f.created_at, f.vec_sim, f.lex_rank, f.rrf, f.from_vec,
+                   COALESCE(fe.n, 0) AS vec_fetched
+            FROM q
+            LEFT JOIN fused f ON f.qi = q.qi
+            LEFT JOIN fetched fe ON fe.qi = q.qi
+            ORDER BY q.qi, f.rrf DESC
+            """,
+            {
+                "embs": [vector_literal(e) for e in embeddings],
+                "qs": list(texts),
+                "org_id": org_id,
+                "acls": visible_acls,
+                "vec_k": self.cfg.seed_k,
+                "vec_fetch": vec_fetch,
+                "lex_k": max(10, self.cfg.seed_k // 4),
+                "rrf_k": self.cfg.seed_rrf_k,
+            },
+        )
+        by_query: List[Rows] = [[] for _ in texts]
+        vec_fetched = [0] * len(texts)
+        for r in rows:
+            by_query[r["qi"]].append(r)
+            vec_fetched[r["qi"]] = int(r["vec_fetched"])
+        return [(self._merge_seed_rows(qrows), n) for qrows, n in zip(by_query, vec_fetched)]
+
+    @staticmethod
+    def _merge_seed_rows(rows: Rows) -> List[Dict[str, Any]]:
+        """Fused seed rows (RRF order) -> one seed per span id."""
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            if r["id"] is None:
+                continue
+            sid = str(r["id"])
+            prev = by_id.get(sid)
+            by_id[sid] = {
+                "id": sid,
+                "created_at": r["created_at"],
+                "vec_sim": max(float(r["vec_sim"]), prev["vec_sim"] if prev else 0.0),
+                "lex": max(float(r["lex_rank"]), prev["lex"] if prev else 0.0),
+                "rrf": max(float(r["rrf"]), prev["rrf"] if prev else 0.0),
+                "from_vec": bool(r["from_vec"]) or (prev["from_vec"] if prev else False),
+            }
+        return list(by_id.values())
+
+    def _seed_spans_split(self, org_id: str, query_text: str, query_embedding: Sequence[float]) -> Step[List[Dict[str, Any]]]:
+        """Vector and lexical seed as two statements, merged and RRF-scored in Python."""
         # Vector seed
-        cur.execute(
+        vec_rows = yield (
             """
             SELECT 
                 ee.evidence_span_id as id, 
@@ -154,10 +611,9 @@ class RetrievalService:
             """,
             (list(query_embedding), org_id, list(query_embedding), self.cfg.seed_k),
         )
-        vec_rows = cur.fetchall()
 
         # Lexical seed via BM25/ts_rank on artifact_text.fts_en using websearch_to_tsquery
-        cur.execute(
+        lex_rows = yield (
             """
             SELECT 
                 es.evidence_span_id as id, 
@@ -172,375 +628,487 @@ class RetrievalService:
             """,
             (query_text, org_id, query_text, max(10, self.cfg.seed_k // 4)),
         )
-        lex_rows = cur.fetchall()
 
         # Merge unique by id
+        rrf_k = self.cfg.seed_rrf_k
         by_id: Dict[str, Dict[str, Any]] = {}
-        for r in vec_rows:
+        for pos, r in enumerate(vec_rows, start=1):
             by_id[str(r["id"])] = {
                 "id": str(r["id"]), 
                 "created_at": r["created_at"], 
                 "vec_sim": float(r["vec_sim"]), 
-                "lex": 0.0
+                "lex": 0.0,
+                "rrf": 1.0 / (rrf_k + pos),
+                "from_vec": True,
             }
-        for r in lex_rows:
+        for pos, r in enumerate(lex_rows, start=1):
             sid = str(r["id"])
             by_id.setdefault(sid, {
                 "id": sid, 
                 "created_at": r["created_at"], 
                 "vec_sim": 0.0, 
-                "lex": 0.0
+                "lex": 0.0,
+                "rrf": 0.0,
+                "from_vec": False,
             })
             by_id[sid]["lex"] = max(by_id[sid]["lex"], float(r["lex_rank"]))
+            by_id[sid]["rrf"] += 1.0 / (rrf_k + pos)
 
-        return list(by_id.values())
+        return sorted(by_id.values(), key=lambda s: s["rrf"], reverse=True)
 
-    def _seed_nodes_from_spans(self, cur, org_id: str, span_ids: List[str]) -> List[str]:
-        if not span_ids:
-            return []
+    def _seed_nodes_from_spans(self, org_id: str, seed_span_ids: List[List[str]]) -> Step[List[List[str]]]:
+        """Seed nodes per query: span_node when it has rows for the seeds, else inferred via edge_evidence -> graph_edge."""
+        def nodes_for(span_ids: List[str], mapping: Dict[str, List[str]]) -> List[str]:
+            return list(dict.fromkeys(nid for sid in span_ids for nid in mapping.get(sid, ())))
 
-        # Prefer span_node if present
-        cur.execute(
-            """
-            SELECT EXISTS (
-              SELECT 1 FROM information_schema.tables 
-              WHERE table_schema='public' AND table_name='span_node'
-            ) AS has_span_node;
-            """
-        )
-        has_span_node = bool(cur.fetchone()["has_span_node"])
-        if has_span_node:
-            cur.execute(
+        all_ids = list(dict.fromkeys(sid for ids in seed_span_ids for sid in ids))
+        out: List[List[str]] = [[] for _ in seed_span_ids]
+        if not all_ids:
+            return out
+
+        caps = yield from self.capabilities.ensure()
+        if caps.has_span_node:
+            rows = yield (
                 """
-                SELECT DISTINCT node_id::text AS node_id
+                SELECT evidence_span_id::text AS span_id, node_id::text AS node_id
                 FROM span_node
                 WHERE org_id = %s
                   AND evidence_span_id = ANY(%s)
                 """,
-                (org_id, span_ids),
+                (org_id, all_ids),
             )
-            rows = cur.fetchall()
-            if rows:
-                return [str(r["node_id"]) for r in rows]
+            mapping: Dict[str, List[str]] = {}
+            for r in rows:
+                mapping.setdefault(r["span_id"], []).append(r["node_id"])
+            out = [nodes_for(ids, mapping) for ids in seed_span_ids]
+
+        missing = [i for i, ids in enumerate(seed_span_ids) if ids and not out[i]]
+        if missing:
+            fallback_ids = list(dict.fromkeys(sid for i in missing for sid in seed_span_ids[i]))
+            rows = yield (
+                """
+                SELECT ee.evidence_span_id::text AS span_id, ge.src_node_id::text AS node_id
+                FROM edge_evidence ee
+                JOIN graph_edge ge ON ge.edge_id = ee.edge_id
+                WHERE ge.org_id = %s
+                  AND ee.evidence_span_id = ANY(%s)
+                UNION
+                SELECT ee.evidence_span_id::text AS span_id, ge.dst_node_id::text AS node_id
+                FROM edge_evidence ee
+                JOIN graph_edge ge ON ge.edge_id = ee.edge_id
+                WHERE ge.org_id = %s
+                  AND ee.evidence_span_id = ANY(%s)
+                """,
+                (org_id, fallback_ids, org_id, fallback_ids),
+            )
+            mapping = {}
+            for r in rows:
+                mapping.setdefault(r["span_id"], []).append(r["node_id"])
+            for i in missing:
+                out[i] = nodes_for(seed_span_ids[i], mapping)
+        return out
 
-        # Fallback: infer nodes via edge_evidence -> graph_edge
-        cur.execute(
+    def _expand_nodes(self, org_id: str, seed_node_ids: List[List[str]]) -> Step[List[Dict[str, int]]]:
+        """Expand seed nodes k hops over graph_edge; returns node_id -> hop distance from the nearest seed, per query."""
+        if not any(seed_node_ids):
+            return [{} for _ in seed_node_ids]
+        if self.cfg.expand_mode == "csr":
+            adjacency = yield from self.graph_cache.adjacency(org_id)
+            return [
+                adjacency.bfs(
+                    seeds,
+                    depth=self.cfg.hop_depth,
+                    fanout=self.cfg.hop_fanout,
+                    max_nodes=max(self.cfg.expand_max_nodes, len(seeds)),
+                ) if seeds else {}
+                for seeds in seed_node_ids
+            ]
+        if self.cfg.expand_mode == "recursive":
+            return (yield from self._expand_nodes_recursive(org_id, seed_node_ids))
+        return (yield from self._expand_nodes_iterative(org_id, seed_node_ids))
+
+    def _expand_nodes_recursive(self, org_id: str, seed_node_ids: List[List[str]]) -> Step[List[Dict[str, int]]]:
+        """
+        Server-side expansion in one WITH RECURSIVE walk. Each visited node contributes
+        at most hop_fanout neighbours (strongest edge weight first, node_id as tie-break),
+        so fanout is deterministic per node rather than shared across the frontier.
+        """
+        rows = yield (
             """
-            SELECT DISTINCT ge.src_node_id::text AS node_id
-            FROM edge_evidence ee
-            JOIN graph_edge ge ON ge.edge_id = ee.edge_id
-            WHERE ge.org_id = %s
-              AND ee.evidence_span_id = ANY(%s)
-            UNION
-            SELECT DISTINCT ge.dst_node_id::text AS node_id
-            FROM edge_evidence ee
-            JOIN graph_edge ge ON ge.edge_id = ee.edge_id
-            WHERE ge.org_id = %s
-              AND ee.evidence_span_id = ANY(%s)
+            WITH RECURSIVE walk(qi, node_id, hop) AS (
+                SELECT s.qi, s.node_id, 0 FROM unnest(%(qis)s::int[], %(seeds)s::uuid[]) AS s(qi, node_id)
+              UNION
+                SELECT w.qi, nb.node_id, w.hop + 1
+                FROM walk w
+                CROSS JOIN LATERAL (
+                    SELECT e.node_id, max(e.weight) AS weight
+                    FROM (
+                        SELECT ge.dst_node_id AS node_id, ge.weight
+                        FROM graph_edge ge
+                        WHERE ge.org_id = %(org_id)s AND ge.src_node_id = w.node_id
+                        UNION ALL
+                        SELECT ge.src_node_id AS node_id, ge.weight
+                        FROM graph_edge ge
+                        WHERE ge.org_id = %(org_id)s AND ge.dst_node_id = w.node_id
+                    ) e
+                    GROUP BY e.node_id
+                    ORDER BY weight DESC, e.node_id
+                    LIMIT %(fanout)s
+                ) nb
+                WHERE w.hop < %(depth)s
+            ),
+            best AS (
+                SELECT qi, node_id, MIN(hop) AS hop FROM walk GROUP BY qi, node_id
+            ),
+            ranked AS (
+                SELECT b.*, row_number() OVER (PARTITION BY b.qi ORDER BY b.hop, b.node_id) AS rn
+                FROM best b
+            )
+            SELECT r.qi, r.node_id::text AS node_id, r.hop
+            FROM ranked r
+            JOIN unnest(%(cap_qis)s::int[], %(caps)s::int[]) AS c(qi, max_nodes) ON c.qi = r.qi
+            WHERE r.rn <= c.max_nodes
+            ORDER BY r.qi, r.hop, r.node_id
             """,
-            (org_id, span_ids, org_id, span_ids),
+            {
+                "qis": [i for i, seeds in enumerate(seed_node_ids) for _ in seeds],
+                "seeds": [nid for seeds in seed_node_ids for nid in seeds],
+                "org_id": org_id,
+                "fanout": self.cfg.hop_fanout,
+                "depth": self.cfg.hop_depth,
+                "cap_qis": list(range(len(seed_node_ids))),
+                "caps": [max(self.cfg.expand_max_nodes, len(seeds)) for seeds in seed_node_ids],
+            },
         )
-        rows = cur.fetchall()
-        return [str(r["node_id"]) for r in rows]
-
-    def _expand_nodes(self, cur, org_id: str, seed_node_ids: List[str]) -> List[str]:
-        if not seed_node_ids:
-            return []
+        out: List[Dict[str, int]] = [{} for _ in seed_node_ids]
+        for r in rows:
+            out[r["qi"]][str(r["node_id"])] = int(r["hop"])
+        return out
 
-        visited = set(seed_node_ids)
-        frontier = list(seed_node_ids)
+    def _expand_nodes_iterative(self, org_id: str, seed_node_ids: List[List[str]]) -> Step[List[Dict[str, int]]]:
+        """Per-hop expansion: one statement per hop, fanout shared by each query's frontier per direction."""
+        visited = [{nid: 0 for nid in seeds} for seeds in seed_node_ids]
+        frontiers = [list(seeds) for seeds in seed_node_ids]
 
-        for _hop in range(self.cfg.hop_depth):
-            if not frontier:
+        for hop in range(1, self.cfg.hop_depth + 1):
+            nodes = [nid for frontier in frontiers for nid in frontier]
+            if not nodes:
                 break
-            
-            # Outgoing edges
-            cur.execute(
+            rows = yield (
                 """
-                SELECT DISTINCT dst_node_id::text AS node_id
-                FROM graph_edge
-                WHERE org_id = %s
-                  AND src_node_id = ANY(%s)
-                ORDER BY node_id
-                LIMIT %s
+                WITH f AS (
+                    SELECT * FROM unnest(%(qis)s::int[], %(nodes)s::uuid[]) AS f(qi, node_id)
+                ),
+                nb AS (
+                    SELECT DISTINCT f.qi, 0 AS dir, ge.dst_node_id::text AS node_id
+                    FROM f
+                    JOIN graph_edge ge ON ge.src_node_id = f.node_id
+                    WHERE ge.org_id = %(org_id)s
+                    UNION ALL
+                    SELECT DISTINCT f.qi, 1 AS dir, ge.src_node_id::text AS node_id
+                    FROM f
+                    JOIN graph_edge ge ON ge.dst_node_id = f.node_id
+                    WHERE ge.org_id = %(org_id)s
+                ),
+                ranked AS (
+                    SELECT nb.*, row_number() OVER (PARTITION BY nb.qi, nb.dir ORDER BY nb.node_id) AS rn
+                    FROM nb
+                )
+                SELECT qi, node_id
+                FROM ranked
+                WHERE rn <= %(fanout)s
+                ORDER BY qi, dir, rn
                 """,
-                (org_id, frontier, self.cfg.hop_fanout),
+                {
+                    "qis": [i for i, frontier in enumerate(frontiers) for _ in frontier],
+                    "nodes": nodes,
+                    "org_id": org_id,
+                    "fanout": self.cfg.hop_fanout,
+                },
             )
-            out_rows = cur.fetchall()
+            frontiers = [[] for _ in frontiers]
+            for r in rows:
+                nid = str(r["node_id"])
+                if nid not in visited[r["qi"]]:
+                    visited[r["qi"]][nid] = hop
+                    frontiers[r["qi"]].append(nid)
+
+        return visited
 
-            # Incoming edges
-            cur.execute(
+    def _candidate_spans(
+        self,
+        org_id: str,
+        seed_span_ids: List[List[str]],
+        node_hops: List[Dict[str, int]],
+    ) -> Step[List[List[str]]]:
+        """Seed spans plus spans supporting edges that touch expanded nodes (at most 5000 of those per query)."""
+        out = [set(ids) for ids in seed_span_ids]
+        nodes = [nid for hops in node_hops for nid in hops]
+        if nodes:
+            rows = yield (
                 """
-                SELECT DISTINCT src_node_id::text AS node_id
-                FROM graph_edge
-                WHERE org_id = %s
-                  AND dst_node_id = ANY(%s)
-                ORDER BY node_id
-                LIMIT %s
+                WITH n AS (
+                    SELECT * FROM unnest(%(qis)s::int[], %(nodes)s::uuid[]) AS n(qi, node_id)
+                ),
+                hits AS (
+                    SELECT n.qi, ee.evidence_span_id
+                    FROM n
+                    JOIN graph_edge ge ON ge.src_node_id = n.node_id AND ge.org_id = %(org_id)s
+                    JOIN edge_evidence ee ON ee.edge_id = ge.edge_id
+                    UNION
+                    SELECT n.qi, ee.evidence_span_id
+                    FROM n
+                    JOIN graph_edge ge ON ge.dst_node_id = n.node_id AND ge.org_id = %(org_id)s
+                    JOIN edge_evidence ee ON ee.edge_id = ge.edge_id
+                ),
+                ranked AS (
+                    SELECT hits.*, row_number() OVER (PARTITION BY hits.qi) AS rn FROM hits
+                )
+                SELECT qi, evidence_span_id::text AS id
+                FROM ranked
+                WHERE rn <= 5000
                 """,
-                (org_id, frontier, self.cfg.hop_fanout),
+                {
+                    "qis": [i for i, hops in enumerate(node_hops) for _ in hops],
+                    "nodes": nodes,
+                    "org_id": org_id,
+                },
             )
-            in_rows = cur.fetchall()
-
-            next_nodes = [str(r["node_id"]) for r in (out_rows + in_rows)]
-            new_frontier = []
-            for nid in next_nodes:
-                if nid not in visited:
-                    visited.add(nid)
-                    new_frontier.append(nid)
-            frontier = new_frontier
-
-        return list(visited)
-
-    def _candidate_spans(self, cur, org_id: str, seed_span_ids: List[str], node_ids: List[str]) -> List[str]:
-        ids = set(seed_span_ids)
-
-        if not node_ids:
-            return list(ids)
-
-        # Spans supporting edges that touch expanded nodes
-        cur.execute(
-            """
-            SELECT DISTINCT ee.evidence_span_id::text AS id
-            FROM graph_edge ge
-            JOIN edge_evidence ee ON ee.edge_id = ge.edge_id
-            WHERE ge.org_id = %s
-              AND (ge.src_node_id = ANY(%s) OR ge.dst_node_id = ANY(%s))
-            LIMIT 5000
-            """,
-            (org_id, node_ids, node_ids),
-        )
-        for r in cur.fetchall():
-            ids.add(str(r["id"]))
-
-        return list(ids)
+            for r in rows:
+                out[r["qi"]].add(str(r["id"]))
+        return [list(ids) for ids in out]
 
     def _span_features(
         self,
-        cur,
         org_id: str,
-        query_text: str,
-        query_embedding: Sequence[float],
-        span_ids: List[str],
-        expanded_node_ids: List[str],
-    ) -> Dict[str, Dict[str, float]]:
-        if not span_ids:
-            return {}
-
-        # vec_sim + created_at
-        cur.execute(
-            """
-            SELECT 
-                ee.evidence_span_id::text as id,
-                es.created_at,
-                1 - (ee.embedding <=> %s::vector) AS vec_sim
-            FROM evidence_embedding ee
-            JOIN evidence_span es ON ee.evidence_span_id = es.evidence_span_id
-            WHERE es.org_id = %s
-              AND es.evidence_span_id = ANY(%s)
-            """,
-            (list(query_embedding), org_id, span_ids),
-        )
-        rows = cur.fetchall()
-
-        # lexical BM25 for candidates using websearch_to_tsquery
-        cur.execute(
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        span_ids: List[List[str]],
+        node_hops: List[Dict[str, int]],
+    ) -> Step[List[FeatureColumns]]:
+        """
+        All ranking features for every (query, candidate span) pair in one statement:
+        vector similarity, ts_rank and graph support, the latter aggregated server-side
+        over edges touching the expanded nodes, weighted by the node-type bonus map and
+        hop decay.
+        """
+        if not any(span_ids):
+            return [FeatureColumns.from_rows([]) for _ in texts]
+        rows = yield (
             """
-            SELECT 
-                es.evidence_span_id::text as id,
-                ts_rank(at.fts_en, websearch_to_tsquery('english', %s)) as lex_rank
-            FROM evidence_span es
-            JOIN artifact_text at ON es.artifact_text_id = at.artifact_text_id
-            WHERE es.org_id = %s
-              AND es.evidence_span_id = ANY(%s)
+            WITH q AS MATERIALIZED (
+                SELECT u.qi - 1 AS qi, u.emb::vector AS emb, websearch_to_tsquery('english', u.txt) AS tsq
+                FROM unnest(%(embs)s::text[], %(qs)s::text[]) WITH ORDINALITY AS u(emb, txt, qi)
+            ),
+            cand AS (
+                SELECT * FROM unnest(%(c_qis)s::int[], %(c_spans)s::uuid[]) AS c(qi, span_id)
+            ),
+            hops AS (
+                SELECT * FROM unnest(%(h_qis)s::int[], %(h_nodes)s::uuid[], %(h_hops)s::int[]) AS h(qi, node_id, hop)
+            ),
+            bonus AS (
+                SELECT key AS node_type, value::float8 AS mult
+                FROM jsonb_each_text(%(bonus)s::jsonb)
+            ),
+            support AS (
+                SELECT
+                    c.qi,
+                    ee.evidence_span_id AS id,
+                    SUM(
+                        COALESCE(ee.confidence, 0.5) * COALESCE(ge.weight, 1.0)
+                        * GREATEST(COALESCE(bs.mult, 1.0), COALESCE(bd.mult, 1.0))
+                        * power(%(hop_decay)s::float8,
+                                LEAST(COALESCE(hs.hop, %(hop_depth)s), COALESCE(hd.hop, %(hop_depth)s)))
+                    )::float8 AS edge_support
+                FROM cand c
+                JOIN edge_evidence ee ON ee.evidence_span_id = c.span_id
+                JOIN graph_edge ge ON ge.edge_id = ee.edge_id
+                JOIN graph_node ns ON ns.node_id = ge.src_node_id
+                JOIN graph_node nd ON nd.node_id = ge.dst_node_id
+                LEFT JOIN hops hs ON hs.qi = c.qi AND hs.node_id = ge.src_node_id
+                LEFT JOIN hops hd ON hd.qi = c.qi AND hd.node_id = ge.dst_node_id
+                LEFT JOIN bonus bs ON bs.node_type = ns.node_type
+                LEFT JOIN bonus bd ON bd.node_type = nd.node_type
+                WHERE ge.org_id = %(org_id)s
+                  AND (hs.node_id IS NOT NULL OR hd.node_id IS NOT NULL)
+                GROUP BY c.qi, ee.evidence_span_id
+            )
+            SELECT
+                c.qi,
+                es.evidence_span_id::text AS id,
+                extract(epoch FROM es.created_at)::float8 AS created_at_epoch,
+                1 - (emb.embedding <=> q.emb) AS vec_sim,
+                COALESCE(ts_rank(at.fts_en, q.tsq), 0.0)::float8 AS lex,
+                COALESCE(s.edge_support, 0.0) AS edge_support
+            FROM cand c
+            JOIN q ON q.qi = c.qi
+            JOIN evidence_span es ON es.evidence_span_id = c.span_id
+            JOIN evidence_embedding emb ON emb.evidence_span_id = es.evidence_span_id
+            LEFT JOIN artifact_text at ON at.artifact_text_id = es.artifact_text_id
+            LEFT JOIN support s ON s.qi = c.qi AND s.id = c.span_id
+            WHERE es.org_id = %(org_id)s
             """,
-            (query_text, org_id, span_ids),
+            {
+                "embs": [vector_literal(e) for e in embeddings],
+                "qs": list(texts),
+                "c_qis": [i for i, ids in enumerate(span_ids) for _ in ids],
+                "c_spans": [sid for ids in span_ids for sid in ids],
+                "h_qis": [i for i, hops in enumerate(node_hops) for _ in hops],
+                "h_nodes": [nid for hops in node_hops for nid in hops],
+                "h_hops": [hop for hops in node_hops for hop in hops.values()],
+                "bonus": json.dumps(self._bonus_map()),
+                "hop_decay": self.cfg.hop_decay,
+                "hop_depth": self.cfg.hop_depth,
+                "org_id": org_id,
+            },
         )
-        lex_rows = cur.fetchall()
-        lex_map = {str(r["id"]): float(r["lex_rank"]) for r in lex_rows}
+        by_query: List[Rows] = [[] for _ in texts]
+        for r in rows:
+            by_query[r["qi"]].append(r)
+        return [FeatureColumns.from_rows(qrows) for qrows in by_query]
 
-        # graph_bonus with optional per-type map: fetch edge rows and compute in Python
-        cur.execute(
-            """
-            SELECT 
-                ee.evidence_span_id::text AS id,
-                ns.node_type AS src_type,
-                nd.node_type AS dst_type,
-                (COALESCE(ee.confidence, 0.5) * COALESCE(ge.weight, 1.0))::float AS strength
-            FROM edge_evidence ee
-            JOIN graph_edge ge ON ge.edge_id = ee.edge_id
-            JOIN graph_node ns ON ns.node_id = ge.src_node_id
-            JOIN graph_node nd ON nd.node_id = ge.dst_node_id
-            WHERE ge.org_id = %s
-              AND ee.evidence_span_id = ANY(%s)
-              AND (ge.src_node_id = ANY(%s) OR ge.dst_node_id = ANY(%s))
-            """,
-            (org_id, span_ids, expanded_node_ids, expanded_node_ids),
-        )
-        rows_edges = cur.fetchall()
-        edge_support: Dict[str, float] = {}
-        bonus_map = self.cfg.bonus_map or {
+    def _bonus_map(self) -> Dict[str, float]:
+        return self.cfg.bonus_map or {
             "decision": self.cfg.bonus_decision,
             "outcome": self.cfg.bonus_outcome,
             "assumption": self.cfg.bonus_assumption,
         }
-        for er in rows_edges:
-            sid = str(er["id"])
-            src_t = str(er["src_type"]) if er["src_type"] else ""
-            dst_t = str(er["dst_type"]) if er["dst_type"] else ""
-            strength = float(er["strength"]) if er["strength"] is not None else 0.0
-            mult = max(bonus_map.get(src_t, 1.0), bonus_map.get(dst_t, 1.0))
-            edge_support[sid] = edge_support.get(sid, 0.0) + strength * mult
-
-        feats: Dict[str, Dict[str, float]] = {}
-        for r in rows:
-            sid = str(r["id"])
-            feats[sid] = {
-                "vec_sim": float(r["vec_sim"]),
-                "lex": lex_map.get(sid, 0.0),
-                "edge_support": edge_support.get(sid, 0.0),
-                "created_at_epoch": float(r["created_at"].timestamp()),
-            }
-        return feats
 
-    def _policy_filter(
-        self,
-        cur,
-        org_id: str,
-        user_id: str,
-        acl_groups: Sequence[str],
-        span_ids: List[str],
-        now: datetime,
-    ) -> List[str]:
-        if not span_ids:
-            return []
+    def _visible_acls(self, org_id: str, user_id: str) -> Step[Tuple[List[str], str]]:
+        """
+        ACL ids the principal may read, directly or via roles. Served from the
+        principal_acl_visibility materialization when present (one primary-key
+        lookup), else computed live. Returns (acl_ids, "materialized" | "live").
+        """
+        caps = yield from self.capabilities.ensure()
+        if caps.has_acl_visibility:
+            rows = yield (
+                """
+                SELECT acl_ids::text[] AS acl_ids
+                FROM principal_acl_visibility
+                WHERE org_id = %s AND principal_id = %s::uuid
+                """,
+                (org_id, user_id),
+            )
+            if rows:
+                return list(rows[0]["acl_ids"]), "materialized"
 
-        # ACL: principal allowed via direct or via role
-        cur.execute(
+        rows = yield (
             """
-            WITH allowed_spans AS (
-              SELECT es.evidence_span_id::text AS id
-              FROM evidence_span es
-              JOIN artifact a ON a.artifact_id = es.artifact_id
-              JOIN acl ON acl.acl_id = a.acl_id AND acl.org_id = es.org_id
-              LEFT JOIN acl_allow aa_p ON aa_p.org_id = es.org_id AND aa_p.acl_id = a.acl_id
-                                       AND aa_p.allow_type = 'principal' AND aa_p.principal_id = %s::uuid
-              LEFT JOIN principal_role pr ON pr.org_id = es.org_id AND pr.principal_id = %s::uuid
-              LEFT JOIN acl_allow aa_r ON aa_r.org_id = es.org_id AND aa_r.acl_id = a.acl_id
-                                       AND aa_r.allow_type = 'role' AND aa_r.role_id = pr.role_id
-              WHERE es.org_id = %s AND es.evidence_span_id = ANY(%s)
-                AND (aa_p.acl_id IS NOT NULL OR aa_r.acl_id IS NOT NULL)
-            )
-            SELECT id FROM allowed_spans;
+            SELECT COALESCE(array_agg(DISTINCT aa.acl_id::text), '{}') AS acl_ids
+            FROM acl_allow aa
+            JOIN acl ON acl.acl_id = aa.acl_id AND acl.org_id = aa.org_id
+            LEFT JOIN principal_role pr ON pr.org_id = aa.org_id AND pr.principal_id = %s::uuid
+                                       AND aa.allow_type = 'role' AND pr.role_id = aa.role_id
+            WHERE aa.org_id = %s
+              AND ((aa.allow_type = 'principal' AND aa.principal_id = %s::uuid) OR pr.role_id IS NOT NULL)
             """,
-            (user_id, user_id, org_id, span_ids),
+            (user_id, org_id, user_id),
         )
-        return [str(r["id"]) for r in cur.fetchall()]
+        return list(rows[0]["acl_ids"]), "live"
 
-    def _score_and_rank(self, feats: Dict[str, Dict[str, float]], allowed_ids: List[str]) -> List[Tuple[str, float]]:
-        allowed_set = set(allowed_ids)
+    def _cache_probe(self, org_id: str, user_id: str) -> Step[Optional[Tuple[List[str], str, int]]]:
+        """
+        Everything the result cache key needs from the database: the principal's
+        visible ACLs and the org's data generation, in one round trip when both the
+        ACL materialization and org_data_generation exist. None without
+        org_data_generation (results could not be invalidated, so are not cached).
+        """
+        caps = yield from self.capabilities.ensure()
+        if not caps.has_data_generation:
+            return None
+        if caps.has_acl_visibility:
+            rows = yield (
+                """
+                SELECT
+                    (SELECT acl_ids::text[] FROM principal_acl_visibility
+                     WHERE org_id = %s AND principal_id = %s::uuid) AS acl_ids,
+                    COALESCE((SELECT generation FROM org_data_generation WHERE org_id = %s), 0) AS generation
+                """,
+                (org_id, user_id, org_id),
+            )
+            if rows[0]["acl_ids"] is not None:
+                return list(rows[0]["acl_ids"]), "materialized", int(rows[0]["generation"])
+        rows = yield (
+            "SELECT COALESCE((SELECT generation FROM org_data_generation WHERE org_id = %s), 0) AS generation",
+            (org_id,),
+        )
+        generation = int(rows[0]["generation"])
+        visible_acls, acl_source = yield from self._visible_acls(org_id, user_id)
+        return visible_acls, acl_source, generation
 
-        vec = {sid: feats[sid]["vec_sim"] for sid in feats if sid in allowed_set}
-        graph = {sid: feats[sid]["edge_support"] for sid in feats if sid in allowed_set}
+    def _org_span_count(self, org_id: str) -> Step[int]:
+        rows = yield ("SELECT count(*) AS n FROM evidence_span WHERE org_id = %s", (org_id,))
+        return int(rows[0]["n"])
 
-        vec_n = _safe_normalize(vec)
-        graph_n = _safe_normalize(graph)
+    def _policy_filter(self, org_id: str, visible_acls: List[str], span_ids: List[str]) -> Step[List[str]]:
+        if not span_ids or not visible_acls:
+            return []
 
-        ranked: List[Tuple[str, float]] = []
-        for sid in allowed_ids:
-            f = feats.get(sid)
-            if not f:
-                continue
-            created_at = datetime.fromtimestamp(f["created_at_epoch"], tz=timezone.utc)
-            rec = _recency_bonus(created_at, self.cfg.recency_halflife_days)
-
-            score = (
-                self.cfg.alpha_vec * vec_n.get(sid, 0.0)
-                + self.cfg.beta_bm25 * _safe_normalize({sid: feats[sid]["lex"] for sid in allowed_ids}).get(sid, 0.0)
-                + self.cfg.gamma_graph * graph_n.get(sid, 0.0)
-                + self.cfg.delta_recency * rec
-            )
-            ranked.append((sid, float(score)))
-
-        ranked.sort(key=lambda t: t[1], reverse=True)
-        return ranked
-
-    def _cosine(self, a: Sequence[float], b: Sequence[float]) -> float:
-        if not a or not b:
-            return 0.0
-        num = 0.0
-        da = 0.0
-        db = 0.0
-        for x, y in zip(a, b):
-            num += x * y
-            da += x * x
-            db += y * y
-        if da <= 1e-12 or db <= 1e-12:
-            return 0.0
-        return num / (da ** 0.5 * db ** 0.5)
-
-    def _span_embeddings(self, cur, span_ids: List[str]) -> Dict[str, List[float]]:
+        rows = yield (
+            """
+            SELECT es.evidence_span_id::text AS id
+            FROM evidence_span es
+            JOIN artifact a ON a.artifact_id = es.artifact_id
+            WHERE es.org_id = %s
+              AND es.evidence_span_id = ANY(%s::uuid[])
+              AND a.acl_id = ANY(%s::uuid[])
+            """,
+            (org_id, span_ids, visible_acls),
+        )
+        return [str(r["id"]) for r in rows]
+
+    def _score_and_rank(
+        self,
+        features: FeatureColumns,
+        allowed_ids: List[str],
+        now: datetime,
+    ) -> Tuple[List[Tuple[str, float]], Dict[str, float]]:
+        """Columnar hybrid scoring; keeps only as many spans as MMR or the final cut can use."""
+        cols = features.subset(allowed_ids)
+        k = max(self.cfg.mmr_pool, self.cfg.final_k) if self.cfg.use_mmr else self.cfg.final_k
+        return score_columns(
+            cols,
+            weights=(self.cfg.alpha_vec, self.cfg.beta_bm25, self.cfg.gamma_graph, self.cfg.delta_recency),
+            now_epoch=now.timestamp(),
+            halflife_days=self.cfg.recency_halflife_days,
+            k=k,
+        )
+
+    def _span_embeddings(self, span_ids: List[str]) -> Step[Dict[str, np.ndarray]]:
         if not span_ids:
             return {}
-        cur.execute(
+        # Binary results: pgvector loads each embedding straight into a float32 array
+        rows = yield (
             """
             SELECT evidence_span_id::text as id, embedding
             FROM evidence_embedding
             WHERE evidence_span_id = ANY(%s)
             """,
             (span_ids,),
+            True,
         )
-        rows = cur.fetchall()
-        # psycopg may return memoryview for vector; coerce to list of floats if needed
-        def _to_floats(seq):
-            try:
-                return [float(x) for x in seq]
-            except Exception:
-                return []
-        def _to_list(v):
-            if isinstance(v, (bytes, bytearray, memoryview)):
-                return _to_floats(list(v))
-            return _to_floats(v)
-        return {str(r["id"]): _to_list(r["embedding"]) for r in rows}
+        return {r["id"]: vector_to_array(r["embedding"]) for r in rows}
 
     def _mmr_select(
         self,
         query_embedding: Sequence[float],
         ranked: List[Tuple[str, float]],
-        embed_map: Dict[str, Sequence[float]],
+        embed_map: Dict[str, np.ndarray],
         k: int,
         lam: float,
     ) -> List[str]:
-        candidates = [sid for sid, _ in ranked]
-        selected: List[str] = []
-        selected_set = set()
-        # Pre-normalize scores (second element of ranked)
-        score_map = {sid: s for sid, s in ranked}
-        while candidates and len(selected) < k:
-            best_sid = None
-            best_value = -1e9
-            for sid in candidates[:]:
-                rel = score_map.get(sid, 0.0)
-                div = 0.0
-                if selected:
-                    sim_to_sel = 0.0
-                    for s2 in selected:
-                        v1 = embed_map.get(sid)
-                        v2 = embed_map.get(s2)
-                        if v1 is None or v2 is None:
-                            continue
-                        sim_to_sel = max(sim_to_sel, self._cosine(v1, v2))
-                    div = sim_to_sel
-                value = lam * rel - (1.0 - lam) * div
-                if value > best_value:
-                    best_value = value
-                    best_sid = sid
-            if best_sid is None:
-                break
-            selected.append(best_sid)
-            selected_set.add(best_sid)
-            candidates = [c for c in candidates if c != best_sid]
-        return selected
+        # Pool = leading ranked entries up to the last embedded one; spans without an
+        # embedding get a zero row and, like those past the pool, only compete on relevance
+        pool_size = 1 + max((i for i, (sid, _) in enumerate(ranked) if sid in embed_map), default=-1)
+        dim = max((len(v) for v in embed_map.values()), default=0)
+        matrix = np.zeros((pool_size, dim), dtype=np.float32)
+        for i, (sid, _) in enumerate(ranked[:pool_size]):
+            v = embed_map.get(sid)
+            if v is not None and len(v) == dim:
+                matrix[i] = v
+        order = mmr_select([score for _, score in ranked], matrix, k=k, lam=lam)
+        return [ranked[i][0] for i in order]
 
     def _dedup_by_artifact_overlap(self, spans: List[Dict[str, Any]], max_k: int) -> List[Dict[str, Any]]:
         """Remove overlapping spans per artifact, keep first occurrences in order."""
@@ -566,27 +1134,115 @@ class RetrievalService:
             out.append(s)
         return out
 
-    def _hydrate_spans(self, cur, org_id: str, span_ids: List[str]) -> List[Dict[str, Any]]:
+    def _span_rows(self, org_id: str, span_ids: List[str]) -> Step[Dict[str, Dict[str, Any]]]:
+        """span id -> hydrated row (offsets, text, created_at, confidence)."""
         if not span_ids:
-            return []
-        cur.execute(
-            """
+            return {}
+        # evidence_span_text (migration 0016) holds each span's text; COALESCE only
+        # detoasts the full artifact text for spans missing from it
+        caps = yield from self.capabilities.ensure()
+        if caps.has_span_text:
+            text_sql = "COALESCE(est.span_text, SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char))"
+            text_join = "LEFT JOIN evidence_span_text est ON est.evidence_span_id = es.evidence_span_id"
+        else:
+            text_sql = "SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char)"
+            text_join = ""
+        rows = yield (
+            f"""
             SELECT 
                 es.evidence_span_id::text as id, 
                 es.artifact_id::text, 
                 es.start_char, 
                 es.end_char, 
-                SUBSTRING(at.text_utf8 FROM es.start_char+1 FOR es.end_char-es.start_char) as text,
+                {text_sql} as text,
                 es.created_at,
                 es.confidence
             FROM evidence_span es
             JOIN artifact_text at ON es.artifact_text_id = at.artifact_text_id
+            {text_join}
             WHERE es.org_id = %s
               AND es.evidence_span_id = ANY(%s)
             """,
             (org_id, span_ids),
         )
-        rows = cur.fetchall()
-        by_id = {str(r["id"]): dict(r) for r in rows}
-        ordered = [by_id[sid] for sid in span_ids if sid in by_id]
-        return self._dedup_by_artifact_overlap(ordered, max_k=len(span_ids))
+        return {str(r["id"]): dict(r) for r in rows}
+
+
+class AsyncRetrievalService(RetrievalService):
+    """
+    Same pipeline as RetrievalService, driven on psycopg's async connection API
+    so concurrent queries interleave on I/O instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        cfg: Optional[RetrievalConfig] = None,
+        pool: Optional[AsyncConnectionPool] = None,
+        graph_cache: Optional[GraphCache] = None,
+        capabilities: Optional[SchemaCapabilities] = None,
+    ):
+        super().__init__(dsn, cfg, graph_cache=graph_cache, capabilities=capabilities)
+        self.pool = pool
+
+    @asynccontextmanager
+    async def _aconnection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """Borrow a pooled async connection when a pool is configured, else connect directly."""
+        if self.pool is not None:
+            async with self.pool.connection() as conn:
+                yield conn
+        else:
+            async with await psycopg.AsyncConnection.connect(self.dsn) as conn:
+                await configure_async_connection(conn)
+                yield conn
+
+    async def retrieve(
+        self,
+        org_id: str,
+        query_text: str,
+        query_embedding: Sequence[float],
+        user_id: str = "system",
+        acl_groups: Sequence[str] = (),
+        now: Optional[datetime] = None,
+        visible: Optional[Tuple[List[str], str]] = None,
+        cfg: Optional[RetrievalConfig] = None,
+    ) -> Dict[str, Any]:
+        svc = self if cfg is None else self.with_config(cfg)
+        await svc._ensure_graph(org_id)
+        return await self._run(svc._pipeline(org_id, query_text, query_embedding, user_id, acl_groups, now, visible))
+
+    async def retrieve_batch(
+        self,
+        org_id: str,
+        queries: Sequence[Tuple[str, Sequence[float]]],
+        user_id: str = "system",
+        acl_groups: Sequence[str] = (),
+        now: Optional[datetime] = None,
+        visible: Optional[Tuple[List[str], str]] = None,
+        cfg: Optional[RetrievalConfig] = None,
+    ) -> Dict[str, Any]:
+        svc = self if cfg is None else self.with_config(cfg)
+        await svc._ensure_graph(org_id)
+        return await self._run(svc._batch_pipeline(org_id, queries, user_id, acl_groups, now, visible))
+
+    async def _ensure_graph(self, org_id: str) -> None:
+        """csr expansion: refresh the org's cached adjacency once for all concurrent requests."""
+        if self.cfg.expand_mode == "csr":
+            await self.graph_cache.ensure(org_id, self._run)
+
+    async def cache_probe(self, org_id: str, user_id: str) -> Optional[Tuple[List[str], str, int]]:
+        """(visible acl_ids, acl source, org data generation) for the result cache key."""
+        return await self._run(self._cache_probe(org_id, user_id))
+
+    async def org_span_count(self, org_id: str) -> int:
+        """Evidence spans in the org (metrics org-size bucket)."""
+        return await self._run(self._org_span_count(org_id))
+
+    async def detect_capabilities(self) -> SchemaCapabilities:
+        """Run schema detection now (e.g. at startup) rather than on the first query."""
+        return await self._run(self.capabilities.ensure())
+
+    async def _run(self, step: Step[T]) -> T:
+        async with self._aconnection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                return await _adrive(cur, step)
@@ -0,0 +1,213 @@
+"""
+Pooled keep-alive HTTP clients for downstream services, one per downstream.
+
+The one copy shared by every service: each Dockerfile copies it next to the service's
+entry module (COPY services/shared/downstream.py /app/downstream.py). When running a
+service from the source tree, put services/shared on PYTHONPATH.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib.util
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+
+def http_limits_from_env(max_connections: int, max_keepalive: int) -> Dict[str, Any]:
+    """
+    DownstreamClient pool settings from HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY and HTTP2_ENABLED, falling back to the calling service's
+    defaults.
+    """
+    return {
+        "max_connections": int(os.environ.get("HTTP_MAX_CONNECTIONS", str(max_connections))),
+        "max_keepalive": int(os.environ.get("HTTP_MAX_KEEPALIVE", str(max_keepalive))),
+        "keepalive_expiry": float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30")),
+        # HTTP/2 is only negotiated when the optional h2 package is installed
+        "http2": (
+            os.environ.get("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+            and importlib.util.find_spec("h2") is not None
+        ),
+    }
+
+
+class _PooledClient:
+    """Pool limits and request counters shared by the async and sync clients."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self._client: Any = None
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.clients_created = 0
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "http2": self.http2, "limits": self.limits, "timeout": self.timeout}
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured limits and this holder's own counters."""
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "timeout": self.timeout,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "open": self._client is not None and not self._client.is_closed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "clients_created": self.clients_created,
+        }
+
+
+def _timeout(timeout: Optional[float]) -> Any:
+    return httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+
+
+class DownstreamClient(_PooledClient):
+    """
+    Shared keep-alive httpx.AsyncClient for one downstream service.
+
+    Created lazily on first request (handlers also work without startup events, e.g.
+    under TestClient), re-created if the running event loop changed, and closed on
+    shutdown. Timeouts can be overridden per call.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(**self._client_kwargs())
+            self._loop = loop
+            self.clients_created += 1
+        return self._client
+
+    @contextlib.contextmanager
+    def _counted(self) -> Iterator[None]:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        client = self.client()
+        with self._counted():
+            return await client.request(method, path, timeout=_timeout(timeout), **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self, method: str, path: str, timeout: Optional[float] = None, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        """Request with a streamed response body; in flight until the body is closed."""
+        client = self.client()
+        with self._counted():
+            async with client.stream(method, path, timeout=_timeout(timeout), **kwargs) as response:
+                yield response
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+class SyncDownstreamClient(_PooledClient):
+    """
+    Shared keep-alive httpx.Client for one downstream service, safe to use from
+    several threads (e.g. a scheduler thread and request handlers).
+
+    Created lazily on first request and closed on shutdown. Timeouts can be
+    overridden per call.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(**self._client_kwargs())
+                self.clients_created += 1
+            return self._client
+
+    @contextlib.contextmanager
+    def _counted(self) -> Iterator[None]:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        except httpx.HTTPError:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        client = self.client()
+        with self._counted():
+            return client.request(method, path, timeout=_timeout(timeout), **kwargs)
+
+    @contextlib.contextmanager
+    def stream(self, method: str, path: str, timeout: Optional[float] = None, **kwargs: Any) -> Iterator[httpx.Response]:
+        """Request with a streamed response body; in flight until the body is closed."""
+        client = self.client()
+        with self._counted():
+            with client.stream(method, path, timeout=_timeout(timeout), **kwargs) as response:
+                yield response
+
+    def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", path, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None